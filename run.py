@@ -1,7 +1,9 @@
+import argparse
 import os
-import sys
 from data_processor.batch_processor import BatchProcessor
 from data_processor.config import Config
+from data_processor.parallel import process_parallel
+from data_processor.metrics import export_metrics
 
 def main():
     # 기본값 설정
@@ -10,28 +12,36 @@ def main():
     output_file = 'result.jsonl'
     
     # 명령줄 인자 처리
-    if len(sys.argv) != 3:
-        print("사용법: python run.py <시작_ID> <종료_ID>")
-        print("예시: python run.py 53749 53849")
-        sys.exit(1)
-    
-    try:
-        start_id = int(sys.argv[1])
-        end_id = int(sys.argv[2])
-    except ValueError:
-        print("오류: ID는 숫자여야 합니다.")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        usage="python run.py <시작_ID> <종료_ID> [--workers N] [--resume]",
+        epilog="예시: python run.py 53749 53849 --workers 4"
+    )
+    parser.add_argument('start_id', type=int, help='시작 ID')
+    parser.add_argument('end_id', type=int, help='종료 ID')
+    parser.add_argument('--workers', type=int, default=1, help='병렬 워커 프로세스 수')
+    parser.add_argument('--resume', action='store_true', help='중단된 실행을 체크포인트에서 이어서 처리')
+    args = parser.parse_args()
+    start_id = args.start_id
+    end_id = args.end_id
     
     # 출력 디렉토리 생성
     os.makedirs(output_dir, exist_ok=True)
     output_path = os.path.join(output_dir, output_file)
     
     # 설정 로드 및 처리 실행
-    config = Config(config_path)
-    processor = BatchProcessor(config)
-    
     print(f"처리 시작: ID {start_id} ~ {end_id}")
-    processor.process_to_file(start_id, end_id, output_path)
+    config = Config(config_path)
+    if config.processor.dedup != 'none' and args.workers > 1:
+        parser.error('dedup은 --workers와 함께 사용할 수 없습니다 (워커별 필터라 샤드 간 중복이 남음)')
+    if args.workers > 1:
+        metrics = process_parallel(config_path, start_id, end_id, output_path, args.workers, resume=args.resume)['metrics']
+    else:
+        processor = BatchProcessor(config)
+        processor.process_to_file(start_id, end_id, output_path, resume=args.resume)
+        metrics = processor.metrics
+    # 설정 파일의 metrics_json / metrics_prometheus 경로에 실행 지표 저장
+    export_metrics(metrics, config.processor.metrics_json, config.processor.metrics_prometheus,
+                   {'output': output_path, 'workers': args.workers})
     print(f"처리 완료: 결과가 {output_path}에 저장되었습니다.")
 
 if __name__ == '__main__':
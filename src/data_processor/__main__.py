@@ -1,26 +1,94 @@
 import argparse
+import cProfile
 import os
-from .config import Config
+from .config import load_config
 from .batch_processor import BatchProcessor
+from .parallel import process_parallel
+from .metrics import dump_profile, export_metrics
 
 def main():
     # 1. 인자 파싱
     parser = argparse.ArgumentParser(description='DB 데이터로 학습 데이터셋 생성')
     parser.add_argument('--config', type=str, required=True, help='설정 파일 경로')
-    parser.add_argument('--start-id', type=int, required=True, help='시작 ID')
-    parser.add_argument('--end-id', type=int, required=True, help='종료 ID')
+    parser.add_argument('--start-id', type=int, help='시작 ID')
+    parser.add_argument('--end-id', type=int, help='종료 ID')
     parser.add_argument('--output', type=str, required=True, help='출력 파일 경로')
+    parser.add_argument('--workers', type=int, default=1, help='병렬 워커 프로세스 수 (ID 구간을 샤드로 분할)')
+    parser.add_argument('--format', type=str, choices=['jsonl', 'parquet'], help='출력 형식 (기본값: 설정 파일의 output_format)')
+    parser.add_argument('--compression', type=str, choices=['none', 'gzip', 'zstd'], help='JSONL 샤드 압축 방식')
+    parser.add_argument('--shard-records', type=int, help='샤드당 최대 레코드 수')
+    parser.add_argument('--shard-bytes', type=int, help='샤드당 최대 바이트 수')
+    parser.add_argument('--tokenized', action='store_true', help='학습 데이터를 어휘 사전 정수 ID로 저장')
+    parser.add_argument('--snapshot', type=str, help='DB 대신 읽을 로컬 스냅샷 디렉토리')
+    parser.add_argument('--resume', action='store_true', help='체크포인트에서 이어서 처리')
+    parser.add_argument('--incremental', action='store_true', help='이전 실행 이후 추가된 데이터만 처리해 새 샤드로 추가')
+    parser.add_argument('--metrics-json', type=str, help='실행 지표 JSON 저장 경로 (단계별 지연 p50/p95/p99 등)')
+    parser.add_argument('--metrics-prom', type=str, help='실행 지표 Prometheus textfile 저장 경로')
+    parser.add_argument('--profile', type=str, help='cProfile 결과 저장 경로 (.prof, 상위 함수 보고서 출력)')
     args = parser.parse_args()
+    if args.incremental and args.workers > 1:
+        parser.error('--incremental은 --workers와 함께 사용할 수 없습니다')
+    if args.tokenized and args.workers > 1:
+        parser.error('--tokenized는 --workers와 함께 사용할 수 없습니다 (워커별 어휘 사전 ID가 달라짐)')
+    if args.profile and args.workers > 1:
+        parser.error('--profile은 --workers와 함께 사용할 수 없습니다 (워커 프로세스는 프로파일되지 않음)')
+    if not args.incremental and (args.start_id is None or args.end_id is None):
+        parser.error('--start-id와 --end-id가 필요합니다 (--incremental 제외)')
+    
+    # 명령줄 옵션으로 덮어쓸 [processor] 설정
+    overrides = {}
+    if args.format:
+        overrides['output_format'] = args.format
+    if args.compression:
+        overrides['output_compression'] = args.compression
+    if args.shard_records is not None:
+        overrides['shard_max_records'] = args.shard_records
+    if args.shard_bytes is not None:
+        overrides['shard_max_bytes'] = args.shard_bytes
+    if args.tokenized:
+        overrides['output_tokenized'] = True
+    if args.snapshot:
+        overrides['backend'] = 'snapshot'
+        overrides['snapshot_dir'] = args.snapshot
+    if args.metrics_json:
+        overrides['metrics_json'] = args.metrics_json
+    if args.metrics_prom:
+        overrides['metrics_prometheus'] = args.metrics_prom
     
     # 2. 출력 디렉토리 생성
     os.makedirs(os.path.dirname(args.output), exist_ok=True)
     
-    # 3. 설정 로드
-    config = Config(args.config)
+    # 3. 설정 로드 (dedup은 설정 파일 값이라 로드 후 확인)
+    config = load_config(args.config, overrides)
+    if config.processor.dedup != 'none' and args.workers > 1:
+        parser.error('dedup은 --workers와 함께 사용할 수 없습니다 (워커별 필터라 샤드 간 중복이 남음)')
+    
+    # 병렬 실행: 워커마다 설정을 다시 읽고 자체 DB 연결 사용
+    if args.workers > 1:
+        stats = process_parallel(args.config, args.start_id, args.end_id, args.output, args.workers, overrides,
+                                 resume=args.resume)
+        metrics = stats['metrics']
+    else:
+        # 4. 처리 실행 (--profile: cProfile로 감싸 실행)
+        profiler = cProfile.Profile() if args.profile else None
+        if profiler is not None:
+            profiler.enable()
+        try:
+            processor = BatchProcessor(config)
+            if args.incremental:
+                processor.process_incremental(args.output, args.start_id, resume=args.resume)
+            else:
+                processor.process_to_file(args.start_id, args.end_id, args.output, resume=args.resume)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                dump_profile(profiler, args.profile)
+        metrics = processor.metrics
     
-    # 4. 처리 실행
-    processor = BatchProcessor(config)
-    processor.process_to_file(args.start_id, args.end_id, args.output)
+    # 5. 실행 지표 저장
+    run_info = {'output': args.output, 'workers': args.workers, 'incremental': args.incremental}
+    for path in export_metrics(metrics, config.processor.metrics_json, config.processor.metrics_prometheus, run_info):
+        print(f"- 실행 지표: {path}")
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
@@ -1,114 +1,456 @@
-import json
 import time
-from typing import Dict, Any, Iterator, List
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from .config import Config
-from .db_connector import DBConnector
+from .db_connector import create_connector
 from .spatial_matcher import SpatialMatcher
+from .pipeline import Prefetcher
+from .writer import float_repr
+from .outputs import open_writer, output_files
+from .checkpoint import checkpoint_path_for, watermark_path_for, load_state, save_state
+from .fingerprint import FingerprintVocabulary, parse_batch, vocabulary_path_for
+from .dedup import FingerprintDeduplicator, dedup_state_path_for
+from .metrics import RunMetrics
+from .batch_sizer import AdaptiveBatchSizer
 import os
 
-def float_repr(o):
-    """부동소수점 숫자를 문자열로 변환 (지수 표기법 방지)"""
-    if isinstance(o, float):
-        return format(o, 'f').rstrip('0').rstrip('.')
-    return repr(o)
-
 class BatchProcessor:
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, db=None):
         self.config = config
-        self.db = DBConnector(config.db)
+        # db: 이미 만든 커넥터 사용 (벤치마크 등), 없으면 설정의 backend로 생성
+        self.db = db if db is not None else create_connector(config)
         self.matcher = SpatialMatcher(self.db, config.processor)
         self.stats = {
             'db_read_time': 0,
+            'db_queries': 0,
             'building_match_time': 0,
-            'total_records': 0
+            'write_time': 0,
+            'building_index_load_time': 0,
+            'cell_match_time': 0,
+            'cell_index_load_time': 0,
+            'dedup_time': 0,
+            'pipeline_fetch_busy': 0,
+            'pipeline_fetch_idle': 0,
+            'pipeline_process_idle': 0,
+            'total_records': 0,
+            'resumed_records': 0
         }
+        # 단계별 배치 지연 시간 히스토그램, 조회당 행 수, 기록 바이트 수
+        self.metrics = RunMetrics()
+        self.last_range: Optional[Tuple[int, int]] = None
+        self.last_read_id: Optional[int] = None  # 마지막으로 읽은 collectxy ID (중복 제거 전 기준)
+        # 지문 토큰 어휘 사전 (tokenized 출력에서만 사용, 같은 MAC/셀 ID는 str 객체 1개, 파일로 저장)
+        self.vocabulary = FingerprintVocabulary() if config.processor.output_tokenized else None
+        
+        # 메모리 인덱스 모드: 시작 시 건물 bbox 1회 적재
+        if config.processor.building_search and config.processor.building_match_mode == 'index':
+            load_start = time.time()
+            self.matcher.load_building_index()
+            self.stats['building_index_load_time'] = time.time() - load_start
+        
+        # 중복 지문 판정 (Bloom 필터 + 최근 레코드 LRU 창)
+        self.deduplicator = None
+        if config.processor.dedup != 'none':
+            if config.processor.dedup not in ('drop', 'count'):
+                raise ValueError(f"지원하지 않는 중복 처리 방식: {config.processor.dedup}")
+            self.deduplicator = FingerprintDeduplicator(config.processor.dedup_capacity,
+                                                        config.processor.dedup_fp_rate,
+                                                        config.processor.dedup_window)
+        
+        # 적응형 배치: 조회 시간/행 밀도에 따라 batch_size_min ~ batch_size_max 사이에서 조정
+        self.batch_sizer = None
+        if config.processor.batch_sizing != 'fixed':
+            if config.processor.batch_sizing != 'adaptive':
+                raise ValueError(f"지원하지 않는 배치 크기 방식: {config.processor.batch_sizing}")
+            self.batch_sizer = AdaptiveBatchSizer(config.processor.batch_size,
+                                                  config.processor.batch_size_min,
+                                                  config.processor.batch_size_max,
+                                                  config.processor.batch_target_latency,
+                                                  config.processor.batch_target_rows)
+        
+        # 셀 인덱스 매칭: 시작 시 cellidindex bbox 1회 적재
+        if config.processor.cell_search:
+            load_start = time.time()
+            self.matcher.load_cell_index()
+            self.stats['cell_index_load_time'] = time.time() - load_start
     
-    def process_range(self, start_id: int, end_id: int) -> Iterator[Dict[str, Any]]:
-        """지정된 범위의 데이터를 배치 단위로 처리"""
-        for batch_start in range(start_id, end_id, self.config.processor.batch_size):
-            batch_end = min(batch_start + self.config.processor.batch_size, end_id)
-            
-            # 1. Collectxy 배치 데이터 로드 (그리드 셀 계산 포함)
+    def read_batches(self, start_id: int, end_id: int) -> Iterator[List[Dict[str, Any]]]:
+        """Collectxy 배치 로드 (pipeline_depth > 0이면 백그라운드 스레드에서 미리 읽기)"""
+        depth = self.config.processor.pipeline_depth
+        if depth <= 0:
+            yield from self._fetch_batches(start_id, end_id)
+            return
+        
+        prefetcher = Prefetcher(self._fetch_batches(start_id, end_id), depth)
+        try:
+            yield from prefetcher
+        finally:
+            self.stats['pipeline_fetch_busy'] += prefetcher.producer_busy
+            self.stats['pipeline_fetch_idle'] += prefetcher.producer_idle
+            self.stats['pipeline_process_idle'] += prefetcher.consumer_idle
+    
+    def _fetch_batches(self, start_id: int, end_id: int) -> Iterator[List[Dict[str, Any]]]:
+        """Collectxy 배치 조회 (collectxy_reader 설정에 따라 ID 구간 또는 keyset 페이지)"""
+        batch_size = self.config.processor.batch_size
+        if self.batch_sizer is not None:
+            batches = self._adaptive_batches(start_id, end_id)
+        elif self.config.processor.collectxy_reader == 'keyset':
+            batches = self.db.iter_collectxy_batches(start_id, end_id, batch_size)
+        else:
+            # 양 끝을 포함하는 구간이므로 [batch_start, batch_start + batch_size - 1]로 겹치지 않게 조회
+            batches = (
+                self.db.get_collectxy_batch(batch_start, min(batch_start + batch_size - 1, end_id))
+                for batch_start in range(start_id, end_id + 1, batch_size)
+            )
+        
+        while True:
             db_start = time.time()
-            locations = self.db.get_collectxy_batch(batch_start, batch_end)
-            self.stats['db_read_time'] += time.time() - db_start
+            locations = next(batches, None)
+            db_time = time.time() - db_start
+            self.stats['db_read_time'] += db_time
+            if locations is None:
+                return
+            self.stats['db_queries'] += 1
+            self.metrics.observe('fetch', db_time)
+            self.metrics.observe_query(len(locations))
+            if locations:
+                yield locations
+    
+    def _adaptive_batches(self, start_id: int, end_id: int) -> Iterator[List[Dict[str, Any]]]:
+        """배치마다 AdaptiveBatchSizer가 정한 크기로 조회 (keyset: 행 수, range: 겹치지 않는 ID 구간 폭)"""
+        sizer = self.batch_sizer
+        keyset = self.config.processor.collectxy_reader == 'keyset'
+        next_id = start_id
+        while next_id <= end_id:
+            size = sizer.size
+            query_start = time.time()
+            if keyset:
+                locations = self.db.get_collectxy_after(next_id - 1, end_id, size)
+            else:
+                locations = self.db.get_collectxy_batch(next_id, min(next_id + size - 1, end_id))
+            sizer.observe(size, len(locations), time.time() - query_start)
+            self.metrics.observe_batch_size(size)
+            yield locations
+            if keyset:
+                if len(locations) < size:
+                    return
+                next_id = locations[-1]['id'] + 1
+            else:
+                next_id += size
+    
+    def iter_batches(self, start_id: int, end_id: int) -> Iterator[Tuple[List[Dict[str, Any]], Optional[List[List[Dict]]]]]:
+        """지정된 범위를 배치 단위로 읽어 (위치 목록, 위치별 매칭 건물 목록) 생성"""
+        # 1. Collectxy 배치 데이터 로드 (그리드 셀 계산 포함)
+        for locations in self.read_batches(start_id, end_id):
+            self.stats['total_records'] += len(locations)
+            self.last_read_id = locations[-1]['id']
             
-            if not locations:
-                continue
+            # 2. 중복 지문 판정 (매칭 전에 제거해 매칭 비용도 줄임, 모두 제거되어도 빈 배치 전달)
+            if self.deduplicator is not None:
+                dedup_start = time.time()
+                duplicates = self.deduplicator.duplicates(locations)
+                if self.config.processor.dedup == 'drop':
+                    locations = [location for location, duplicate in zip(locations, duplicates) if not duplicate]
+                dedup_time = time.time() - dedup_start
+                self.stats['dedup_time'] += dedup_time
+                self.metrics.observe('dedup', dedup_time)
             
-            # 2. 각 위치에 대해 처리
-            for location in locations:
-                self.stats['total_records'] += 1
-                
+            # 3. 빌딩 탐색이 활성화된 경우에만 수행
+            batch_match_start = time.time()
+            buildings = None
+            if self.config.processor.building_search:
+                match_start = time.time()
+                buildings = self.match_buildings(locations)
+                self.stats['building_match_time'] += time.time() - match_start
+            
+            # 4. 셀 인덱스 매칭 결과는 위치별 'lcellids'로 추가
+            if self.config.processor.cell_search:
+                match_start = time.time()
+                for location, cells in zip(locations, self.matcher.match_cells_batch(locations)):
+                    location['lcellids'] = cells
+                self.stats['cell_match_time'] += time.time() - match_start
+            if self.config.processor.building_search or self.config.processor.cell_search:
+                self.metrics.observe('match', time.time() - batch_match_start)
+            
+            yield locations, buildings
+    
+    def match_buildings(self, locations: List[Dict[str, Any]]) -> List[List[Dict]]:
+        """배치 위치별 매칭 건물 목록 (매칭 방식에 따라 레코드별 또는 배치 단위)"""
+        if self.config.processor.building_match_mode in ('batch', 'index'):
+            return self.matcher.find_buildings_batch(locations)
+        return [self.matcher.find_matches(location).get('buildings', []) for location in locations]
+    
+    def process_range(self, start_id: int, end_id: int) -> Iterator[Dict[str, Any]]:
+        """지정된 범위의 데이터를 배치 단위로 처리"""
+        for locations, buildings in self.iter_batches(start_id, end_id):
+            # 지문 컬럼은 배치 단위로 한 번에 파싱
+            batch = parse_batch(locations, self.vocabulary)
+            columns = zip(batch.token_rows('lcellid'), batch.token_rows('wmac'),
+                          batch.wrssi_rows(), batch.token_rows('ipcikey'))
+            
+            # 각 위치에 대해 처리
+            for i, (location, (lcellid, wmac, wrssi, ipcikey)) in enumerate(zip(locations, columns)):
                 # 기본 응답 구조 생성 (location 정보는 제외)
                 result = {
                     'input': {
-                        'lcellid': location['lcellid'].split(',') if location['lcellid'] else [],
-                        'wmac': location['wmac'].split(',') if location['wmac'] else [],
-                        'wrssi': [float(x) for x in location['wrssi'].split(',')] if location['wrssi'] else [],
-                        'ipcikey': location['ipcikey'].split(',') if location['ipcikey'] else []
+                        'lcellid': lcellid,
+                        'wmac': wmac,
+                        'wrssi': wrssi,
+                        'ipcikey': ipcikey
                     },
                     'answer': {
                         'grid_cell': location['grid_cell']
                     }
                 }
                 
-                # 빌딩 탐색이 활성화된 경우에만 수행
-                if self.config.processor.building_search:
-                    match_start = time.time()
-                    matches = self.matcher.find_matches(location)
-                    self.stats['building_match_time'] += time.time() - match_start
-                    result['answer']['buildings'] = matches.get('buildings', [])
+                if buildings is not None:
+                    result['answer']['buildings'] = buildings[i]
+                if 'lcellids' in location:
+                    result['answer']['lcellids'] = location['lcellids']
                 
                 yield result
     
-    def process_to_file(self, start_id: int, end_id: int, output_path: str):
-        """처리 결과를 파일로 저장"""
+    def _load_checkpoint(self, checkpoint_path: str, start_id: int, end_id: int,
+                         outputs: List[str]) -> Optional[Dict[str, Any]]:
+        """이어쓸 수 있는 체크포인트 로드 (다른 실행의 체크포인트면 None)"""
+        state = load_state(checkpoint_path)
+        if state is None or state['start_id'] != start_id or state['outputs'] != outputs:
+            return None
+        if state['completed'] and state['end_id'] != end_id:
+            return None
+        return state
+
+    def process_to_file(self, start_id: int, end_id: int, output_path: str, report: bool = True,
+                        resume: bool = False, append: bool = False) -> Dict[str, Any]:
+        """처리 결과를 파일로 저장하고 실행 통계 반환
+        
+        resume=True이면 체크포인트의 마지막 ID 다음부터 이어서 처리하고,
+        append=True이면 기존 샤드 뒤에 새 샤드를 추가한다 (증분 처리).
+        """
         total_start = time.time()
+        config = self.config.processor
         
         # 출력 디렉토리가 없으면 생성
         output_dir = os.path.dirname(output_path)
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
-            
-        # traindata 파일 경로 생성
-        base_name = os.path.splitext(output_path)[0]
-        train_path = f"{base_name}_traindata.jsonl"
         
-        # 두 파일 동시에 처리
-        with open(output_path, 'w', encoding='utf-8') as f_out, \
-             open(train_path, 'w', encoding='utf-8') as f_train:
-            
-            for record in self.process_range(start_id, end_id):
-                # 원본 형식으로 저장
-                json.dump(record, f_out, ensure_ascii=False, default=float_repr)
-                f_out.write('\n')
-                
-                wmac_str = ','.join(record['input']['wmac']) if record['input']['wmac'] else ""
-                wrssi_str = ','.join([str(x) for x in record['input']['wrssi']]) if record['input']['wrssi'] else ""
-                lcellid_str = ','.join(record['input']['lcellid']) if record['input']['lcellid'] else ""
-                ipcikey_str = ','.join(record['input']['ipcikey']) if record['input']['ipcikey'] else ""
-                
-                prompt_str = f"wmac={wmac_str} wrssi={wrssi_str} lcellid={lcellid_str} ipcikey={ipcikey_str}"
-                completion_str = f"x_id={record['answer']['grid_cell']['x_id']},y_id={record['answer']['grid_cell']['y_id']}"
-                
-                train_record = {
-                    "prompt": prompt_str,
-                    "completion": completion_str
-                }
-                
-                json.dump(train_record, f_train, ensure_ascii=False)
-                f_train.write('\n')
+        # 1. 체크포인트 확인 (이어쓰기)
+        checkpoint_path = checkpoint_path_for(output_path)
+        vocabulary_path = vocabulary_path_for(output_path)
+        outputs = output_files(output_path, config)
+        resume_state = None
+        vocabulary_sizes = None
+        dedup_sequence = None
+        read_start = start_id
+        if resume:
+            state = self._load_checkpoint(checkpoint_path, start_id, end_id, outputs)
+            if state is not None and state['completed']:
+                print(f"이미 처리 완료된 구간입니다: ID {start_id} ~ {end_id}")
+                return self.summary(time.time() - total_start)
+            if state is not None:
+                end_id = state['end_id']
+                read_start = state['last_id'] + 1
+                resume_state = state['writer']
+                vocabulary_sizes = state.get('vocabulary')
+                dedup_sequence = state.get('dedup')
+                self.stats['resumed_records'] = resume_state['records']
+                print(f"체크포인트에서 재개: ID {read_start} ~ {end_id} (기록된 레코드 {resume_state['records']}건)")
+        self.last_range = (start_id, end_id)
+        
+        # tokenized 출력: 이어쓰기/증분 처리는 기존 어휘 사전의 ID를 그대로 이어서 사용
+        vocabulary = None
+        if config.output_tokenized:
+            if resume_state or append:
+                self.vocabulary = FingerprintVocabulary.load(vocabulary_path, vocabulary_sizes)
+            else:
+                if self.vocabulary is None:
+                    self.vocabulary = FingerprintVocabulary()
+                # 새 실행: 이전 실행이 남긴 journal을 지우고 현재 사전에서 시작
+                self.vocabulary.save(vocabulary_path)
+            vocabulary = self.vocabulary
+        
+        # 2. 출력 형식별 writer 생성 (jsonl: 원본 + 학습 데이터 동시 저장, parquet: 학습 데이터)
+        with open_writer(output_path, config, append=append, resume_state=resume_state,
+                         vocabulary=vocabulary) as writer:
+            # parquet은 중간 상태를 잘라낼 수 없으므로 체크포인트를 남기지 않음
+            checkpointing = config.checkpoint_interval > 0 and hasattr(writer, 'checkpoint')
+            if self.deduplicator is not None and checkpointing:
+                # 중복 판정 상태도 체크포인트와 함께 저장 (이어쓰기/증분 처리는 저장된 필터/창에서 계속)
+                self.deduplicator.open_state(dedup_state_path_for(output_path), restore=bool(resume_state or append),
+                                             sequence=dedup_sequence)
+            state = {'start_id': start_id, 'end_id': end_id, 'outputs': outputs, 'completed': False}
+            batch_start = last_checkpoint = time.time()
+            for batch_count, (locations, buildings) in enumerate(self.iter_batches(read_start, end_id), 1):
+                write_start = time.time()
+                encode_time = writer.encode_time
+                writer.write_batch(locations, buildings)
+                # serialize: 인코딩, write: 나머지 (압축, 파일 기록)
+                encode_time = writer.encode_time - encode_time
+                self.metrics.observe('serialize', encode_time)
+                self.metrics.observe('write', max(time.time() - write_start - encode_time, 0))
+                # 체크포인트는 fsync를 동반하므로 checkpoint_seconds 이상 지났을 때만 저장
+                if (checkpointing and batch_count % config.checkpoint_interval == 0
+                        and time.time() - last_checkpoint >= config.checkpoint_seconds):
+                    # 중복 제거로 빈 배치여도 읽은 위치까지 진행
+                    state.update(last_id=self.last_read_id, writer=writer.checkpoint())
+                    if vocabulary is not None:
+                        # 추가된 토큰만 사전 journal에 먼저 기록 (재개 시 체크포인트 크기로 잘라 사용)
+                        vocabulary.append_journal(vocabulary_path)
+                        state['vocabulary'] = vocabulary.sizes()
+                    if self.deduplicator is not None:
+                        state['dedup'] = self.deduplicator.append_journal()
+                    save_state(checkpoint_path, state)
+                    if self.deduplicator is not None:
+                        self.deduplicator.compact()
+                    last_checkpoint = time.time()
+                now = time.time()
+                self.stats['write_time'] += now - write_start
+                self.metrics.observe('batch', now - batch_start)
+                batch_start = now
+        
+        if vocabulary is not None:
+            vocabulary.save(vocabulary_path)
+        
+        # 3. 완료 표시 (같은 구간을 다시 --resume 하면 건너뜀)
+        if checkpointing:
+            state.update(last_id=end_id, writer=None, completed=True)
+            if self.deduplicator is not None:
+                state['dedup'] = self.deduplicator.append_journal()
+            save_state(checkpoint_path, state)
+            if self.deduplicator is not None:
+                # 다음 증분 실행이 journal 재생 없이 읽도록 상태 파일로 정리
+                self.deduplicator.save()
         
         total_time = time.time() - total_start
+        self.metrics.counters['bytes_written'] += writer.bytes_written
+        self.metrics.counters['written_records'] += writer.records - self.stats['resumed_records']
+        if report:
+            self.print_stats(total_time, writer.paths)
+            if vocabulary is not None:
+                sizes = vocabulary.sizes()
+                print(f"- 어휘 사전: {vocabulary_path} "
+                      f"(wmac {sizes['wmac']}개, lcellid {sizes['lcellid']}개, ipcikey {sizes['ipcikey']}개)")
+        return self.summary(total_time)
+    
+    def process_incremental(self, output_path: str, start_id: Optional[int] = None,
+                            report: bool = True, resume: bool = False) -> Dict[str, Any]:
+        """이전 실행의 워터마크 이후 추가된 collectxy 행만 처리해 새 샤드로 추가"""
+        # 1. 처리 구간 계산 (워터마크 다음 ID ~ 현재 최대 ID)
+        watermark_path = watermark_path_for(output_path)
+        watermark = load_state(watermark_path)
+        if watermark is not None:
+            start_id = watermark['last_id'] + 1
+        elif start_id is None:
+            start_id = self.db.get_min_collectxy_id()
+        end_id = self.db.get_max_collectxy_id()
+        if start_id is None or end_id is None or start_id > end_id:
+            print(f"새로 추가된 데이터가 없습니다 (워터마크: {watermark['last_id'] if watermark else '-'})")
+            return self.summary(0)
+        
+        # 2. 새 구간 처리 (중단된 이전 증분 실행이 있으면 그 구간부터 이어서)
+        print(f"증분 처리: ID {start_id} ~ {end_id}")
+        stats = self.process_to_file(start_id, end_id, output_path, report=report, resume=resume, append=True)
+        
+        # 3. 워터마크 갱신 (실제로 처리한 구간 기준)
+        save_state(watermark_path, {
+            'last_id': self.last_range[1],
+            'runs': (watermark['runs'] if watermark else 0) + 1,
+            'updated_at': time.strftime('%Y-%m-%d %H:%M:%S')
+        })
+        return stats
+    
+    def summary(self, total_time: float) -> Dict[str, Any]:
+        """실행 통계를 숫자 값 딕셔너리로 정리 (워커 간 합산용)"""
+        summary = dict(self.stats)
+        summary.update(self.matcher.stats)
+        if self.deduplicator is not None:
+            summary.update(self.deduplicator.stats)
+        if self.batch_sizer is not None:
+            summary.update(self.batch_sizer.stats)
+        for name, cache in (('building_cache', self.matcher.building_cache), ('cellindex_cache', self.matcher.cellindex_cache)):
+            for key, value in cache.stats().items():
+                summary[f'{name}_{key}'] = value
+        summary['total_time'] = total_time
+        
+        # 지표 카운터는 실행 통계 기준으로 맞춤 (워커 간 합산은 'metrics' 상태로)
+        self.metrics.counters['records'] = self.stats['total_records']
+        self.metrics.duration = total_time
+        summary['metrics'] = self.metrics.state()
+        return summary
+    
+    def print_stats(self, total_time: float, paths: List[str]):
+        """실행 통계 출력 (레코드가 없거나 처리 시간이 0이어도 출력)"""
+        def share(seconds: float) -> float:
+            return seconds / total_time * 100 if total_time > 0 else 0.0
+        
+        records = self.stats['total_records']
         print("\n성능 통계:")
         print(f"총 처리 시간: {total_time:.2f}초")
-        print(f"총 레코드 수: {self.stats['total_records']}")
-        print(f"레코드당 평균 처리 시간: {(total_time/self.stats['total_records'])*1000:.2f}ms")
-        print(f"DB 읽기 시간: {self.stats['db_read_time']:.2f}초 ({(self.stats['db_read_time']/total_time)*100:.1f}%)")
+        print(f"총 레코드 수: {records}")
+        if records:
+            print(f"레코드당 평균 처리 시간: {(total_time/records)*1000:.2f}ms")
+        print(f"DB 읽기 시간: {self.stats['db_read_time']:.2f}초 ({share(self.stats['db_read_time']):.1f}%)")
+        print(f"collectxy 조회 횟수: {self.stats['db_queries']}회")
+        if self.batch_sizer is not None and self.metrics.batch_sizes.count:
+            sizes = self.metrics.batch_sizes
+            state = self.batch_sizer.describe()
+            row_time = f"{state['row_time_ms']:.3f}ms" if state['row_time_ms'] is not None else '-'
+            print(f"적응형 배치 크기: {sizes.min:.0f} ~ {sizes.max:.0f} (p50 {self._format_quantile(sizes, 0.5, 1)}, "
+                  f"마지막 {state['size']}), 조정 {self.batch_sizer.stats['batch_size_adjustments']}회, "
+                  f"지연 급증 감소 {self.batch_sizer.stats['batch_size_backoffs']}회, 행당 조회 시간 {row_time}")
+        if self.config.processor.pipeline_depth > 0:
+            process_busy = total_time - self.stats['pipeline_process_idle']
+            bottleneck = 'DB' if self.stats['pipeline_process_idle'] > self.stats['pipeline_fetch_idle'] else 'CPU'
+            print(f"파이프라인 (큐 깊이 {self.config.processor.pipeline_depth}): "
+                  f"DB 읽기 작업 {self.stats['pipeline_fetch_busy']:.2f}초 / 대기 {self.stats['pipeline_fetch_idle']:.2f}초, "
+                  f"처리 작업 {process_busy:.2f}초 / 대기 {self.stats['pipeline_process_idle']:.2f}초 (병목: {bottleneck})")
+        if self.matcher.building_index is not None:
+            index = self.matcher.building_index
+            print(f"건물 인덱스: {len(index)}건, {index.nbytes / (1024 * 1024):.1f}MB, "
+                  f"적재 {self.stats['building_index_load_time']:.2f}초")
         if self.config.processor.building_search:
-            print(f"건물 매칭 시간: {self.stats['building_match_time']:.2f}초 ({(self.stats['building_match_time']/total_time)*100:.1f}%)")
-        print(f"초당 처리 레코드: {self.stats['total_records']/total_time:.1f}개")
+            print(f"건물 매칭 시간: {self.stats['building_match_time']:.2f}초 ({share(self.stats['building_match_time']):.1f}%)")
+            print(f"건물 후보 DB 조회: {self.matcher.stats['building_queries']}회 (배치 분할 {self.matcher.stats['building_batch_splits']}회)")
+        if self.matcher.cell_index is not None:
+            index = self.matcher.cell_index
+            print(f"셀 인덱스 ({self.config.processor.cell_index_type}): {len(index)}건, {index.nbytes / (1024 * 1024):.1f}MB, "
+                  f"적재 {self.stats['cell_index_load_time']:.2f}초, "
+                  f"매칭 {self.stats['cell_match_time']:.2f}초 ({share(self.stats['cell_match_time']):.1f}%)")
+        if self.deduplicator is not None:
+            dedup_stats = self.deduplicator.stats
+            bloom = self.deduplicator.filter
+            ratio = dedup_stats['dedup_duplicates'] / dedup_stats['dedup_checked'] * 100 if dedup_stats['dedup_checked'] else 0
+            action = '제거' if self.config.processor.dedup == 'drop' else '집계만'
+            print(f"중복 지문 ({action}): {dedup_stats['dedup_duplicates']}/{dedup_stats['dedup_checked']}건 ({ratio:.1f}%), "
+                  f"최근 창 적중 {dedup_stats['dedup_window_hits']}회, 필터 적중 {dedup_stats['dedup_filter_hits']}회, "
+                  f"{self.stats['dedup_time']:.2f}초")
+            print(f"중복 판정 필터: {bloom.nbytes / (1024 * 1024):.1f}MB, 해시 {bloom.num_hashes}개, "
+                  f"예상 오탐률 {bloom.estimated_fp_rate():.2e}")
+        if self.config.processor.cache_enabled:
+            for name, cache in (('건물', self.matcher.building_cache), ('셀 인덱스', self.matcher.cellindex_cache)):
+                cache_stats = cache.stats()
+                lookups = cache_stats['hits'] + cache_stats['misses']
+                if lookups:
+                    print(f"{name} 후보 캐시: 적중 {cache_stats['hits']}회, 미스 {cache_stats['misses']}회, "
+                          f"제거 {cache_stats['evictions']}회 (적중률 {cache_stats['hits'] / lookups * 100:.1f}%)")
+        print(f"저장 시간: {self.stats['write_time']:.2f}초 ({share(self.stats['write_time']):.1f}%)")
+        if total_time > 0:
+            print(f"초당 처리 레코드: {records/total_time:.1f}개")
+        print(f"기록 바이트: {self.metrics.counters['bytes_written'] / (1024 * 1024):.1f}MB, "
+              f"조회당 행 수 p50 {self._format_quantile(self.metrics.rows_per_query, 0.5, 1)}")
+        stages = [(stage, histogram) for stage, histogram in self.metrics.stages.items() if histogram.count]
+        if stages:
+            print("배치 단계별 지연 시간 (p50 / p95 / p99, ms):")
+        for stage, histogram in stages:
+            values = ' / '.join(self._format_quantile(histogram, q, 1000) for q in (0.5, 0.95, 0.99))
+            print(f"- {stage}: {values} ({histogram.count}회)")
         print(f"처리 완료:")
-        print(f"- 원본 결과: {output_path}")
-        print(f"- 학습 데이터: {train_path}")
\ No newline at end of file
+        labels = ['원본 결과', '학습 데이터'] if len(paths) == 2 else ['출력']
+        for label, path in zip(labels, paths):
+            print(f"- {label}: {path}")
+    
+    @staticmethod
+    def _format_quantile(histogram, q: float, scale: float) -> str:
+        """분위수 표시 문자열 (관측값이 없으면 '-')"""
+        value = histogram.quantile(q)
+        return '-' if value is None else f"{value * scale:.2f}"
\ No newline at end of file
@@ -0,0 +1,83 @@
+from typing import Any, Dict, Optional
+
+class AdaptiveBatchSizer:
+    """collectxy 조회 지연 시간과 행 밀도 피드백으로 다음 배치 크기를 정하는 제어기
+
+    크기 단위는 읽기 방식의 batch_size와 같다 (keyset: 행 수, range: ID 구간 폭).
+    - 목표 행 수: target_rows가 있으면 그 값, 없으면 target_latency / 행당 조회 시간(EWMA)
+    - 다음 크기: 목표 행 수 / 크기 단위당 행 수(EWMA, range는 ID 밀도), 1회 변화는 최대 2배
+    - 지연 급증: 조회 시간이 예상의 spike_ratio배를 넘으면 backoff배로 줄이고 cooldown회 동안 늘리지 않음
+    """
+
+    def __init__(self, initial_size: int, min_size: int, max_size: int, target_latency: float,
+                 target_rows: int = 0, smoothing: float = 0.3, spike_ratio: float = 2.0,
+                 backoff: float = 0.5, cooldown: int = 3):
+        if min_size <= 0 or max_size < min_size:
+            raise ValueError(f"잘못된 배치 크기 범위: {min_size} ~ {max_size}")
+        if target_rows <= 0 and target_latency <= 0:
+            raise ValueError("적응형 배치에는 목표 조회 시간 또는 목표 행 수가 필요합니다")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_latency = target_latency
+        self.target_rows = target_rows
+        self.smoothing = smoothing
+        self.spike_ratio = spike_ratio
+        self.backoff = backoff
+        self.cooldown = cooldown
+        self.size = self._clamp(initial_size)
+        self.row_time: Optional[float] = None  # 행당 조회 시간 EWMA (초)
+        self.density: Optional[float] = None  # 크기 단위당 반환 행 수 EWMA
+        self._hold = 0  # 남은 증가 금지 횟수
+        self.stats = {
+            'batch_size_adjustments': 0,
+            'batch_size_backoffs': 0
+        }
+
+    def _clamp(self, size: float) -> int:
+        return int(min(self.max_size, max(self.min_size, size)))
+
+    def _ewma(self, current: Optional[float], value: float) -> float:
+        return value if current is None else current + self.smoothing * (value - current)
+
+    def observe(self, size: int, rows: int, seconds: float) -> int:
+        """size 크기로 조회한 결과(rows행, seconds초)를 반영하고 다음 배치 크기 반환"""
+        # 1. 지연 급증 판정 (이전 행당 시간 기준 예상 조회 시간과 비교)
+        spike = False
+        if rows:
+            expected = self.row_time * rows if self.row_time is not None else None
+            limit = self.spike_ratio * max(expected or 0.0, self.target_latency)
+            spike = expected is not None and seconds > limit
+            self.row_time = self._ewma(self.row_time, seconds / rows)
+        self.density = self._ewma(self.density, rows / size)
+
+        # 2. 다음 크기 계산
+        if spike:
+            new_size = self._clamp(self.size * self.backoff)
+            self._hold = self.cooldown
+            self.stats['batch_size_backoffs'] += 1
+        else:
+            if self.target_rows > 0:
+                goal_rows = self.target_rows
+            elif self.row_time:
+                goal_rows = self.target_latency / self.row_time
+            else:
+                goal_rows = self.size * 2  # 아직 행이 없으면 (빈 구간) 크기를 늘려 탐색
+            goal = goal_rows / self.density if self.density else self.size * 2
+            goal = min(max(goal, self.size / 2), self.size * 2)
+            if self._hold > 0:
+                self._hold -= 1
+                goal = min(goal, self.size)
+            new_size = self._clamp(goal)
+
+        if new_size != self.size:
+            self.stats['batch_size_adjustments'] += 1
+        self.size = new_size
+        return new_size
+
+    def describe(self) -> Dict[str, Any]:
+        """현재 제어 상태 (실행 통계 출력용)"""
+        return {
+            'size': self.size,
+            'row_time_ms': self.row_time * 1000 if self.row_time is not None else None,
+            'density': self.density
+        }
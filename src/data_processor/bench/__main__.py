@@ -0,0 +1,186 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+import numpy as np
+from ..config import DBConfig, ProcessorConfig
+from ..batch_processor import BatchProcessor
+from ..spatial_matcher import SpatialMatcher
+from ..writer import DualJsonlWriter
+from .synthetic import build_database
+from .sqlite_db import SQLiteConnector
+
+@dataclass
+class BenchConfig:
+    """BatchProcessor에 넘길 설정 (DB 접속 정보 없이 processor 설정만 사용)"""
+    processor: ProcessorConfig
+    db: Optional[DBConfig] = None
+
+def _result(benchmark: str, rows: int, batch_size: Optional[int], records: int, seconds: float, **extra) -> Dict[str, Any]:
+    result = {
+        'benchmark': benchmark,
+        'rows': rows,
+        'batch_size': batch_size,
+        'records': records,
+        'seconds': round(seconds, 6),
+        'records_per_sec': round(records / seconds, 1) if seconds > 0 else None
+    }
+    result.update(extra)
+    return result
+
+def bench_collectxy(db: SQLiteConnector, min_id: int, max_id: int, batch_size: int) -> Dict[str, Any]:
+    """get_collectxy_batch: range 방식 ID 구간 조회 (행 변환 + 그리드 셀 계산 포함, fast_fetch 커넥터는 _fast 항목)"""
+    records = queries = 0
+    start = time.perf_counter()
+    for batch_start in range(min_id, max_id + 1, batch_size):
+        records += len(db.get_collectxy_batch(batch_start, min(batch_start + batch_size - 1, max_id)))
+        queries += 1
+    benchmark = 'get_collectxy_batch_fast' if db.fast_fetch else 'get_collectxy_batch'
+    return _result(benchmark, 0, batch_size, records, time.perf_counter() - start, queries=queries)
+
+def bench_find_matches(db: SQLiteConnector, locations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """find_matches: 레코드별 건물 후보 조회 + 포함 검사 (query 방식, 후보 캐시 사용)"""
+    matcher = SpatialMatcher(db, ProcessorConfig(building_search=True))
+    start = time.perf_counter()
+    for location in locations:
+        matcher.find_matches(location)
+    cache = matcher.building_cache.stats()
+    return _result('find_matches', 0, None, len(locations), time.perf_counter() - start,
+                   db_queries=cache['misses'], cache_hits=cache['hits'])
+
+def bench_records(db: SQLiteConnector, min_id: int, max_id: int, batch_size: int) -> Dict[str, Any]:
+    """레코드 구성: process_range 전체 시간에서 DB 읽기 시간을 뺀 값"""
+    processor = BatchProcessor(BenchConfig(ProcessorConfig(batch_size=batch_size)), db=db)
+    start = time.perf_counter()
+    records = sum(1 for _ in processor.process_range(min_id, max_id))
+    seconds = time.perf_counter() - start - processor.stats['db_read_time']
+    return _result('record_construction', 0, batch_size, records, seconds)
+
+def bench_write(batches: List[List[Dict[str, Any]]], tmp_dir: str, batch_size: int) -> Dict[str, Any]:
+    """JSONL 쓰기: 원본 + 학습 데이터 동시 인코딩/저장"""
+    output_path = os.path.join(tmp_dir, 'bench.jsonl')
+    train_path = os.path.join(tmp_dir, 'bench_traindata.jsonl')
+    start = time.perf_counter()
+    with DualJsonlWriter(output_path, train_path) as writer:
+        for locations in batches:
+            writer.write_batch(locations)
+    seconds = time.perf_counter() - start
+    written = os.path.getsize(output_path) + os.path.getsize(train_path)
+    os.remove(output_path)
+    os.remove(train_path)
+    return _result('jsonl_write', 0, batch_size, writer.records, seconds,
+                   bytes=written, mb_per_sec=round(written / (1024 * 1024) / seconds, 1) if seconds > 0 else None)
+
+def _best(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """반복 실행 중 가장 빠른 결과"""
+    return min(runs, key=lambda result: result['seconds'])
+
+def run_benchmarks(sizes: List[int], batch_sizes: List[int], db_dir: str, seed: int = 0,
+                   repeat: int = 1, match_sample: int = 2000) -> List[Dict[str, Any]]:
+    """데이터 크기 x 배치 크기별 벤치마크 실행"""
+    results = []
+    for rows in sizes:
+        # 1. 합성 DB 준비 (같은 크기/시드는 재사용)
+        db_path = os.path.join(db_dir, f'synthetic_{rows}_{seed}.db')
+        if not os.path.exists(db_path):
+            build_start = time.perf_counter()
+            build_database(db_path, rows, max(rows // 4, 100), max(rows // 20, 100), seed)
+            print(f"합성 DB 생성: {db_path} ({time.perf_counter() - build_start:.2f}초)")
+        db = SQLiteConnector(db_path)
+        fast_db = SQLiteConnector(db_path, fast_fetch=True)
+        try:
+            min_id, max_id = db.get_min_collectxy_id(), db.get_max_collectxy_id()
+            size_results = []
+
+            # 2. 배치 크기별 조회 / 레코드 구성 / 쓰기
+            for batch_size in batch_sizes:
+                size_results.append(_best([bench_collectxy(db, min_id, max_id, batch_size) for _ in range(repeat)]))
+                size_results.append(_best([bench_collectxy(fast_db, min_id, max_id, batch_size) for _ in range(repeat)]))
+                size_results.append(_best([bench_records(db, min_id, max_id, batch_size) for _ in range(repeat)]))
+                batches = list(db.iter_collectxy_batches(min_id, max_id, batch_size))
+                size_results.append(_best([bench_write(batches, db_dir, batch_size) for _ in range(repeat)]))
+
+            # 3. 건물 매칭 (앞쪽 match_sample건)
+            sample = db.get_collectxy_after(min_id - 1, max_id, match_sample)
+            size_results.append(_best([bench_find_matches(db, sample) for _ in range(repeat)]))
+        finally:
+            fast_db.close()
+            db.close()
+
+        for result in size_results:
+            result['rows'] = rows
+            print(f"[{rows}행] {result['benchmark']} (배치 {result['batch_size'] or '-'}): "
+                  f"{result['records']}건, {result['seconds']:.3f}초, 초당 {result['records_per_sec']}건")
+        results.extend(size_results)
+    return results
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, tolerance: float) -> List[str]:
+    """기준 결과 대비 처리량이 tolerance 비율 넘게 떨어진 항목"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {(r['benchmark'], r['rows'], r['batch_size']): r for r in json.load(f)['results']}
+    regressions = []
+    print(f"\n기준 결과 비교: {baseline_path}")
+    for result in results:
+        base = baseline.get((result['benchmark'], result['rows'], result['batch_size']))
+        if base is None or not base['records_per_sec'] or not result['records_per_sec']:
+            continue
+        ratio = result['records_per_sec'] / base['records_per_sec']
+        line = (f"{result['benchmark']} ({result['rows']}행, 배치 {result['batch_size'] or '-'}): "
+                f"{base['records_per_sec']} -> {result['records_per_sec']} ({ratio:.2f}배)")
+        if ratio < 1 - tolerance:
+            regressions.append(line)
+            line += " [저하]"
+        print(f"- {line}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='합성 데이터 + SQLite 대체 DB로 처리량 벤치마크')
+    parser.add_argument('--sizes', type=str, default='10000,100000', help='collectxy 행 수 목록 (쉼표 구분)')
+    parser.add_argument('--batch-sizes', type=str, default='100,1000', help='배치 크기 목록 (쉼표 구분)')
+    parser.add_argument('--seed', type=int, default=0, help='합성 데이터 시드')
+    parser.add_argument('--repeat', type=int, default=1, help='항목별 반복 횟수 (가장 빠른 결과 사용)')
+    parser.add_argument('--match-sample', type=int, default=2000, help='find_matches 측정 레코드 수')
+    parser.add_argument('--db-dir', type=str, help='합성 DB 보관 디렉토리 (기본값: 임시 디렉토리, 실행 후 삭제)')
+    parser.add_argument('--output', type=str, default='bench_results.json', help='결과 JSON 경로')
+    parser.add_argument('--baseline', type=str, help='비교할 기준 결과 JSON (처리량 저하 시 종료 코드 1)')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='허용 처리량 저하 비율')
+    args = parser.parse_args()
+
+    db_dir = args.db_dir or tempfile.mkdtemp(prefix='bench-')
+    os.makedirs(db_dir, exist_ok=True)
+    try:
+        results = run_benchmarks([int(v) for v in args.sizes.split(',')],
+                                 [int(v) for v in args.batch_sizes.split(',')],
+                                 db_dir, args.seed, args.repeat, args.match_sample)
+    finally:
+        if not args.db_dir:
+            shutil.rmtree(db_dir, ignore_errors=True)
+
+    report = {
+        'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform()
+        },
+        'seed': args.seed,
+        'results': results
+    }
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n결과 저장: {args.output}")
+
+    if args.baseline and compare(results, args.baseline, args.tolerance):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+import sqlite3
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence
+from ..cell_matcher import GridLabeler
+from ..db_connector import DBConnector
+
+# MySQL DECIMAL 컬럼 (조회 시 Decimal로 반환)
+DECIMAL_COLUMNS = ('latitude', 'longtitude')
+
+class _Cursor:
+    """mysql.connector 커서 인터페이스 일부 (%s 파라미터, dictionary 행, DECIMAL 컬럼은 Decimal)"""
+
+    def __init__(self, con: sqlite3.Connection, dictionary: bool = False, **kwargs):
+        self._cursor = con.cursor()
+        self.dictionary = dictionary
+        self.rowcount = -1
+        self._decimal: List[int] = []
+        self._names: List[str] = []
+
+    def execute(self, query: str, params: Optional[Sequence[Any]] = None):
+        self._cursor.execute(query.replace('%s', '?'), tuple(params or ()))
+        self.rowcount = self._cursor.rowcount
+        self._names = [column[0] for column in self._cursor.description or ()]
+        self._decimal = [i for i, name in enumerate(self._names) if name in DECIMAL_COLUMNS]
+
+    def _convert(self, rows: List[tuple]) -> list:
+        if self._decimal:
+            rows = [list(row) for row in rows]
+            for row in rows:
+                for i in self._decimal:
+                    if row[i] is not None:
+                        row[i] = Decimal(row[i])
+        if self.dictionary:
+            return [dict(zip(self._names, row)) for row in rows]
+        return [tuple(row) for row in rows]
+
+    def fetchall(self) -> list:
+        return self._convert(self._cursor.fetchall())
+
+    def fetchmany(self, size: int = 1) -> list:
+        return self._convert(self._cursor.fetchmany(size))
+
+    def fetchone(self):
+        rows = self.fetchmany(1)
+        return rows[0] if rows else None
+
+    def close(self):
+        self._cursor.close()
+
+class _Connection:
+    """공유 SQLite 연결 래퍼 (close는 풀 반납과 같이 연결을 유지)"""
+
+    def __init__(self, con: sqlite3.Connection):
+        self._con = con
+
+    def cursor(self, dictionary: bool = False, **kwargs) -> _Cursor:
+        return _Cursor(self._con, dictionary)
+
+    def commit(self):
+        self._con.commit()
+
+    def close(self):
+        pass
+
+class _ConnectionPool:
+    def __init__(self, path: str):
+        # 미리 읽기(pipeline_depth) 스레드와 같은 연결을 공유
+        self._con = sqlite3.connect(path, check_same_thread=False)
+
+    def get_connection(self) -> _Connection:
+        return _Connection(self._con)
+
+    def close(self):
+        self._con.close()
+
+class SQLiteConnector(DBConnector):
+    """SQLite 파일을 읽는 DBConnector (벤치마크용 로컬 DB 대체)
+
+    연결 풀만 SQLite로 바꾸고 조회/변환 코드는 DBConnector 것을 그대로 사용하므로
+    DB 왕복 이후의 행 변환, 그리드 셀 계산 비용까지 함께 측정된다 (fast_fetch 조회 포함).
+    SPATIAL 인덱스(MBRIntersects)는 지원하지 않는다.
+    """
+
+    # SQLite의 TEXT -> REAL 변환은 올바른 반올림을 보장하지 않으므로 좌표는 Decimal로 받아 변환
+    COLLECTXY_FAST_COLUMNS = "id, latitude, longtitude, lcellid, wmac, wrssi, lpciKey"
+
+    def __init__(self, path: str, grid_levels: Sequence[int] = (GridLabeler.DEFAULT_LEVEL,),
+                 fast_fetch: bool = False):
+        self.path = path
+        super().__init__(None, grid_levels=grid_levels, fast_fetch=fast_fetch)
+
+    def _create_pool(self) -> _ConnectionPool:
+        self.pool_config: Dict[str, Any] = {'database': self.path}
+        return _ConnectionPool(self.path)
+
+    def close(self):
+        super().close()
+        self.connection_pool.close()
@@ -0,0 +1,123 @@
+import sqlite3
+from typing import Iterator, List, Tuple
+import numpy as np
+from ..cell_matcher import GridCellMatcher
+
+# 수집 밀집 지역 (경도, 위도, 가중치) - 나머지는 GridCellMatcher 범위 전체에 균등 분포
+CITY_CENTERS = [
+    (126.978, 37.566, 0.35),  # 서울
+    (129.075, 35.180, 0.12),  # 부산
+    (126.705, 37.456, 0.10),  # 인천
+    (128.601, 35.871, 0.08),  # 대구
+    (127.385, 36.351, 0.06),  # 대전
+    (126.853, 35.160, 0.06),  # 광주
+    (129.311, 35.539, 0.05),  # 울산
+    (126.531, 33.499, 0.03)   # 제주
+]
+UNIFORM_RATIO = 0.15  # 밀집 지역 밖 비율
+CITY_SPREAD = 0.05  # 밀집 지역 좌표 표준편차 (도)
+STATIONARY_RATIO = 0.2  # 직전 레코드와 같은 지문이 반복될 확률 (정지 수집)
+
+SCHEMA = [
+    """CREATE TABLE collectxy (
+        id INTEGER PRIMARY KEY, latitude TEXT, longtitude TEXT,
+        lcellid TEXT, wmac TEXT, wrssi TEXT, lpciKey TEXT)""",
+    """CREATE TABLE building (
+        uid INTEGER PRIMARY KEY, height REAL, hstare INTEGER, lstare INTEGER,
+        minX REAL, maxX REAL, minY REAL, maxY REAL)""",
+    "CREATE INDEX idx_building_bbox ON building (minX, maxX, minY, maxY)",
+    """CREATE TABLE cellidindex (
+        lcellids TEXT, minX REAL, maxX REAL, minY REAL, maxY REAL)""",
+    "CREATE INDEX idx_cell_bbox ON cellidindex (minX, maxX, minY, maxY)"
+]
+
+def _points(rng: np.random.Generator, count: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(경도, 위도, 지역 번호) 배열 (지역 번호 len(CITY_CENTERS)는 균등 분포)"""
+    weights = np.array([w for _, _, w in CITY_CENTERS] + [UNIFORM_RATIO])
+    region = rng.choice(len(weights), size=count, p=weights / weights.sum())
+    centers = np.array([(x, y) for x, y, _ in CITY_CENTERS])
+    in_city = region < len(CITY_CENTERS)
+    lons = rng.uniform(GridCellMatcher.ORG_MIN_X, GridCellMatcher.ORG_MAX_X, count)
+    lats = rng.uniform(GridCellMatcher.ORG_MIN_Y, GridCellMatcher.ORG_MAX_Y, count)
+    lons[in_city] = centers[region[in_city], 0] + rng.normal(0, CITY_SPREAD, in_city.sum())
+    lats[in_city] = centers[region[in_city], 1] + rng.normal(0, CITY_SPREAD, in_city.sum())
+    lons = np.clip(lons, GridCellMatcher.ORG_MIN_X, GridCellMatcher.ORG_MAX_X)
+    lats = np.clip(lats, GridCellMatcher.ORG_MIN_Y, GridCellMatcher.ORG_MAX_Y)
+    return lons, lats, region
+
+def _token_pools(rng: np.random.Generator, regions: int, macs: int, cells: int) -> Tuple[List[List[str]], List[List[str]]]:
+    """지역별 AP MAC / 셀 ID 목록 (같은 지역 레코드는 같은 AP를 반복해서 관측)"""
+    mac_pools, cell_pools = [], []
+    for region in range(regions):
+        octets = rng.integers(0, 256, size=(macs, 6))
+        mac_pools.append([':'.join(f'{b:02x}' for b in row) for row in octets.tolist()])
+        cell_pools.append([str(region * 1000000 + c) for c in rng.choice(1000000, size=cells, replace=False).tolist()])
+    return mac_pools, cell_pools
+
+def generate_collectxy(rng: np.random.Generator, count: int, chunk_size: int = 10000) -> Iterator[List[tuple]]:
+    """collectxy 행 (id, latitude, longtitude, lcellid, wmac, wrssi, lpciKey) 청크 생성
+
+    ID는 운영 데이터처럼 간격이 있고, 좌표는 DECIMAL(소수 6자리) 문자열이며,
+    지문은 지역별 AP/셀 목록에서 뽑아 자주 반복되고 일부는 직전 레코드를 그대로 반복한다.
+    """
+    regions = len(CITY_CENTERS) + 1
+    mac_pools, cell_pools = _token_pools(rng, regions, 2000, 300)
+    next_id = 1000
+    previous = None
+    for chunk_start in range(0, count, chunk_size):
+        size = min(chunk_size, count - chunk_start)
+        lons, lats, region = _points(rng, size)
+        gaps = rng.choice([1, 1, 1, 2, 7], size=size)
+        ap_counts = rng.integers(0, 16, size=size)
+        cell_counts = rng.integers(0, 4, size=size)
+        pci_counts = rng.integers(0, 4, size=size)
+        repeats = rng.random(size) < STATIONARY_RATIO
+        rows = []
+        for i in range(size):
+            next_id += int(gaps[i])
+            if previous is not None and repeats[i]:
+                rows.append((next_id,) + previous)
+                continue
+            macs, cells = mac_pools[region[i]], cell_pools[region[i]]
+            k = int(ap_counts[i])
+            wmac = ','.join([macs[j] for j in rng.choice(len(macs), size=k, replace=False).tolist()]) if k else ''
+            wrssi = ','.join(str(v) for v in rng.integers(-95, -35, size=k).tolist()) if k else None
+            lcellid = ','.join([cells[j] for j in rng.choice(len(cells), size=int(cell_counts[i])).tolist()]) or None
+            lpcikey = ','.join(f'{p}_{e}_{n}' for p, e, n in zip(rng.integers(1, 504, size=int(pci_counts[i])).tolist(),
+                                                                 rng.choice([1350, 2850, 3050], size=int(pci_counts[i])).tolist(),
+                                                                 rng.integers(0, 3, size=int(pci_counts[i])).tolist()))
+            previous = (f'{lats[i]:.6f}', f'{lons[i]:.6f}', lcellid, wmac, wrssi, lpcikey)
+            rows.append((next_id,) + previous)
+        yield rows
+
+def generate_buildings(rng: np.random.Generator, count: int) -> List[tuple]:
+    """building 행 (uid, height, hstare, lstare, minX, maxX, minY, maxY) - 수집 밀집 지역에 몰린 작은 bbox"""
+    lons, lats, _ = _points(rng, count)
+    widths = rng.uniform(0.0001, 0.001, count)
+    heights = rng.uniform(0.0001, 0.001, count)
+    return list(zip(range(1, count + 1), np.round(rng.uniform(3, 150, count), 1).tolist(),
+                    rng.integers(1, 60, count).tolist(), rng.integers(0, 6, count).tolist(),
+                    lons.tolist(), (lons + widths).tolist(), lats.tolist(), (lats + heights).tolist()))
+
+def generate_cellindex(rng: np.random.Generator, count: int) -> List[tuple]:
+    """cellidindex 행 (lcellids, minX, maxX, minY, maxY) - 셀 커버리지 크기의 bbox"""
+    lons, lats, _ = _points(rng, count)
+    sizes = rng.uniform(0.002, 0.02, count)
+    labels = [str(100000 + i) for i in range(count)]
+    return list(zip(labels, (lons - sizes).tolist(), (lons + sizes).tolist(),
+                    (lats - sizes).tolist(), (lats + sizes).tolist()))
+
+def build_database(path: str, collectxy_rows: int, building_rows: int, cell_rows: int, seed: int = 0):
+    """합성 데이터를 SQLite 파일로 생성 (테이블/컬럼 이름은 MySQL 스키마와 같음)"""
+    rng = np.random.default_rng(seed)
+    con = sqlite3.connect(path)
+    try:
+        for statement in SCHEMA:
+            con.execute(statement)
+        for rows in generate_collectxy(rng, collectxy_rows):
+            con.executemany('INSERT INTO collectxy VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+        con.executemany('INSERT INTO building VALUES (?, ?, ?, ?, ?, ?, ?, ?)', generate_buildings(rng, building_rows))
+        con.executemany('INSERT INTO cellidindex VALUES (?, ?, ?, ?, ?)', generate_cellindex(rng, cell_rows))
+        con.commit()
+    finally:
+        con.close()
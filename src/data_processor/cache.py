@@ -0,0 +1,59 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List
+
+class LRUCache:
+    """크기 제한 LRU 캐시 (적중/미스/제거 횟수 집계)"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._data: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """키가 있으면 캐시 값을, 없으면 loader 결과를 저장 후 반환"""
+        if key in self._data:
+            self.hits += 1
+            self._data.move_to_end(key)
+            return self._data[key]
+
+        self.misses += 1
+        value = loader()
+        if self.max_size > 0:
+            self._data[key] = value
+            if len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def touch(self, key: Hashable) -> bool:
+        """키가 있으면 최근 사용으로 갱신 후 True, 없으면 추가 후 False"""
+        if key in self._data:
+            self.hits += 1
+            self._data.move_to_end(key)
+            return True
+
+        self.misses += 1
+        if self.max_size > 0:
+            self._data[key] = None
+            if len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return False
+
+    def keys(self) -> List[Hashable]:
+        """키 목록 (오래 사용하지 않은 순)"""
+        return list(self._data.keys())
+
+    def stats(self) -> Dict[str, int]:
+        """캐시 통계"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._data)
+        }
@@ -1,35 +1,93 @@
-from typing import Dict, Any, List
+from decimal import Decimal
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 import numpy as np
 
-class GridCellMatcher:
-    """그리드 기반 셀 매칭 클래스"""
+class GridLabeler:
+    """배치 위경도 배열로 여러 레벨의 그리드 셀 ID를 한 번에 계산
+
+    기존 SQL 식 FLOOR(((longtitude - ORG_MIN_X) / (OFFSET_5M_X * level)) + 1)과
+    비트 단위로 같은 결과를 낸다.
+    - DECIMAL 좌표(decimal=True): 원점과의 차이를 정확한 십진 뺄셈 후 double로 변환
+      (소수 DECIMAL_SCALE자리 정수 단위로 빼고 한 번만 나눠 올바르게 반올림된 값을 얻음)
+    - DOUBLE 좌표(decimal=False): double 뺄셈
+    - 이후 셀 크기(double 곱) 나눗셈, + 1, floor는 DB와 같은 double 연산
+    """
     # 그리드 셀 상수
     ORG_MIN_X = 124.54117
     ORG_MIN_Y = 32.928463
-    ORG_MAX_X = 130.57113
-    ORG_MAX_Y = 42.344405
     OFFSET_5M_X = 0.0000555
     OFFSET_5M_Y = 0.0000460
     DEFAULT_LEVEL = 5  # 25m 그리드 셀
+    DECIMAL_SCALE = 9  # 정수 단위 뺄셈으로 처리하는 최대 소수 자릿수
 
-    def match(self, lat: float, lon: float) -> Dict[str, Any]:
-        """단일 위치에 대한 그리드 셀 ID 계산"""
-        x_id = int((lon - self.ORG_MIN_X) / (self.OFFSET_5M_X * self.DEFAULT_LEVEL)) + 1
-        y_id = int((lat - self.ORG_MIN_Y) / (self.OFFSET_5M_Y * self.DEFAULT_LEVEL)) + 1
+    def __init__(self, levels: Sequence[int] = (DEFAULT_LEVEL,)):
+        self.levels = tuple(int(level) for level in levels)
+        if not self.levels:
+            raise ValueError("그리드 레벨이 비어 있습니다.")
+
+    def _offsets(self, values: np.ndarray, origin: float, decimal: bool) -> np.ndarray:
+        """values - origin (DB 연산과 같은 방식)"""
+        if not decimal:
+            return values - origin
+        scale = 10.0 ** self.DECIMAL_SCALE
+        units = np.round(values * scale)
+        diff = (units - round(origin * scale)) / scale
+        # 소수 자릿수가 더 많은 값은 Decimal로 직접 계산
+        inexact = np.flatnonzero(units / scale != values)
+        if len(inexact):
+            origin_dec = Decimal(repr(origin))
+            for i in inexact.tolist():
+                diff[i] = float(Decimal(repr(float(values[i]))) - origin_dec)
+        return diff
+
+    def label(self, lats: Sequence[float], lons: Sequence[float],
+              decimal: bool = True) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+        """레벨별 (x_id 배열, y_id 배열)"""
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        dx = self._offsets(lons, self.ORG_MIN_X, decimal)
+        dy = self._offsets(lats, self.ORG_MIN_Y, decimal)
         return {
-            'x_id': x_id,
-            'y_id': y_id
+            level: (np.floor(dx / (self.OFFSET_5M_X * level) + 1).astype(np.int64),
+                    np.floor(dy / (self.OFFSET_5M_Y * level) + 1).astype(np.int64))
+            for level in self.levels
         }
 
+    def assign(self, locations: List[Dict[str, Any]], decimal: bool = True,
+               lats: Optional[np.ndarray] = None, lons: Optional[np.ndarray] = None):
+        """위치 목록에 'grid_cell'(첫 레벨)과, 레벨이 여러 개면 'grid_cells'(레벨별 목록) 추가
+        (lats/lons: 이미 만든 좌표 배열이 있으면 위치 딕셔너리에서 다시 모으지 않음)"""
+        if not locations:
+            return
+        if lats is None or lons is None:
+            lats = np.fromiter((loc['latitude'] for loc in locations), dtype=np.float64, count=len(locations))
+            lons = np.fromiter((loc['longitude'] for loc in locations), dtype=np.float64, count=len(locations))
+        labels = {level: (x.tolist(), y.tolist()) for level, (x, y) in self.label(lats, lons, decimal).items()}
+
+        x_ids, y_ids = labels[self.levels[0]]
+        for location, x_id, y_id in zip(locations, x_ids, y_ids):
+            location['grid_cell'] = {'x_id': x_id, 'y_id': y_id}
+        if len(self.levels) > 1:
+            for i, location in enumerate(locations):
+                location['grid_cells'] = [
+                    {'level': level, 'x_id': labels[level][0][i], 'y_id': labels[level][1][i]}
+                    for level in self.levels
+                ]
+
+class GridCellMatcher(GridLabeler):
+    """그리드 기반 셀 매칭 클래스 (기본 레벨 단일 위치/목록 조회)
+
+    GridLabeler와 같이 floor로 내림한다 (출력 grid_cell, 기존 SQL FLOOR 식과 같은 셀).
+    이전의 int() 절사와는 원점 서쪽/남쪽(음수 오프셋) 좌표에서만 다르며, 그 경우 ID가 1 작다.
+    """
+    ORG_MAX_X = 130.57113
+    ORG_MAX_Y = 42.344405
+
+    def match(self, lat: float, lon: float) -> Dict[str, Any]:
+        """단일 위치에 대한 그리드 셀 ID 계산"""
+        return self.match_batch([lat], [lon])[0]
+
     def match_batch(self, lats: List[float], lons: List[float]) -> List[Dict[str, Any]]:
         """여러 위치에 대한 그리드 셀 ID 일괄 계산"""
-        # NumPy 배열로 변환
-        lats_arr = np.array(lats)
-        lons_arr = np.array(lons)
-        
-        # 벡터화된 계산
-        x_ids = ((lons_arr - self.ORG_MIN_X) / (self.OFFSET_5M_X * self.DEFAULT_LEVEL)).astype(int) + 1
-        y_ids = ((lats_arr - self.ORG_MIN_Y) / (self.OFFSET_5M_Y * self.DEFAULT_LEVEL)).astype(int) + 1
-        
-        # 결과를 딕셔너리 리스트로 변환
-        return [{'x_id': x, 'y_id': y} for x, y in zip(x_ids, y_ids)] 
\ No newline at end of file
+        x_ids, y_ids = self.label(lats, lons)[self.levels[0]]
+        return [{'x_id': x, 'y_id': y} for x, y in zip(x_ids.tolist(), y_ids.tolist())]
@@ -0,0 +1,97 @@
+import os
+import sys
+import tempfile
+import time
+from data_processor.db_connector import DBConnector
+from data_processor.config import Config, ProcessorConfig
+from data_processor.spatial_matcher import SpatialMatcher
+from data_processor.bench.synthetic import CITY_CENTERS, build_database
+from data_processor.bench.sqlite_db import SQLiteConnector
+
+def check_building_index(sample_size: int = 1000):
+    """레코드별 DB 조회와 메모리 인덱스의 건물 매칭 결과/처리량 비교"""
+    config = Config('config/db_config.ini')
+    db = DBConnector(config.db)
+    matcher = SpatialMatcher(db, config.processor)
+
+    # 샘플 위치 로드
+    result = db.execute_query('SELECT MIN(id) as min_id FROM collectxy')
+    start_id = result[0]['min_id']
+    locations = db.get_collectxy_batch(start_id, start_id + sample_size - 1)
+    print(f"\n샘플 레코드 수: {len(locations)}")
+
+    # 1. 레코드별 DB 조회
+    query_start = time.time()
+    query_results = [matcher.find_matches(location)['buildings'] for location in locations]
+    query_time = time.time() - query_start
+
+    # 2. 메모리 인덱스
+    load_start = time.time()
+    index = matcher.load_building_index()
+    load_time = time.time() - load_start
+    if index is None:
+        return
+    index_start = time.time()
+    index_results = [matcher.find_matches(location)['buildings'] for location in locations]
+    index_time = time.time() - index_start
+
+    mismatches = sum(
+        1 for a, b in zip(query_results, index_results)
+        if sorted(str(x['uid']) for x in a) != sorted(str(x['uid']) for x in b)
+    )
+    print(f"\n인덱스: {len(index)}건, {index.nbytes / (1024 * 1024):.1f}MB, 적재 {load_time:.2f}초")
+    print(f"DB 조회:     {query_time:.2f}초 ({len(locations) / max(query_time, 1e-9):.1f} 레코드/초)")
+    print(f"메모리 인덱스: {index_time:.2f}초 ({len(locations) / max(index_time, 1e-9):.1f} 레코드/초)")
+    print(f"결과 불일치: {mismatches}건")
+
+def check_dense_batch(points: int = 500, seed: int = 0) -> bool:
+    """밀집 지역에 몰린 배치의 batch 모드 조회 횟수와 결과 확인 (합성 SQLite DB, MySQL 불필요)"""
+    config = ProcessorConfig(building_match_mode='batch', building_batch_max_candidates=20, cache_enabled=False)
+    ok = True
+    with tempfile.TemporaryDirectory(prefix='check-dense-') as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'synthetic.db')
+        build_database(db_path, 1000, 20000, 100, seed)
+        db = SQLiteConnector(db_path)
+        try:
+            # 1. 가장 큰 밀집 지역 중심에 가장 가까운 건물 bbox 중심 (후보가 상한을 넘는 영역)
+            center_lon, center_lat = CITY_CENTERS[0][0], CITY_CENTERS[0][1]
+            building = db.execute_query(
+                'SELECT (minX + maxX) / 2 AS x, (minY + maxY) / 2 AS y FROM building '
+                'ORDER BY ABS((minX + maxX) / 2 - ?) + ABS((minY + maxY) / 2 - ?) LIMIT 1',
+                (center_lon, center_lat))[0]
+            lon, lat = building['x'], building['y']
+            ok = _check_dense_cases(db, config, lat, lon, points)
+        finally:
+            db.close()
+    print(f"\n밀집 배치 단일 조회/결과 일치: {ok}")
+    return ok
+
+def _check_dense_cases(db: SQLiteConnector, config: ProcessorConfig, lat: float, lon: float, points: int) -> bool:
+    """같은 좌표/마진 안에 몰린 배치가 1회 조회로 레코드별 조회와 같은 결과를 내는지 확인"""
+    cases = {
+        # 같은 좌표 반복 (정지 수집): 나눠도 조회 bbox가 줄지 않음
+        'identical': [(lat, lon)] * points,
+        # spatial_margin 안에 몰린 좌표: 나눠도 조회 bbox가 거의 줄지 않음
+        'dense': [(lat + config.spatial_margin * (i % 10 - 5) / 10, lon + config.spatial_margin * (i // 10 % 10 - 5) / 10)
+                  for i in range(points)]
+    }
+    ok = True
+    for name, coordinates in cases.items():
+        locations = [{'latitude': y, 'longitude': x} for y, x in coordinates]
+        matcher = SpatialMatcher(db, config)
+        batch_results = matcher.find_buildings_batch(locations)
+        queries, splits = matcher.stats['building_queries'], matcher.stats['building_batch_splits']
+        query_results = [matcher.find_matches(location)['buildings'] for location in locations]
+        mismatches = sum(
+            1 for a, b in zip(batch_results, query_results)
+            if sorted(x['uid'] for x in a) != sorted(x['uid'] for x in b)
+        )
+        print(f"[{name}] 위치 {len(locations)}건, 건물 매칭 {sum(map(len, batch_results))}건, "
+              f"조회 {queries}회 (분할 {splits}회), 결과 불일치 {mismatches}건")
+        ok = ok and mismatches == 0 and queries == 1
+    return ok
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'dense':
+        sys.exit(0 if check_dense_batch() else 1)
+    check_building_index(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
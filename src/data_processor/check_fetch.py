@@ -0,0 +1,32 @@
+import sys
+import time
+from data_processor.db_connector import DBConnector
+from data_processor.config import Config
+
+def check_fetch(sample_size: int = 100000, batch_size: int = 1000):
+    """fast 조회(장기 연결 + prepared 커서 + 튜플 행)가 기존 dictionary 커서 조회와 같은 위치 목록을 내는지 확인하고 처리량 비교"""
+    config = Config('config/db_config.ini')
+    dict_db = DBConnector(config.db, grid_levels=config.processor.grid_levels)
+    fast_db = DBConnector(config.db, grid_levels=config.processor.grid_levels, fast_fetch=True)
+    start_id = dict_db.get_min_collectxy_id()
+    end_id = start_id + sample_size - 1
+    print(f"\n샘플 구간: {start_id} ~ {end_id}, 배치 {batch_size}건 (keyset)")
+
+    results = {}
+    for name, db in (('dictionary 커서', dict_db), ('fast', fast_db)):
+        fetch_start = time.time()
+        locations = [location for batch in db.iter_collectxy_batches(start_id, end_id, batch_size) for location in batch]
+        fetch_time = time.time() - fetch_start
+        results[name] = locations
+        print(f"{name}: {len(locations)}건, {fetch_time:.2f}초, {len(locations) / max(fetch_time, 1e-9):.1f} 레코드/초, "
+              f"좌표 타입 {db.coordinate_type}")
+
+    expected, actual = results['dictionary 커서'], results['fast']
+    mismatches = [(a['id'], a, b) for a, b in zip(expected, actual) if a != b]
+    print(f"\n위치 목록 일치: {len(expected) == len(actual) and not mismatches} (불일치 {len(mismatches)}건)")
+    for id_, a, b in mismatches[:5]:
+        print(f"  id={id_}:\n    dict={a}\n    fast={b}")
+    fast_db.close()
+
+if __name__ == '__main__':
+    check_fetch(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,85 @@
+import time
+from data_processor.db_connector import DBConnector
+from data_processor.cell_matcher import GridLabeler, GridCellMatcher
+from data_processor.config import Config
+
+# 기존 SQL 그리드 셀 계산식 (비교 기준)
+SQL_GRID_COLUMNS = """
+    id, latitude, longtitude,
+    FLOOR(((longtitude - %s) / (%s * %s)) + 1) as x_id,
+    FLOOR(((latitude - %s) / (%s * %s)) + 1) as y_id
+"""
+
+# 원점 바깥(음수 오프셋) 좌표의 셀 크기 배수 (int 절사와 floor가 달라지는 구간)
+OUTSIDE_STEPS = (0.0, -0.25, -0.5, -1.0, -1.5, -3.2, -10.0, 0.25, 1.5)
+
+def check_outside_origin(db: DBConnector):
+    """원점 서쪽/남쪽 좌표에서 GridLabeler, GridCellMatcher.match, SQL FLOOR가 같은 셀을 내는지 확인
+    (셀 ID는 모든 경로에서 floor로 내림하므로 원점 바깥은 0 이하가 됨, int 절사라면 1)"""
+    matcher = GridCellMatcher()
+    level = matcher.levels[0]
+    size_x, size_y = GridLabeler.OFFSET_5M_X * level, GridLabeler.OFFSET_5M_Y * level
+    lons = [GridLabeler.ORG_MIN_X + step * size_x for step in OUTSIDE_STEPS]
+    lats = [GridLabeler.ORG_MIN_Y + step * size_y for step in OUTSIDE_STEPS]
+    # 좌표 파라미터는 MySQL에서 정확한 십진 리터럴이므로 DECIMAL 컬럼과 같은 방식으로 계산
+    x_ids, y_ids = matcher.label(lats, lons, True)[level]
+
+    mismatches = 0
+    for lat, lon, x, y in zip(lats, lons, x_ids.tolist(), y_ids.tolist()):
+        row = db.execute_query("""
+            SELECT FLOOR(((%s - %s) / (%s * %s)) + 1) as x_id, FLOOR(((%s - %s) / (%s * %s)) + 1) as y_id
+        """, (lon, GridLabeler.ORG_MIN_X, GridLabeler.OFFSET_5M_X, level,
+              lat, GridLabeler.ORG_MIN_Y, GridLabeler.OFFSET_5M_Y, level))[0]
+        sql = (int(row['x_id']), int(row['y_id']))
+        single = matcher.match(lat, lon)
+        if not (sql == (x, y) == (single['x_id'], single['y_id'])):
+            mismatches += 1
+            print(f"  ({lat}, {lon}): SQL={sql}, labeler={(x, y)}, match={single}")
+    print(f"\n[원점 바깥 {len(lons)}건] SQL FLOOR / GridLabeler / GridCellMatcher.match 불일치 {mismatches}건")
+
+def check_grid_labeler(sample_size: int = 100000):
+    """샘플 구간에서 GridLabeler 결과가 기존 SQL FLOOR 계산과 같은지 레벨별로 확인"""
+    config = Config('config/db_config.ini')
+    db = DBConnector(config.db)
+    labeler = GridLabeler(config.processor.grid_levels)
+    start_id = db.get_min_collectxy_id()
+    end_id = start_id + sample_size - 1
+    print(f"\n샘플 구간: {start_id} ~ {end_id}, 레벨 {labeler.levels}")
+
+    # 1. 위경도 조회 및 좌표 타입 확인
+    locations = db.get_collectxy_batch(start_id, end_id)
+    print(f"좌표 타입: {db.coordinate_type}, {len(locations)}건")
+
+    for level in labeler.levels:
+        # 2. SQL 계산
+        query_start = time.time()
+        rows = db.execute_query(f"""
+            SELECT {SQL_GRID_COLUMNS}
+            FROM collectxy
+            WHERE id BETWEEN %s AND %s
+            ORDER BY id
+        """, (GridLabeler.ORG_MIN_X, GridLabeler.OFFSET_5M_X, level,
+              GridLabeler.ORG_MIN_Y, GridLabeler.OFFSET_5M_Y, level, start_id, end_id))
+        sql_time = time.time() - query_start
+
+        # 3. 배치 계산
+        label_start = time.time()
+        x_ids, y_ids = labeler.label([loc['latitude'] for loc in locations],
+                                     [loc['longitude'] for loc in locations],
+                                     db.coordinate_type == 'decimal')[level]
+        label_time = time.time() - label_start
+
+        mismatches = [
+            (row['id'], (int(row['x_id']), int(row['y_id'])), (x, y))
+            for row, x, y in zip(rows, x_ids.tolist(), y_ids.tolist())
+            if (int(row['x_id']), int(row['y_id'])) != (x, y)
+        ]
+        print(f"\n[레벨 {level}] SQL {sql_time * 1000:.1f}ms, 배치 계산 {label_time * 1000:.1f}ms, "
+              f"불일치 {len(mismatches)}건")
+        for id_, expected, actual in mismatches[:10]:
+            print(f"  id={id_}: SQL={expected}, labeler={actual}")
+
+    check_outside_origin(db)
+
+if __name__ == '__main__':
+    check_grid_labeler()
\ No newline at end of file
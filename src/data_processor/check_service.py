@@ -0,0 +1,98 @@
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+from data_processor.config import ProcessorConfig
+from data_processor.batch_processor import BatchProcessor
+from data_processor.service import LookupEngine, LookupService, create_server
+from data_processor.bench.__main__ import BenchConfig
+from data_processor.bench.synthetic import build_database
+from data_processor.bench.sqlite_db import SQLiteConnector
+
+# 응답과 비교할 결과 answer 필드
+ANSWER_KEYS = ('grid_cell', 'grid_cells', 'buildings', 'lcellids')
+
+def _post(port: int, points: List[List[float]]) -> List[Dict[str, Any]]:
+    """POST /lookup 묶음 요청"""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        conn.request('POST', '/lookup', json.dumps({'points': points}), {'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        body = json.loads(response.read())
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}: {body}")
+        return body['results']
+    finally:
+        conn.close()
+
+def check_mode(db_path: str, mode: str, min_id: int, max_id: int, tmp_dir: str,
+               request_size: int = 50, clients: int = 8) -> int:
+    """한 building_match_mode에서 오프라인 결과와 서비스 응답 비교 (불일치 건수 반환)"""
+    # keyset 조회: 결과가 ID별 1줄이 되어 위치 목록과 줄 단위로 맞춰 비교
+    config = BenchConfig(ProcessorConfig(building_search=True, cell_search=True, building_match_mode=mode,
+                                         collectxy_reader='keyset', dedup='none', checkpoint_interval=0))
+
+    # 1. 오프라인 처리 결과 (ID 순서)
+    output_path = os.path.join(tmp_dir, f'result_{mode}.jsonl')
+    db = SQLiteConnector(db_path)
+    try:
+        BatchProcessor(config, db=db).process_to_file(min_id, max_id, output_path, report=False)
+        locations = [location for batch in db.iter_collectxy_batches(min_id, max_id, 1000) for location in batch]
+    finally:
+        db.close()
+    with open(output_path, 'r', encoding='utf-8') as f:
+        expected = [json.loads(line)['answer'] for line in f]
+    points = [[location['latitude'], location['longitude']] for location in locations]
+
+    # 2. 같은 DB로 임의 포트 서비스 시작 (커넥터는 서비스 종료 시 닫힘)
+    engine = LookupEngine(config, db=SQLiteConnector(db_path))
+    service = LookupService(engine, 0.002, 256)
+    server = create_server(service, '127.0.0.1', 0)
+    port = server.server_address[1]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        # 3. 여러 클라이언트가 동시에 묶음 요청 (서비스가 요청을 다시 묶어 조회)
+        chunks = [points[i:i + request_size] for i in range(0, len(points), request_size)]
+        lookup_start = time.time()
+        with ThreadPoolExecutor(clients) as pool:
+            actual = [result for results in pool.map(lambda chunk: _post(port, chunk), chunks) for result in results]
+        lookup_time = time.time() - lookup_start
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.close()
+
+    mismatches = [(location['id'], a, b) for location, a, b in zip(locations, expected, actual)
+                  if {key: a.get(key) for key in ANSWER_KEYS} != {key: b.get(key) for key in ANSWER_KEYS}]
+    mismatches += [(None, None, None)] * abs(len(expected) - len(actual))
+    print(f"[{mode}] 좌표 타입 {'decimal' if engine.decimal else 'double'}, 위치 {len(points)}건, "
+          f"응답 {lookup_time:.2f}초, 건물 매칭 {sum(1 for a in expected if a['buildings'])}건, "
+          f"불일치 {len(mismatches)}건")
+    for id_, a, b in mismatches[:3]:
+        print(f"  id={id_}:\n    오프라인={a}\n    서비스={b}")
+    return len(mismatches)
+
+def check_service(rows: int = 5000, seed: int = 0) -> bool:
+    """합성 SQLite DB에서 조회 서비스 응답이 같은 ID의 오프라인 처리 결과와 같은지 확인 (MySQL 불필요)"""
+    with tempfile.TemporaryDirectory(prefix='check-service-') as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'synthetic.db')
+        # 건물은 collectxy의 2배 (기본 벤치마크 비율로는 매칭되는 위치가 거의 없음)
+        build_database(db_path, rows, rows * 2, max(rows // 20, 100), seed)
+        db = SQLiteConnector(db_path)
+        try:
+            min_id, max_id = db.get_min_collectxy_id(), db.get_max_collectxy_id()
+        finally:
+            db.close()
+        print(f"\n합성 DB: collectxy {rows}건 (ID {min_id} ~ {max_id})")
+        failures = sum(check_mode(db_path, mode, min_id, max_id, tmp_dir) for mode in ('query', 'batch', 'index'))
+    print(f"\n서비스 응답 일치: {failures == 0}")
+    return failures == 0
+
+if __name__ == '__main__':
+    sys.exit(0 if check_service(*(int(arg) for arg in sys.argv[1:3])) else 1)
\ No newline at end of file
@@ -0,0 +1,39 @@
+import time
+from data_processor.db_connector import DBConnector
+from data_processor.config import Config
+
+def check_spatial_index():
+    """후보 조회 쿼리별 EXPLAIN 결과로 실제 사용 인덱스와 조회 시간 확인 (B-tree 조건 vs MBRIntersects)"""
+    config = Config('config/db_config.ini')
+    margin = config.processor.spatial_margin
+
+    # 샘플 위치
+    db = DBConnector(config.db)
+    start_id = db.get_min_collectxy_id()
+    location = db.get_collectxy_batch(start_id, start_id)[0]
+    lat, lon = location['latitude'], location['longitude']
+    bbox = (lon - margin, lon + margin, lat - margin, lat + margin)
+    print(f"\n샘플 위치: ({lat}, {lon}), 마진 {margin}")
+
+    modes = [('btree', db)]
+    if db.has_spatial_columns():
+        modes.append(('spatial', DBConnector(config.db, spatial_index=True)))
+    else:
+        print("SPATIAL 인덱스 없음: python -m data_processor.migrate_spatial_index 실행 후 다시 확인하세요.")
+
+    for mode, connector in modes:
+        queries = {
+            'building': connector.building_candidates_query(*bbox),
+            'cellidindex': connector.cellindex_candidates_query(*bbox)
+        }
+        for name, (query, params) in queries.items():
+            query_start = time.time()
+            rows = connector.execute_query(query, params)
+            query_time = time.time() - query_start
+            print(f"\n[{mode}] {name}: {len(rows)}건, {query_time * 1000:.1f}ms")
+            for plan in connector.explain(query, params):
+                print(f"  type={plan.get('type')} possible_keys={plan.get('possible_keys')} "
+                      f"key={plan.get('key')} rows={plan.get('rows')} Extra={plan.get('Extra')}")
+
+if __name__ == '__main__':
+    check_spatial_index()
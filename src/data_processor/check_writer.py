@@ -0,0 +1,147 @@
+import csv
+import io
+import json
+import os
+import sys
+import time
+from decimal import Decimal
+from data_processor.db_connector import DBConnector
+from data_processor.config import Config, ProcessorConfig
+from data_processor.cell_matcher import GridLabeler
+from data_processor.spatial_index import GridIndex
+from data_processor.spatial_matcher import SpatialMatcher
+from data_processor.writer import RecordEncoder, float_repr
+
+# 오프라인 골든 파일 검사 픽스처 (collectxy/building 행과 기대 출력)
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'writer')
+
+def legacy_encode(location, buildings=None):
+    """기존 process_to_file의 json.dump 기반 인코딩 (비교 기준)"""
+    record = {
+        'input': {
+            'lcellid': location['lcellid'].split(',') if location['lcellid'] else [],
+            'wmac': location['wmac'].split(',') if location['wmac'] else [],
+            'wrssi': [float(x) for x in location['wrssi'].split(',')] if location['wrssi'] else [],
+            'ipcikey': location['ipcikey'].split(',') if location['ipcikey'] else []
+        },
+        'answer': {
+            'grid_cell': location['grid_cell']
+        }
+    }
+    if buildings is not None:
+        record['answer']['buildings'] = buildings
+
+    f_out, f_train = io.StringIO(), io.StringIO()
+    json.dump(record, f_out, ensure_ascii=False, default=float_repr)
+    f_out.write('\n')
+
+    wmac_str = ','.join(record['input']['wmac']) if record['input']['wmac'] else ""
+    wrssi_str = ','.join([str(x) for x in record['input']['wrssi']]) if record['input']['wrssi'] else ""
+    lcellid_str = ','.join(record['input']['lcellid']) if record['input']['lcellid'] else ""
+    ipcikey_str = ','.join(record['input']['ipcikey']) if record['input']['ipcikey'] else ""
+    train_record = {
+        "prompt": f"wmac={wmac_str} wrssi={wrssi_str} lcellid={lcellid_str} ipcikey={ipcikey_str}",
+        "completion": f"x_id={record['answer']['grid_cell']['x_id']},y_id={record['answer']['grid_cell']['y_id']}"
+    }
+    json.dump(train_record, f_train, ensure_ascii=False)
+    f_train.write('\n')
+    return f_out.getvalue(), f_train.getvalue()
+
+def check_writer(sample_size: int = 10000):
+    """RecordEncoder 출력이 기존 인코딩과 바이트 단위로 같은지 확인하고 처리량 비교"""
+    config = Config('config/db_config.ini')
+    db = DBConnector(config.db)
+
+    result = db.execute_query('SELECT MIN(id) as min_id FROM collectxy')
+    start_id = result[0]['min_id']
+    locations = db.get_collectxy_batch(start_id, start_id + sample_size - 1)
+    print(f"\n샘플 레코드 수: {len(locations)}")
+
+    # 1. 기존 방식
+    legacy_start = time.time()
+    legacy = [legacy_encode(location) for location in locations]
+    legacy_time = time.time() - legacy_start
+    legacy_out = ''.join(line for line, _ in legacy)
+    legacy_train = ''.join(line for _, line in legacy)
+
+    # 2. RecordEncoder (배치 인코딩)
+    encoder = RecordEncoder()
+    fast_start = time.time()
+    fast_out, fast_train = encoder.encode_batch(locations)
+    fast_time = time.time() - fast_start
+
+    print(f"원본 결과 일치: {fast_out.encode('utf-8') == legacy_out.encode('utf-8')}")
+    print(f"학습 데이터 일치: {fast_train.encode('utf-8') == legacy_train.encode('utf-8')}")
+    print(f"기존 인코딩: {len(locations) / max(legacy_time, 1e-9):.1f} 레코드/초")
+    print(f"배치 인코딩: {len(locations) / max(fast_time, 1e-9):.1f} 레코드/초")
+
+def _read_fixture(name: str):
+    """픽스처 CSV 행 목록 (\\N은 NULL)"""
+    with open(os.path.join(FIXTURE_DIR, name), encoding='utf-8', newline='') as f:
+        return [{key: None if value == '\\N' else value for key, value in row.items()}
+                for row in csv.DictReader(f)]
+
+def load_fixture():
+    """픽스처 행을 DB 조회 결과와 같은 형태로 변환해 (위치 목록, 위치별 건물 목록) 반환"""
+    # 1. collectxy: DECIMAL 좌표를 float로 바꾸고 그리드 셀은 십진 뺄셈 방식으로 계산 (_query_collectxy와 같음)
+    locations = [{
+        'id': int(row['id']),
+        'latitude': float(Decimal(row['latitude'])),
+        'longitude': float(Decimal(row['longtitude'])),
+        'lcellid': row['lcellid'],
+        'wmac': row['wmac'],
+        'wrssi': row['wrssi'],
+        'ipcikey': row['lpciKey']
+    } for row in _read_fixture('collectxy.csv')]
+    GridLabeler().assign(locations, True)
+
+    # 2. building: iter_building_bboxes 튜플 형태로 메모리 인덱스를 만들어 매칭 (uid 순)
+    def decimal_or_none(value):
+        return Decimal(value) if value is not None else None
+    buildings = [(int(row['uid']), decimal_or_none(row['height']), int(row['hstare']), int(row['lstare']),
+                  Decimal(row['minX']), Decimal(row['maxX']), Decimal(row['minY']), Decimal(row['maxY']))
+                 for row in _read_fixture('building.csv')]
+    index = GridIndex.from_chunks([buildings], SpatialMatcher.BUILDING_COLUMNS,
+                                  ProcessorConfig().building_index_cell_size, sort_by='uid')
+    matches = [[] for _ in locations]
+    lats = [location['latitude'] for location in locations]
+    lons = [location['longitude'] for location in locations]
+    point_idx, box_idx = index.contains_points(lats, lons)
+    for p, building in zip(point_idx.tolist(), index.rows(box_idx)):
+        matches[p].append(building)
+    return locations, matches
+
+def check_golden(update: bool = False) -> bool:
+    """픽스처 RecordEncoder 출력이 기대 result.jsonl/학습 데이터와 바이트 단위로 같은지 확인 (DB 불필요)
+    (update: 기준 인코딩 legacy_encode로 기대 파일을 다시 생성)"""
+    locations, matches = load_fixture()
+    expected_paths = [os.path.join(FIXTURE_DIR, 'result.jsonl'), os.path.join(FIXTURE_DIR, 'result_traindata.jsonl')]
+
+    # 1. 기대 파일 재생성은 RecordEncoder가 아닌 기준 인코딩으로만
+    if update:
+        legacy = [legacy_encode(location, buildings) for location, buildings in zip(locations, matches)]
+        for part, path in enumerate(expected_paths):
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                f.write(''.join(lines[part] for lines in legacy))
+        print(f"기대 파일 갱신: {len(locations)}건")
+
+    # 2. RecordEncoder 출력과 바이트 단위 비교
+    actual = RecordEncoder().encode_batch(locations, matches)
+    ok = True
+    for path, output in zip(expected_paths, actual):
+        with open(path, 'rb') as f:
+            expected = f.read()
+        same = output.encode('utf-8') == expected
+        ok = ok and same
+        print(f"{os.path.basename(path)} 일치: {same}")
+        if not same:
+            for line_no, (a, b) in enumerate(zip(output.encode('utf-8').splitlines(), expected.splitlines()), 1):
+                if a != b:
+                    print(f"  {line_no}행 차이\n  출력: {a.decode('utf-8')}\n  기대: {b.decode('utf-8')}")
+                    break
+    return ok
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'golden':
+        sys.exit(0 if check_golden(update='--update' in sys.argv[2:]) else 1)
+    check_writer(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
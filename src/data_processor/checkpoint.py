@@ -0,0 +1,46 @@
+import json
+import os
+from typing import Any, Dict, Optional
+
+def checkpoint_path_for(output_path: str) -> str:
+    """출력 경로에 대응하는 체크포인트 파일 경로"""
+    return f"{os.path.splitext(output_path)[0]}.checkpoint.json"
+
+def watermark_path_for(output_path: str) -> str:
+    """출력 경로에 대응하는 증분 처리 워터마크 파일 경로"""
+    return f"{os.path.splitext(output_path)[0]}.watermark.json"
+
+def load_state(path: str) -> Optional[Dict[str, Any]]:
+    """상태 파일 로드 (없으면 None)"""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_state(path: str, state: Dict[str, Any]):
+    """상태 파일을 임시 파일에 쓴 뒤 교체 (중단되어도 이전 상태 유지)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def sync_file(f):
+    """버퍼를 비우고 디스크까지 기록 (체크포인트 오프셋이 실제 기록된 크기를 넘지 않도록)"""
+    f.flush()
+    os.fsync(f.fileno())
+
+def truncate_to(path: str, offset: int, buffer_size: int = -1):
+    """파일을 offset 바이트로 잘라 이어쓰기용으로 열기
+
+    파일이 offset보다 짧으면(체크포인트 이후 데이터가 디스크에 남지 않은 경우) 늘리지 않고 오류를 낸다.
+    truncate로 늘리면 빈 구간이 NUL 바이트로 채워져 출력이 조용히 깨진다.
+    """
+    size = os.path.getsize(path)
+    if size < offset:
+        raise ValueError(f"출력 파일이 체크포인트보다 짧습니다: {path} ({size} < {offset}바이트)")
+    f = open(path, 'r+b', buffering=buffer_size)
+    f.truncate(offset)
+    f.seek(offset)
+    return f
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Dict
+from typing import Dict, Any, Optional, Tuple
 import configparser
 import os
 
@@ -10,16 +10,55 @@ class DBConfig:
     user: str
     password: str
     database: str
+    pool_size: int = 5  # 연결 풀 크기 (워커 프로세스마다 별도 풀)
 
 @dataclass
 class ProcessorConfig:
     batch_size: int = 1000
+    batch_sizing: str = 'fixed'  # 배치 크기 결정 방식 (fixed: batch_size 고정, adaptive: 조회 시간/행 밀도로 조정)
+    batch_size_min: int = 100  # 적응형 배치 최소 크기
+    batch_size_max: int = 10000  # 적응형 배치 최대 크기
+    batch_target_latency: float = 0.2  # 적응형 배치 목표 조회 시간 (초)
+    batch_target_rows: int = 0  # 적응형 배치 목표 조회 행 수 (0: 목표 조회 시간 사용)
     spatial_margin: float = 0.01  # 위도/경도 검색 마진
-    building_precise_check: bool = True  # 건물 정밀 검사 여부
-    cell_index_type: str = 'btree'  # 셀 인덱스 타입
+    building_precise_check: bool = True  # 건물 정밀 검사 여부 (building_polygon_column 폴리곤 포함 검사)
+    building_polygon_column: str = ''  # 건물 폴리곤 WKT(경도 위도 순서) 컬럼 또는 SQL 식 (예: ST_AsText(geom, 'axis-order=long-lat'), 빈 값: bbox만 사용)
+    cell_index_type: str = 'btree'  # 셀 인덱스 타입 (btree: 정렬 구간 인덱스, 그 외: 그리드 인덱스)
+    cell_search: bool = False  # 셀 인덱스(cellidindex) 매칭 여부 (answer.lcellids)
+    cell_index_cell_size: float = 0.01  # 셀 그리드 인덱스 버킷 크기 (도)
+    grid_levels: Tuple[int, ...] = (5,)  # 그리드 셀 레벨 (5m 배수, 첫 레벨이 grid_cell)
+    dedup: str = 'none'  # 중복 지문 처리 (none: 사용 안 함, drop: 제거, count: 집계만)
+    dedup_capacity: int = 10000000  # 중복 판정 Bloom 필터 예상 고유 레코드 수
+    dedup_fp_rate: float = 0.000001  # Bloom 필터 오탐률 (capacity건 기준)
+    dedup_window: int = 100000  # 정확한 키로 비교하는 최근 레코드 수 (LRU)
     cache_enabled: bool = True  # 캐시 사용 여부
     cache_size: int = 1000  # 캐시 크기
     building_search: bool = False  # 빌딩 탐색 여부
+    building_match_mode: str = 'query'  # 빌딩 매칭 방식 (query: 레코드별 DB 조회, batch: 배치별 DB 조회, index: 메모리 인덱스)
+    building_index_cell_size: float = 0.01  # 메모리 인덱스 그리드 버킷 크기 (도)
+    building_index_max_mb: int = 1024  # 메모리 인덱스 최대 크기 (MB)
+    building_batch_max_candidates: int = 5000  # 배치 조회 1회당 최대 후보 수 (초과 시 배치 분할)
+    collectxy_fetch: str = 'dict'  # collectxy 조회 방식 (dict: 조회마다 풀 연결 + dictionary 커서, fast: 장기 연결 + prepared 커서 + 튜플 행)
+    collectxy_reader: str = 'range'  # collectxy 읽기 방식 (range: ID 구간 조회, keyset: id > last_id 페이지 조회)
+    pipeline_depth: int = 0  # 미리 읽을 배치 큐 깊이 (0: 파이프라인 미사용)
+    write_buffer_size: int = 1048576  # 출력 파일 쓰기 버퍼 크기 (바이트)
+    output_tokenized: bool = False  # 학습 데이터의 wmac/lcellid/ipcikey를 어휘 사전 정수 ID로 저장
+    output_format: str = 'jsonl'  # 출력 형식 (jsonl: 원본 + 학습 데이터 JSONL, parquet: 학습 데이터 Parquet)
+    parquet_compression: str = 'zstd'  # Parquet 압축 (zstd, snappy, gzip, none)
+    parquet_row_group_size: int = 65536  # Parquet row group 행 수
+    output_compression: str = 'none'  # JSONL 샤드 압축 (none, gzip, zstd)
+    shard_max_records: int = 0  # 샤드당 최대 레코드 수 (0: 제한 없음)
+    shard_max_bytes: int = 0  # 샤드당 최대 바이트 수 (0: 제한 없음)
+    checkpoint_interval: int = 1  # 체크포인트 저장 간격 (배치 수, 0: 저장 안 함)
+    checkpoint_seconds: float = 30.0  # 체크포인트 최소 간격 (초, 체크포인트마다 출력/상태 파일 fsync, 0: 배치 간격만 사용)
+    backend: str = 'mysql'  # 데이터 소스 (mysql: DB 조회, snapshot: 로컬 스냅샷)
+    snapshot_dir: str = 'snapshot'  # 로컬 스냅샷 디렉토리
+    metrics_json: str = ''  # 실행 지표 JSON 저장 경로 (빈 값: 저장 안 함)
+    metrics_prometheus: str = ''  # 실행 지표 Prometheus textfile 저장 경로 (빈 값: 저장 안 함)
+    service_host: str = '127.0.0.1'  # 조회 서비스 수신 주소
+    service_port: int = 8080  # 조회 서비스 수신 포트 (0: 임의 포트)
+    service_batch_window: float = 0.002  # 조회 서비스가 동시 요청을 모으는 최대 대기 시간 (초)
+    service_max_batch: int = 256  # 조회 서비스 1회 조회당 최대 위치 수
 
 class Config:
     def __init__(self, config_path: str):
@@ -32,16 +71,62 @@ class Config:
             port=int(self.config['database']['port']),
             user=self.config['database']['user'],
             password=self.config['database']['password'],
-            database=self.config['database']['database']
+            database=self.config['database']['database'],
+            pool_size=int(self.config['database'].get('pool_size', '5'))
         )
         
         # 처리 설정
         self.processor = ProcessorConfig(
             batch_size=int(self.config.get('processor', 'batch_size', fallback='1000')),
+            batch_sizing=self.config.get('processor', 'batch_sizing', fallback='fixed'),
+            batch_size_min=int(self.config.get('processor', 'batch_size_min', fallback='100')),
+            batch_size_max=int(self.config.get('processor', 'batch_size_max', fallback='10000')),
+            batch_target_latency=float(self.config.get('processor', 'batch_target_latency', fallback='0.2')),
+            batch_target_rows=int(self.config.get('processor', 'batch_target_rows', fallback='0')),
             spatial_margin=float(self.config.get('processor', 'spatial_margin', fallback='0.01')),
             building_precise_check=self.config.getboolean('processor', 'building_precise_check', fallback=True),
+            building_polygon_column=self.config.get('processor', 'building_polygon_column', fallback=''),
             cell_index_type=self.config.get('processor', 'cell_index_type', fallback='btree'),
+            cell_search=self.config.getboolean('processor', 'cell_search', fallback=False),
+            cell_index_cell_size=float(self.config.get('processor', 'cell_index_cell_size', fallback='0.01')),
+            grid_levels=tuple(int(level) for level in self.config.get('processor', 'grid_levels', fallback='5').split(',')),
+            dedup=self.config.get('processor', 'dedup', fallback='none'),
+            dedup_capacity=int(self.config.get('processor', 'dedup_capacity', fallback='10000000')),
+            dedup_fp_rate=float(self.config.get('processor', 'dedup_fp_rate', fallback='0.000001')),
+            dedup_window=int(self.config.get('processor', 'dedup_window', fallback='100000')),
             cache_enabled=self.config.getboolean('processor', 'cache_enabled', fallback=True),
             cache_size=int(self.config.get('processor', 'cache_size', fallback='1000')),
-            building_search=self.config.getboolean('processor', 'building_search', fallback=False)
-        ) 
\ No newline at end of file
+            building_search=self.config.getboolean('processor', 'building_search', fallback=False),
+            building_match_mode=self.config.get('processor', 'building_match_mode', fallback='query'),
+            building_index_cell_size=float(self.config.get('processor', 'building_index_cell_size', fallback='0.01')),
+            building_index_max_mb=int(self.config.get('processor', 'building_index_max_mb', fallback='1024')),
+            building_batch_max_candidates=int(self.config.get('processor', 'building_batch_max_candidates', fallback='5000')),
+            collectxy_fetch=self.config.get('processor', 'collectxy_fetch', fallback='dict'),
+            collectxy_reader=self.config.get('processor', 'collectxy_reader', fallback='range'),
+            pipeline_depth=int(self.config.get('processor', 'pipeline_depth', fallback='0')),
+            write_buffer_size=int(self.config.get('processor', 'write_buffer_size', fallback='1048576')),
+            output_tokenized=self.config.getboolean('processor', 'output_tokenized', fallback=False),
+            output_format=self.config.get('processor', 'output_format', fallback='jsonl'),
+            parquet_compression=self.config.get('processor', 'parquet_compression', fallback='zstd'),
+            parquet_row_group_size=int(self.config.get('processor', 'parquet_row_group_size', fallback='65536')),
+            output_compression=self.config.get('processor', 'output_compression', fallback='none'),
+            shard_max_records=int(self.config.get('processor', 'shard_max_records', fallback='0')),
+            shard_max_bytes=int(self.config.get('processor', 'shard_max_bytes', fallback='0')),
+            checkpoint_interval=int(self.config.get('processor', 'checkpoint_interval', fallback='1')),
+            checkpoint_seconds=float(self.config.get('processor', 'checkpoint_seconds', fallback='30')),
+            backend=self.config.get('processor', 'backend', fallback='mysql'),
+            snapshot_dir=self.config.get('processor', 'snapshot_dir', fallback='snapshot'),
+            metrics_json=self.config.get('processor', 'metrics_json', fallback=''),
+            metrics_prometheus=self.config.get('processor', 'metrics_prometheus', fallback=''),
+            service_host=self.config.get('processor', 'service_host', fallback='127.0.0.1'),
+            service_port=int(self.config.get('processor', 'service_port', fallback='8080')),
+            service_batch_window=float(self.config.get('processor', 'service_batch_window', fallback='0.002')),
+            service_max_batch=int(self.config.get('processor', 'service_max_batch', fallback='256'))
+        )
+
+def load_config(config_path: str, overrides: Optional[Dict[str, Any]] = None) -> Config:
+    """설정 파일을 읽고 명령줄 옵션으로 [processor] 값을 덮어씀"""
+    config = Config(config_path)
+    for key, value in (overrides or {}).items():
+        setattr(config.processor, key, value)
+    return config
\ No newline at end of file
@@ -1,43 +1,55 @@
-import mysql.connector
-from mysql.connector import pooling
-from typing import List, Dict, Any, Optional
+import threading
+from typing import List, Dict, Any, Optional, Iterator, Sequence, Tuple
 from decimal import Decimal
+import numpy as np
 from .config import Config, DBConfig
-import psycopg2
+from .cell_matcher import GridLabeler
+
+try:
+    import mysql.connector
+    from mysql.connector import pooling
+    # fast 조회 장기 연결이 끊겼을 때 재연결할 오류
+    RECONNECT_ERRORS = (mysql.connector.errors.OperationalError, mysql.connector.errors.InterfaceError)
+except ImportError:
+    mysql = None
+    RECONNECT_ERRORS = ()
 
 class DBConnector:
-    # 그리드 셀 상수
-    ORG_MIN_X = 124.54117
-    ORG_MIN_Y = 32.928463
-    OFFSET_5M_X = 0.0000555
-    OFFSET_5M_Y = 0.0000460
-    DEFAULT_LEVEL = 5
+    # cell_index_type=spatial: 테이블별 bbox geometry 컬럼의 SPATIAL(R-tree) 인덱스 이름
+    BBOX_GEOM_COLUMN = 'bbox_geom'
+    SPATIAL_INDEXES = {'building': 'sidx_building_bbox', 'cellidindex': 'sidx_cell_bbox'}
 
-    def __init__(self, config: DBConfig):
+    def __init__(self, config: DBConfig, spatial_index: bool = False,
+                 grid_levels: Sequence[int] = (GridLabeler.DEFAULT_LEVEL,), fast_fetch: bool = False):
         self.config = config
+        self.spatial_index = spatial_index
+        self.labeler = GridLabeler(grid_levels)
+        self.coordinate_type: Optional[str] = None  # 조회된 좌표 컬럼 타입 (decimal, double)
+        # fast 조회: collectxy는 풀에서 꺼낸 장기 연결 1개 + 쿼리별 prepared 커서로 조회
+        self.fast_fetch = fast_fetch
+        self._fetch_conn = None
+        self._fetch_cursors: Dict[str, Any] = {}
+        self._fetch_lock = threading.Lock()  # 미리 읽기 스레드와 다른 호출자가 커서를 공유하지 않도록
+        self._coordinate_decimal: Optional[bool] = None
+        self.connection_pool = self._create_pool()
+    
+    def _create_pool(self):
+        """MySQL 연결 풀 생성 (C 확장이 있으면 C 확장 사용)"""
+        if mysql is None:
+            raise ImportError("MySQL 연결에는 mysql-connector-python이 필요합니다: pip install mysql-connector-python")
+        if self.fast_fetch and self.config.pool_size < 2:
+            raise ValueError("fast 조회는 장기 연결 1개를 점유하므로 pool_size가 2 이상이어야 합니다")
         self.pool_config = {
             'pool_name': 'mypool',
-            'pool_size': 5,
-            'host': config.host,
-            'port': config.port,
-            'user': config.user,
-            'password': config.password,
-            'database': config.database
+            'pool_size': self.config.pool_size,
+            'host': self.config.host,
+            'port': self.config.port,
+            'user': self.config.user,
+            'password': self.config.password,
+            'database': self.config.database,
+            'use_pure': not mysql.connector.HAVE_CEXT
         }
-        self.connection_pool = mysql.connector.pooling.MySQLConnectionPool(**self.pool_config)
-        self.conn = None
-        self.connect()
-    
-    def connect(self):
-        """데이터베이스 연결"""
-        if not self.conn or self.conn.closed:
-            self.conn = mysql.connector.connect(
-                host=self.pool_config['host'],
-                port=self.pool_config['port'],
-                database=self.pool_config['database'],
-                user=self.pool_config['user'],
-                password=self.pool_config['password']
-            )
+        return mysql.connector.pooling.MySQLConnectionPool(**self.pool_config)
 
     def execute_query(self, query: str, params: Optional[tuple] = None) -> List[Dict[str, Any]]:
         """쿼리 실행 및 결과 반환"""
@@ -59,34 +71,40 @@ class DBConnector:
             cursor.close()
             connection.close()
     
-    def get_collectxy_batch(self, start_id: int, end_id: int) -> List[Dict[str, Any]]:
-        """Collectxy 테이블에서 배치 데이터 조회 및 그리드 셀 계산"""
-        connection = self.connection_pool.get_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        try:
-            cursor.execute("""
-                SELECT 
+    # collectxy 조회 컬럼 (그리드 셀은 조회 후 GridLabeler로 배치 단위 계산)
+    COLLECTXY_COLUMNS = """
                     id,
                     latitude, 
                     longtitude,
                     lcellid,
                     wmac,
                     wrssi,
-                    lpciKey,
-                    FLOOR(((longtitude - %s) / (%s * %s)) + 1) as x_id,
-                    FLOOR(((latitude - %s) / (%s * %s)) + 1) as y_id
+                    lpciKey
+    """
+    
+    # fast 조회 컬럼: 좌표는 DB에서 DOUBLE로 변환 (DECIMAL -> double 변환은 float(Decimal)과 같은 올바른 반올림)
+    COLLECTXY_FAST_COLUMNS = "id, CAST(latitude AS DOUBLE), CAST(longtitude AS DOUBLE), lcellid, wmac, wrssi, lpciKey"
+    # fast 조회 튜플 행의 위치 딕셔너리 키 (컬럼 순서와 같음)
+    LOCATION_KEYS = ('id', 'latitude', 'longitude', 'lcellid', 'wmac', 'wrssi', 'ipcikey')
+    
+    def _query_collectxy(self, where: str, params: tuple) -> List[Dict[str, Any]]:
+        """Collectxy 조회 후 위치 딕셔너리 목록으로 변환 (그리드 셀 포함)"""
+        if self.fast_fetch:
+            return self._query_collectxy_fast(where, params)
+        connection = self.connection_pool.get_connection()
+        cursor = connection.cursor(dictionary=True)
+        
+        try:
+            cursor.execute(f"""
+                SELECT {self.COLLECTXY_COLUMNS}
                 FROM collectxy 
-                WHERE id BETWEEN %s AND %s
-                ORDER BY id
-            """, (
-                self.ORG_MIN_X, self.OFFSET_5M_X, self.DEFAULT_LEVEL,
-                self.ORG_MIN_Y, self.OFFSET_5M_Y, self.DEFAULT_LEVEL,
-                start_id, end_id
-            ))
+                {where}
+            """, params)
             
             results = []
+            decimal = False
             for row in cursor.fetchall():
+                decimal = decimal or isinstance(row['longtitude'], Decimal)
                 # Decimal 타입을 float로 변환
                 lat = float(row['latitude']) if isinstance(row['latitude'], Decimal) else row['latitude']
                 lon = float(row['longtitude']) if isinstance(row['longtitude'], Decimal) else row['longtitude']
@@ -98,35 +116,183 @@ class DBConnector:
                     'lcellid': row['lcellid'],
                     'wmac': row['wmac'],
                     'wrssi': row['wrssi'],
-                    'ipcikey': row['lpciKey'],  # DB는 lpciKey, API는 ipcikey로 통일
-                    'grid_cell': {
-                        'x_id': int(row['x_id']),
-                        'y_id': int(row['y_id'])
-                    }
+                    'ipcikey': row['lpciKey']  # DB는 lpciKey, API는 ipcikey로 통일
                 })
+            
+            # 그리드 셀: DECIMAL 좌표는 SQL과 같은 십진 뺄셈 방식으로 계산
+            if results:
+                self.coordinate_type = 'decimal' if decimal else 'double'
+            self.labeler.assign(results, decimal)
             return results
             
         finally:
             cursor.close()
             connection.close()
+    
+    def _query_collectxy_fast(self, where: str, params: tuple) -> List[Dict[str, Any]]:
+        """fast 조회: prepared 커서의 튜플 행을 컬럼으로 나눠 좌표는 float 배열로 한 번에 변환 (행별 Decimal 검사 없음)"""
+        rows = self._fetch_rows(f"SELECT {self.COLLECTXY_FAST_COLUMNS} FROM collectxy {where}", params)
+        if not rows:
+            return []
+        
+        # 그리드 셀: 좌표 컬럼 타입은 연결당 1회 확인 (DECIMAL이면 SQL과 같은 십진 뺄셈 방식)
+        decimal = self._coordinates_are_decimal()
+        self.coordinate_type = 'decimal' if decimal else 'double'
+        ids, lats, lons, lcellids, wmacs, wrssis, ipcikeys = zip(*rows)
+        lats = np.array(lats, dtype=np.float64)
+        lons = np.array(lons, dtype=np.float64)
+        results = [dict(zip(self.LOCATION_KEYS, values))
+                   for values in zip(ids, lats.tolist(), lons.tolist(), lcellids, wmacs, wrssis, ipcikeys)]
+        self.labeler.assign(results, decimal, lats, lons)
+        return results
+    
+    def _fetch_connection(self):
+        """fast 조회용 장기 연결 (처음 호출 시 풀에서 꺼내 close할 때까지 유지)"""
+        if self._fetch_conn is None:
+            self._fetch_conn = self.connection_pool.get_connection()
+        return self._fetch_conn
+    
+    def _release_fetch_connection(self):
+        """장기 연결과 prepared 커서 정리 (끊긴 연결이면 오류 무시)"""
+        cursors, self._fetch_cursors = self._fetch_cursors, {}
+        connection, self._fetch_conn = self._fetch_conn, None
+        try:
+            for cursor in cursors.values():
+                cursor.close()
+            if connection is not None:
+                connection.close()
+        except RECONNECT_ERRORS:
+            pass
+    
+    def _fetch_rows(self, query: str, params: tuple) -> List[tuple]:
+        """장기 연결의 prepared 커서로 조회해 튜플 행 목록 반환 (연결이 끊겼으면 1회 재연결 후 재시도)"""
+        with self._fetch_lock:
+            for attempt in range(2):
+                try:
+                    cursor = self._fetch_cursors.get(query)
+                    if cursor is None:
+                        # 같은 SQL은 같은 커서로 실행해 서버의 prepared statement를 재사용
+                        cursor = self._fetch_connection().cursor(prepared=True)
+                        self._fetch_cursors[query] = cursor
+                    cursor.execute(query, params)
+                    return cursor.fetchall()
+                except RECONNECT_ERRORS:
+                    self._release_fetch_connection()
+                    if attempt:
+                        raise
+    
+    @staticmethod
+    def _probe_coordinates(connection) -> Optional[bool]:
+        """collectxy 좌표 1건으로 DECIMAL 컬럼인지 확인 (빈 테이블이면 None)"""
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SELECT longtitude FROM collectxy LIMIT 1")
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+        return None if row is None else isinstance(row[0], Decimal)
+    
+    def _coordinates_are_decimal(self) -> bool:
+        """collectxy 좌표 컬럼이 DECIMAL인지 (fast 조회는 DOUBLE로 변환해 받으므로 원래 타입을 1회 확인)"""
+        if self._coordinate_decimal is None:
+            decimal = self._probe_coordinates(self._fetch_connection())
+            if decimal is None:
+                return True
+            self._coordinate_decimal = decimal
+        return self._coordinate_decimal
+    
+    def detect_coordinate_type(self) -> str:
+        """collectxy를 조회하기 전에 좌표 컬럼 타입 확인 (decimal, double / 빈 테이블은 decimal)"""
+        if self.coordinate_type is None:
+            if self._coordinate_decimal is None:
+                connection = self.connection_pool.get_connection()
+                try:
+                    self._coordinate_decimal = self._probe_coordinates(connection)
+                finally:
+                    connection.close()
+            if self._coordinate_decimal is None:
+                return 'decimal'
+            self.coordinate_type = 'decimal' if self._coordinate_decimal else 'double'
+        return self.coordinate_type
+    
+    def get_collectxy_batch(self, start_id: int, end_id: int) -> List[Dict[str, Any]]:
+        """Collectxy 테이블에서 배치 데이터 조회 및 그리드 셀 계산"""
+        return self._query_collectxy("""
+                WHERE id BETWEEN %s AND %s
+                ORDER BY id
+        """, (start_id, end_id))
+    
+    def get_min_collectxy_id(self) -> Optional[int]:
+        """Collectxy 최소 ID"""
+        return self.execute_query('SELECT MIN(id) as min_id FROM collectxy')[0]['min_id']
+    
+    def get_max_collectxy_id(self) -> Optional[int]:
+        """Collectxy 최대 ID (증분 처리 범위 계산용)"""
+        return self.execute_query('SELECT MAX(id) as max_id FROM collectxy')[0]['max_id']
+    
+    def get_collectxy_after(self, last_id: int, end_id: int, limit: int) -> List[Dict[str, Any]]:
+        """Keyset 페이지 조회: last_id 다음부터 end_id까지 최대 limit건"""
+        return self._query_collectxy("""
+                WHERE id > %s AND id <= %s
+                ORDER BY id
+                LIMIT %s
+        """, (last_id, end_id, limit))
+    
+    def iter_collectxy_batches(self, start_id: int, end_id: int, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+        """[start_id, end_id] 범위를 ID 분포와 무관하게 batch_size건씩 keyset 페이지로 스트리밍"""
+        last_id = start_id - 1
+        while True:
+            locations = self.get_collectxy_after(last_id, end_id, batch_size)
+            if not locations:
+                return
+            yield locations
+            if len(locations) < batch_size:
+                return
+            last_id = locations[-1]['id']
 
-    def get_building_candidates(self, lat: float, lon: float, margin: float) -> List[Dict[str, Any]]:
+    def get_building_candidates(self, lat: float, lon: float, margin: float,
+                                polygon_column: Optional[str] = None) -> List[Dict[str, Any]]:
         """Building 후보군 조회"""
+        return self.get_building_candidates_bbox(
+            lon - margin, lon + margin, lat - margin, lat + margin, polygon_column=polygon_column
+        )
+    
+    def _bbox_filter(self, min_lon: float, max_lon: float, min_lat: float, max_lat: float) -> Tuple[str, tuple]:
+        """bbox 겹침 WHERE 조건 (spatial: R-tree MBRIntersects, 그 외: minX/maxX/minY/maxY 비교)"""
+        if self.spatial_index:
+            return (f"MBRIntersects({self.BBOX_GEOM_COLUMN}, ST_MakeEnvelope(Point(%s, %s), Point(%s, %s)))",
+                    (min_lon, min_lat, max_lon, max_lat))
+        return ("minX <= %s AND maxX >= %s AND minY <= %s AND maxY >= %s",
+                (max_lon, min_lon, max_lat, min_lat))
+    
+    def building_candidates_query(self, min_lon: float, max_lon: float, min_lat: float, max_lat: float,
+                                  limit: Optional[int] = None,
+                                  polygon_column: Optional[str] = None) -> Tuple[str, tuple]:
+        """Building 후보 조회 SQL과 파라미터"""
+        where, params = self._bbox_filter(min_lon, max_lon, min_lat, max_lat)
+        polygon = f", {polygon_column} as polygon" if polygon_column else ""
+        query = f"""
+            SELECT 
+                uid, height, hstare, lstare,
+                minX as min_x, maxX as max_x, minY as min_y, maxY as max_y{polygon}
+            FROM building
+            WHERE {where}
+            ORDER BY uid
+            """
+        if limit is not None:
+            query += " LIMIT %s"
+            params += (limit,)
+        return query, params
+    
+    def get_building_candidates_bbox(self, min_lon: float, max_lon: float, min_lat: float, max_lat: float,
+                                     limit: Optional[int] = None,
+                                     polygon_column: Optional[str] = None) -> List[Dict[str, Any]]:
+        """영역과 겹치는 Building 후보군 조회 (limit 지정 시 최대 limit건, polygon_column 지정 시 'polygon' WKT 포함)"""
         connection = self.connection_pool.get_connection()
         cursor = connection.cursor(dictionary=True)
         
         try:
-            cursor.execute("""
-            SELECT 
-                uid, height, hstare, lstare,
-                minX, maxX, minY, maxY
-            FROM building
-            WHERE minX <= %s AND maxX >= %s
-              AND minY <= %s AND maxY >= %s
-            """, (
-                lon + margin, lon - margin,
-                lat + margin, lat - margin
-            ))
+            cursor.execute(*self.building_candidates_query(min_lon, max_lon, min_lat, max_lat, limit, polygon_column))
             
             results = cursor.fetchall()
             # Decimal 타입을 float로 변환
@@ -139,21 +305,164 @@ class DBConnector:
             cursor.close()
             connection.close()
     
+    def iter_building_bboxes(self, chunk_size: int = 50000,
+                             polygon_column: Optional[str] = None) -> Iterator[List[tuple]]:
+        """Building 전체 bbox를 (uid, height, hstare, lstare, minX, maxX, minY, maxY[, polygon]) 튜플 청크로 스트리밍"""
+        connection = self.connection_pool.get_connection()
+        cursor = connection.cursor()
+        
+        try:
+            polygon = f", {polygon_column}" if polygon_column else ""
+            cursor.execute(f"""
+            SELECT uid, height, hstare, lstare, minX, maxX, minY, maxY{polygon}
+            FROM building
+            ORDER BY uid
+            """)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+            connection.close()
+    
+    def get_building_count(self) -> int:
+        """Building 전체 건수"""
+        return self.execute_query('SELECT COUNT(*) as count FROM building')[0]['count']
+    
     def get_cellindex_candidates(self, lat: float, lon: float, margin: float) -> List[Dict[str, Any]]:
         """Cellindex 후보군 조회 - 단순 인덱스 활용"""
-        query = """
+        return self.get_cellindex_candidates_bbox(
+            lon - margin, lon + margin, lat - margin, lat + margin
+        )
+    
+    def cellindex_candidates_query(self, min_lon: float, max_lon: float,
+                                   min_lat: float, max_lat: float) -> Tuple[str, tuple]:
+        """Cellindex 후보 조회 SQL과 파라미터"""
+        where, params = self._bbox_filter(min_lon, max_lon, min_lat, max_lat)
+        query = f"""
         SELECT lcellids, minX as min_x, maxX as max_x, minY as min_y, maxY as max_y
         FROM cellidindex
-        WHERE minX <= %s AND maxX >= %s
-          AND minY <= %s AND maxY >= %s
+        WHERE {where}
+        """
+        return query, params
+    
+    def get_cellindex_candidates_bbox(self, min_lon: float, max_lon: float,
+                                      min_lat: float, max_lat: float) -> List[Dict[str, Any]]:
+        """영역과 겹치는 Cellindex 후보군 조회"""
+        return self.execute_query(*self.cellindex_candidates_query(min_lon, max_lon, min_lat, max_lat))
+    
+    def iter_cellindex_bboxes(self, chunk_size: int = 50000) -> Iterator[List[tuple]]:
+        """Cellindex 전체를 (lcellids, minX, maxX, minY, maxY) 튜플 청크로 스트리밍"""
+        connection = self.connection_pool.get_connection()
+        cursor = connection.cursor()
+        
+        try:
+            cursor.execute("""
+            SELECT lcellids, minX, maxX, minY, maxY
+            FROM cellidindex
+            """)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+            connection.close()
+    
+    def explain(self, query: str, params: tuple) -> List[Dict[str, Any]]:
+        """쿼리 실행 계획 (EXPLAIN) 조회"""
+        return self.execute_query(f"EXPLAIN {query}", params)
+    
+    def has_spatial_columns(self) -> bool:
+        """bbox geometry 컬럼과 SPATIAL 인덱스가 모두 있는지 확인"""
+        for table, index_name in self.SPATIAL_INDEXES.items():
+            if not self._schema_exists('COLUMNS', 'COLUMN_NAME', table, self.BBOX_GEOM_COLUMN):
+                return False
+            if not self._schema_exists('STATISTICS', 'INDEX_NAME', table, index_name):
+                return False
+        return True
+    
+    def _schema_exists(self, schema_table: str, name_column: str, table: str, name: str) -> bool:
+        result = self.execute_query(f"""
+        SELECT COUNT(*) as count FROM information_schema.{schema_table}
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND {name_column} = %s
+        """, (table, name))
+        return result[0]['count'] > 0
+    
+    def _geometry_column_ready(self, table: str, column: str) -> bool:
+        """geometry 컬럼이 이미 SPATIAL 인덱스 조건(NOT NULL, SRID 0)을 갖췄는지"""
+        result = self.execute_query("""
+        SELECT IS_NULLABLE, SRS_ID FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+        """, (table, column))
+        return bool(result) and result[0]['IS_NULLABLE'] == 'NO' and result[0]['SRS_ID'] == 0
+    
+    def _trigger_exists(self, table: str, trigger: str) -> bool:
+        result = self.execute_query("""
+        SELECT COUNT(*) as count FROM information_schema.TRIGGERS
+        WHERE TRIGGER_SCHEMA = DATABASE() AND EVENT_OBJECT_TABLE = %s AND TRIGGER_NAME = %s
+        """, (table, trigger))
+        return result[0]['count'] > 0
+    
+    def ensure_bbox_geometry_indexes(self):
+        """bbox geometry 컬럼 + SPATIAL(R-tree) 인덱스 생성 (이미 있으면 건너뜀)
+        
+        1. bbox_geom GEOMETRY 컬럼 추가 후 minX/maxX/minY/maxY로 채움
+        2. SPATIAL 인덱스 조건(NOT NULL, SRID 0) 적용
+        3. INSERT/UPDATE 시 bbox_geom을 갱신하는 트리거 생성
+        4. SPATIAL INDEX 생성
+        각 단계는 information_schema로 현재 상태를 확인해 필요할 때만 실행하므로
+        준비가 끝난 테이블에서는 ALTER/UPDATE 없이 조회만 한다.
         """
-        return self.execute_query(query, (
-            lon + margin, lon - margin,
-            lat + margin, lat - margin
-        ))
+        geom = self.BBOX_GEOM_COLUMN
+        connection = self.connection_pool.get_connection()
+        cursor = connection.cursor()
+        
+        try:
+            for table, index_name in self.SPATIAL_INDEXES.items():
+                # 1. 컬럼 추가 및 채우기 (NOT NULL로 바뀐 컬럼은 빈 값이 없으므로 건너뜀)
+                if not self._schema_exists('COLUMNS', 'COLUMN_NAME', table, geom):
+                    print(f"{table}: {geom} 컬럼 추가")
+                    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {geom} GEOMETRY NULL")
+                if not self._geometry_column_ready(table, geom):
+                    cursor.execute(f"""
+                    UPDATE {table} SET {geom} = ST_MakeEnvelope(Point(minX, minY), Point(maxX, maxY))
+                    WHERE {geom} IS NULL
+                    """)
+                    print(f"{table}: {cursor.rowcount}건 geometry 갱신")
+                    connection.commit()
+                    
+                    # 2. SPATIAL 인덱스는 NOT NULL + SRID 지정 컬럼에서만 옵티마이저가 사용
+                    print(f"{table}: {geom} 컬럼 NOT NULL SRID 0 적용")
+                    cursor.execute(f"ALTER TABLE {table} MODIFY {geom} GEOMETRY NOT NULL SRID 0")
+                
+                # 3. 이후 입력/수정되는 행도 geometry 유지
+                for timing, suffix in (('INSERT', 'bi'), ('UPDATE', 'bu')):
+                    trigger = f"{table}_{geom}_{suffix}"
+                    if self._trigger_exists(table, trigger):
+                        continue
+                    cursor.execute(f"""
+                    CREATE TRIGGER {trigger} BEFORE {timing} ON {table} FOR EACH ROW
+                    SET NEW.{geom} = ST_MakeEnvelope(Point(NEW.minX, NEW.minY), Point(NEW.maxX, NEW.maxY))
+                    """)
+                
+                # 4. R-tree 인덱스
+                if not self._schema_exists('STATISTICS', 'INDEX_NAME', table, index_name):
+                    print(f"{table}: SPATIAL INDEX {index_name} 생성")
+                    cursor.execute(f"CREATE SPATIAL INDEX {index_name} ON {table} ({geom})")
+            connection.commit()
+        finally:
+            cursor.close()
+            connection.close()
     
     def ensure_spatial_indexes(self):
-        """공간 인덱스 존재 확인 및 생성"""
+        """공간 인덱스 존재 확인 및 생성 (spatial_index=True이면 geometry 컬럼 + SPATIAL INDEX)"""
+        if self.spatial_index:
+            self.ensure_bbox_geometry_indexes()
+            return
         connection = self.connection_pool.get_connection()
         cursor = connection.cursor()
         
@@ -176,6 +485,15 @@ class DBConnector:
             connection.close()
 
     def close(self):
-        """데이터베이스 연결 종료"""
-        if self.conn:
-            self.conn.close() 
\ No newline at end of file
+        """fast 조회용 장기 연결 반납"""
+        if self._fetch_conn is not None:
+            self._release_fetch_connection()
+
+def create_connector(config: Config):
+    """processor.backend 설정에 따라 MySQL 또는 로컬 스냅샷 커넥터 생성"""
+    if config.processor.backend == 'snapshot':
+        from .snapshot import SnapshotConnector
+        return SnapshotConnector(config.processor.snapshot_dir, grid_levels=config.processor.grid_levels)
+    return DBConnector(config.db, spatial_index=config.processor.cell_index_type == 'spatial',
+                       grid_levels=config.processor.grid_levels,
+                       fast_fetch=config.processor.collectxy_fetch == 'fast')
\ No newline at end of file
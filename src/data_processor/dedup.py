@@ -0,0 +1,223 @@
+import hashlib
+import math
+import os
+from typing import Any, Dict, List, Optional
+import numpy as np
+from .cache import LRUCache
+
+KEY_SIZE = 16  # dedup_key 바이트 수
+JOURNAL_RECORD = KEY_SIZE + 1  # journal 레코드: 키 + 필터 등록 여부 1바이트
+JOURNAL_HEADER = 8  # journal 첫 레코드의 순번 (uint64)
+
+def dedup_state_path_for(output_path: str) -> str:
+    """출력 경로에 대응하는 중복 판정 상태(필터 비트 + 최근 창) 파일 경로"""
+    return f"{os.path.splitext(output_path)[0]}.dedup.npz"
+
+def dedup_journal_path_for(state_path: str) -> str:
+    """상태 파일 이후 판정한 키를 덧붙이는 journal 경로"""
+    return f"{os.path.splitext(os.path.splitext(state_path)[0])[0]}.dedup.log"
+
+def dedup_key(location: Dict[str, Any]) -> bytes:
+    """학습 데이터 prompt/completion 쌍의 128비트 해시
+
+    RecordEncoder와 같은 정규화를 쓴다 (빈 컬럼은 빈 문자열, wrssi는 float repr).
+    """
+    wrssi = ','.join([repr(float(x)) for x in location['wrssi'].split(',')]) if location['wrssi'] else ''
+    grid_cell = location['grid_cell']
+    text = (f"wmac={location['wmac'] or ''} wrssi={wrssi} lcellid={location['lcellid'] or ''} "
+            f"ipcikey={location['ipcikey'] or ''}\nx_id={grid_cell['x_id']},y_id={grid_cell['y_id']}")
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+class BloomFilter:
+    """numpy 비트 배열 Bloom 필터
+
+    capacity건을 넣었을 때 오탐률이 fp_rate가 되도록 비트 수와 해시 수를 정하고,
+    128비트 키의 두 64비트 절반으로 k개 위치를 만든다 (double hashing).
+    """
+
+    def __init__(self, capacity: int, fp_rate: float):
+        if not 0 < fp_rate < 1:
+            raise ValueError(f"오탐률은 0과 1 사이여야 합니다: {fp_rate}")
+        capacity = max(capacity, 1)
+        self.num_bits = max(64, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+        self.count = 0
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.bits.nbytes)
+
+    def _positions(self, keys: List[bytes]) -> np.ndarray:
+        """키별 비트 위치 (n, num_hashes)"""
+        halves = np.frombuffer(b''.join(keys), dtype=np.uint64).reshape(-1, 2)
+        steps = np.arange(self.num_hashes, dtype=np.uint64)
+        return (halves[:, :1] + steps * (halves[:, 1:] | np.uint64(1))) % np.uint64(self.num_bits)
+
+    def contains(self, keys: List[bytes]) -> np.ndarray:
+        """키별 포함 여부 (False는 확실히 없음, True는 fp_rate 확률로 오탐)"""
+        if not keys:
+            return np.zeros(0, dtype=bool)
+        positions = self._positions(keys)
+        return np.all((self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7))) & 1, axis=1)
+
+    def add(self, keys: List[bytes]):
+        if not keys:
+            return
+        positions = self._positions(keys).ravel()
+        masks = (np.uint64(1) << (positions & np.uint64(7))).astype(np.uint8)
+        np.bitwise_or.at(self.bits, positions >> np.uint64(3), masks)
+        self.count += len(keys)
+
+    def estimated_fp_rate(self) -> float:
+        """현재 등록 건수 기준 예상 오탐률"""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+class FingerprintDeduplicator:
+    """중복 지문 스트리밍 판정 (메모리 상한 고정)
+
+    - 최근 window건: 정확한 키 LRU 창 (확정 중복)
+    - 그 이전 전체: Bloom 필터 (fp_rate 이하 확률로 중복 아닌 레코드를 중복으로 판정)
+
+    상태 파일을 연결하면(open_state) 판정한 키를 순서대로 journal에 덧붙인다.
+    필터 비트는 등록 키의 OR, 창은 키 순서로만 정해지므로 상태 파일 + journal 재생으로
+    체크포인트 시점 상태를 그대로 복원한다. journal이 상태 파일보다 커지면 상태 파일로 압축한다.
+    """
+
+    def __init__(self, capacity: int, fp_rate: float, window: int):
+        self.filter = BloomFilter(capacity, fp_rate)
+        self.window = LRUCache(window)
+        self.sequence = 0  # 지금까지 판정한 키 수 (journal 순번)
+        self.state_path: Optional[str] = None
+        self._pending = bytearray()  # 아직 journal에 쓰지 않은 레코드
+        self._journal_size = 0  # journal에 쓴 레코드 수
+        self.stats = {
+            'dedup_checked': 0,
+            'dedup_duplicates': 0,
+            'dedup_window_hits': 0,
+            'dedup_filter_hits': 0
+        }
+
+    def duplicates(self, locations: List[Dict[str, Any]]) -> List[bool]:
+        """위치별 중복 여부 (이전 배치와 배치 내 앞 레코드 기준) 판정 후 새 키 등록"""
+        keys = [dedup_key(location) for location in locations]
+        in_filter = self.filter.contains(keys).tolist()
+        result = []
+        new_keys = []
+        batch_keys = set()
+        for key, filtered in zip(keys, in_filter):
+            if self.window.touch(key) or key in batch_keys:
+                self.stats['dedup_window_hits'] += 1
+                result.append(True)
+            elif filtered:
+                self.stats['dedup_filter_hits'] += 1
+                result.append(True)
+            else:
+                new_keys.append(key)
+                result.append(False)
+            batch_keys.add(key)
+        self.filter.add(new_keys)
+        self.stats['dedup_checked'] += len(keys)
+        self.stats['dedup_duplicates'] += len(keys) - len(new_keys)
+        self.sequence += len(keys)
+        if self.state_path is not None:
+            self._pending += b''.join([key + (b'\x00' if duplicate else b'\x01') for key, duplicate in zip(keys, result)])
+        return result
+
+    def _replay(self, records: bytes):
+        """journal 레코드를 판정 순서대로 다시 적용 (창 갱신 + 등록 키 필터 추가)"""
+        new_keys = []
+        for offset in range(0, len(records), JOURNAL_RECORD):
+            key = records[offset:offset + KEY_SIZE]
+            self.window.touch(key)
+            if records[offset + KEY_SIZE]:
+                new_keys.append(key)
+        self.filter.add(new_keys)
+        self.sequence += len(records) // JOURNAL_RECORD
+
+    def open_state(self, path: str, restore: bool = False, sequence: Optional[int] = None):
+        """상태 파일 연결 (restore: 저장된 상태를 sequence번째 키까지 복원, None이면 전부)
+
+        연결 시 현재 상태를 상태 파일로 저장하고 journal을 새로 시작한다.
+        """
+        if restore:
+            self._load(path, sequence)
+        self.state_path = path
+        self.save()
+
+    def _load(self, path: str, sequence: Optional[int]):
+        journal_path = dedup_journal_path_for(path)
+        if not os.path.exists(path):
+            if os.path.exists(journal_path):
+                raise ValueError(f"중복 판정 상태 파일이 없습니다: {path}")
+            return
+        with np.load(path) as state:
+            shape = (int(state['num_bits']), int(state['num_hashes']), int(state['window_size']))
+            if shape != (self.filter.num_bits, self.filter.num_hashes, self.window.max_size):
+                raise ValueError(f"중복 판정 설정(dedup_capacity/dedup_fp_rate/dedup_window)이 저장된 상태와 다릅니다: {path}")
+            self.filter.bits = state['bits'].copy()
+            self.filter.count = int(state['count'])
+            self.sequence = int(state['sequence'])
+            keys = state['window'].tobytes()
+        self.window = LRUCache(self.window.max_size)
+        for offset in range(0, len(keys), KEY_SIZE):
+            self.window.touch(keys[offset:offset + KEY_SIZE])
+        if sequence is not None and sequence < self.sequence:
+            raise ValueError(f"중복 판정 상태가 체크포인트보다 앞서 있습니다: {self.sequence} > {sequence}")
+
+        # 상태 파일 이후 ~ sequence까지 journal 재생 (기록 중 중단된 마지막 레코드는 무시)
+        if not os.path.exists(journal_path):
+            return
+        with open(journal_path, 'rb') as f:
+            base = int.from_bytes(f.read(JOURNAL_HEADER), 'little')
+            data = f.read()
+        if base > self.sequence:
+            raise ValueError(f"중복 판정 journal이 상태 파일과 맞지 않습니다: {journal_path}")
+        end = (len(data) // JOURNAL_RECORD) + base
+        if sequence is not None:
+            end = min(end, sequence)
+        self._replay(data[(self.sequence - base) * JOURNAL_RECORD:(end - base) * JOURNAL_RECORD])
+
+    def append_journal(self) -> int:
+        """판정한 키를 journal에 기록하고 (fsync) 체크포인트에 저장할 순번 반환"""
+        if self._pending:
+            with open(dedup_journal_path_for(self.state_path), 'ab') as f:
+                f.write(self._pending)
+                f.flush()
+                os.fsync(f.fileno())
+            self._journal_size += len(self._pending) // JOURNAL_RECORD
+            self._pending = bytearray()
+        return self.sequence
+
+    def compact(self):
+        """journal이 상태 파일보다 커졌으면 상태 파일로 다시 저장 (체크포인트 저장 후 호출)"""
+        if self._journal_size * JOURNAL_RECORD > self.filter.nbytes + self.window.max_size * KEY_SIZE:
+            self.save()
+
+    def save(self):
+        """필터 비트 + 창 키(오래된 순)를 상태 파일로 저장하고 journal을 비움
+
+        상태 파일을 먼저 교체하므로, 중간에 중단되어도 journal의 순번으로 이미 반영된 레코드를 건너뛴다.
+        """
+        path = self.state_path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        window = np.frombuffer(b''.join(self.window.keys()), dtype=np.uint8)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, bits=self.filter.bits, count=self.filter.count, sequence=self.sequence,
+                     num_bits=self.filter.num_bits, num_hashes=self.filter.num_hashes,
+                     window_size=self.window.max_size, window=window)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+        self._pending = bytearray()  # 상태 파일에 반영됨
+        journal_path = dedup_journal_path_for(path)
+        with open(f"{journal_path}.tmp", 'wb') as f:
+            f.write(self.sequence.to_bytes(JOURNAL_HEADER, 'little'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{journal_path}.tmp", journal_path)
+        self._journal_size = 0
@@ -0,0 +1,174 @@
+import json
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from .checkpoint import load_state, save_state
+
+# 어휘 사전으로 정수 ID를 부여하는 지문 컬럼 (wrssi는 실수 배열)
+VOCABULARY_FIELDS = ('wmac', 'lcellid', 'ipcikey')
+
+def vocabulary_path_for(output_path: str) -> str:
+    """출력 경로에 대응하는 어휘 사전 파일 경로"""
+    return f"{os.path.splitext(output_path)[0]}.vocab.json"
+
+def journal_path_for(vocabulary_path: str) -> str:
+    """어휘 사전 파일에 대응하는 추가 토큰 기록(journal) 경로"""
+    return f"{os.path.splitext(vocabulary_path)[0]}.log"
+
+def split_column(values: Sequence[Optional[str]]) -> Tuple[List[str], np.ndarray]:
+    """쉼표 구분 컬럼 값 목록을 (평탄 토큰 목록, 행별 오프셋)으로 변환 (빈 값은 빈 목록)
+
+    배치 전체를 한 번 이어 붙여 한 번만 split한다.
+    """
+    counts = np.fromiter((value.count(',') + 1 if value else 0 for value in values),
+                         dtype=np.int64, count=len(values))
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    joined = ','.join([value for value in values if value])
+    return (joined.split(',') if joined else []), offsets
+
+def split_rows(flat: list, offsets: np.ndarray) -> List[list]:
+    """평탄 목록을 오프셋 기준 행별 목록으로 나눔"""
+    bounds = offsets.tolist()
+    return [flat[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
+
+class Vocabulary:
+    """토큰 문자열 <-> 정수 ID (처음 나온 순서대로 0부터 부여, 부여한 ID는 바뀌지 않음)"""
+
+    def __init__(self, tokens: Sequence[str] = ()):
+        self.tokens: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self.intern(list(tokens))
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def intern(self, tokens: List[str]) -> np.ndarray:
+        """토큰 목록의 ID 배열 (새 토큰은 사전에 추가)"""
+        ids = self._ids
+        for token in dict.fromkeys(tokens):
+            if token not in ids:
+                ids[token] = len(self.tokens)
+                self.tokens.append(token)
+        return np.fromiter(map(ids.__getitem__, tokens), dtype=np.int32, count=len(tokens))
+
+    def decode(self, ids: Sequence[int]) -> List[str]:
+        """ID 목록을 사전의 토큰 문자열 목록으로 변환 (같은 토큰은 같은 str 객체)"""
+        tokens = self.tokens
+        return [tokens[i] for i in ids]
+
+    def truncate(self, size: int):
+        """처음 size개 토큰만 남김 (체크포인트 시점으로 되돌리기)"""
+        for token in self.tokens[size:]:
+            del self._ids[token]
+        del self.tokens[size:]
+
+class FingerprintVocabulary:
+    """지문 컬럼별 어휘 사전 묶음 (출력 옆 .vocab.json에 저장)
+
+    체크포인트마다 전체를 다시 쓰지 않도록, 마지막 저장 이후 추가된 토큰만
+    .vocab.log에 한 줄씩 덧붙인다 (append_journal). save는 전체를 쓰고 journal을 지운다.
+    """
+
+    def __init__(self, tokens: Optional[Dict[str, Sequence[str]]] = None):
+        tokens = tokens or {}
+        self.fields = {field: Vocabulary(tokens.get(field, ())) for field in VOCABULARY_FIELDS}
+        # 파일(사전 + journal)에 기록된 필드별 토큰 수 (None: 파일과 맞지 않아 다음 기록은 전체 저장)
+        self._persisted: Optional[Dict[str, int]] = self.sizes()
+
+    def __getitem__(self, field: str) -> Vocabulary:
+        return self.fields[field]
+
+    def sizes(self) -> Dict[str, int]:
+        return {field: len(vocabulary) for field, vocabulary in self.fields.items()}
+
+    def save(self, path: str):
+        """전체 사전 저장 후 journal 삭제"""
+        save_state(path, {field: vocabulary.tokens for field, vocabulary in self.fields.items()})
+        journal_path = journal_path_for(path)
+        if os.path.exists(journal_path):
+            os.remove(journal_path)
+        self._persisted = self.sizes()
+
+    def append_journal(self, path: str):
+        """마지막 기록 이후 추가된 토큰만 journal에 한 줄로 덧붙임 (기록 비용은 추가 토큰 수에 비례)"""
+        if self._persisted is None:
+            self.save(path)
+            return
+        delta = {field: vocabulary.tokens[self._persisted[field]:] for field, vocabulary in self.fields.items()}
+        if not any(delta.values()):
+            return
+        with open(journal_path_for(path), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(delta, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self._persisted = self.sizes()
+
+    @classmethod
+    def load(cls, path: str, sizes: Optional[Dict[str, int]] = None) -> 'FingerprintVocabulary':
+        """저장된 사전 + journal 로드 (없으면 빈 사전, sizes를 주면 그 크기로 되돌림)"""
+        vocabulary = cls(load_state(path))
+        journal_path = journal_path_for(path)
+        if os.path.exists(journal_path):
+            with open(journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        delta = json.loads(line)
+                    except ValueError:
+                        break  # 기록 중 중단된 마지막 줄 (체크포인트 크기 밖이므로 버림)
+                    for field, tokens in delta.items():
+                        vocabulary[field].intern(tokens)
+        for field, size in (sizes or {}).items():
+            vocabulary[field].truncate(size)
+        # 파일에는 되돌린 크기 뒤의 토큰이 남아 있을 수 있으므로 첫 기록은 전체 저장
+        vocabulary._persisted = None
+        return vocabulary
+
+class FingerprintBatch:
+    """배치 지문 컬럼을 평탄 배열 + 행별 오프셋(CSR)으로 보관
+
+    wmac/lcellid/ipcikey는 어휘 사전 ID(int32), wrssi는 float64 값이다.
+    행 i의 값은 ids[field][offsets[field][i]:offsets[field][i + 1]].
+    어휘 사전 없이 파싱하면 ids 대신 tokens에 평탄 토큰 문자열 목록을 보관한다.
+    """
+
+    def __init__(self, vocabulary: Optional[FingerprintVocabulary], ids: Dict[str, np.ndarray],
+                 offsets: Dict[str, np.ndarray], wrssi: np.ndarray, wrssi_offsets: np.ndarray,
+                 tokens: Optional[Dict[str, List[str]]] = None):
+        self.vocabulary = vocabulary
+        self.ids = ids
+        self.offsets = offsets
+        self.wrssi = wrssi
+        self.wrssi_offsets = wrssi_offsets
+        self.tokens = tokens
+
+    def __len__(self) -> int:
+        return len(self.wrssi_offsets) - 1
+
+    def id_rows(self, field: str) -> List[List[int]]:
+        """행별 ID 목록"""
+        return split_rows(self.ids[field].tolist(), self.offsets[field])
+
+    def token_rows(self, field: str) -> List[List[str]]:
+        """행별 토큰 문자열 목록 (사전에 보관된 str 객체 재사용)"""
+        if self.tokens is not None:
+            return split_rows(self.tokens[field], self.offsets[field])
+        return split_rows(self.vocabulary[field].decode(self.ids[field].tolist()), self.offsets[field])
+
+    def wrssi_rows(self) -> List[List[float]]:
+        """행별 wrssi 값 목록"""
+        return split_rows(self.wrssi.tolist(), self.wrssi_offsets)
+
+def parse_batch(locations: List[Dict], vocabulary: Optional[FingerprintVocabulary] = None) -> FingerprintBatch:
+    """위치 목록의 지문 컬럼을 컬럼별 1회 split으로 파싱하고 토큰을 어휘 사전에 등록
+    (vocabulary가 None이면 등록하지 않고 토큰 문자열을 그대로 보관)"""
+    ids, offsets, flat = {}, {}, {}
+    for field in VOCABULARY_FIELDS:
+        tokens, offsets[field] = split_column([location[field] for location in locations])
+        if vocabulary is None:
+            flat[field] = tokens
+        else:
+            ids[field] = vocabulary[field].intern(tokens)
+    values, wrssi_offsets = split_column([location['wrssi'] for location in locations])
+    wrssi = np.array(values, dtype=np.float64) if values else np.empty(0, dtype=np.float64)
+    return FingerprintBatch(vocabulary, ids, offsets, wrssi, wrssi_offsets, flat if vocabulary is None else None)
@@ -0,0 +1,237 @@
+import cProfile
+import io
+import json
+import math
+import os
+import pstats
+import time
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+
+# 처리 단계 (배치 1개 기준)
+# fetch: collectxy 조회 + 행 변환 + 그리드 셀 계산, dedup: 중복 지문 판정, match: 건물/셀 매칭,
+# serialize: 출력 인코딩 (지문 파싱 포함), write: 파일 기록/압축, batch: 배치 1개 전체 (대기 포함)
+STAGES = ('fetch', 'dedup', 'match', 'serialize', 'write', 'batch')
+
+def _geometric_bounds(low: float, high: float, per_doubling: int) -> List[float]:
+    """low부터 high까지 2배마다 per_doubling개씩 나눈 버킷 상한"""
+    count = math.ceil(math.log2(high / low) * per_doubling)
+    return [low * 2 ** (i / per_doubling) for i in range(count + 1)]
+
+# 지연 시간 버킷: 1us ~ 약 1100초, 버킷 폭 약 19% (2의 1/4 제곱)
+LATENCY_BOUNDS = _geometric_bounds(1e-6, 1024, 4)
+# 조회당 행 수 버킷: 1 ~ 약 1600만 (2배씩)
+ROW_BOUNDS = _geometric_bounds(1, 2 ** 24, 1)
+
+class Histogram:
+    """고정 버킷 히스토그램 (메모리 고정, 분위수는 버킷 안 로그 보간으로 추정)"""
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BOUNDS):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # 마지막 버킷: 최대 상한 초과
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe(self, value: float):
+        index = int(np.searchsorted(self.bounds, value, side='left'))
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: 'Histogram'):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """q 분위수 추정값 (관측값이 없으면 None)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if count and cumulative + count >= rank:
+                lower = self.bounds[i - 1] if i > 0 else self.min
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                lower, upper = max(lower, self.min), min(upper, self.max)
+                fraction = (rank - cumulative) / count
+                if lower <= 0 or upper <= lower:
+                    return upper
+                return lower * (upper / lower) ** fraction
+            cumulative += count
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+            'mean': self.sum / self.count if self.count else None,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99)
+        }
+
+    def state(self) -> Dict[str, Any]:
+        """프로세스 간 전달용 상태 (버킷 카운트 포함)"""
+        return {'counts': self.counts, 'count': self.count, 'sum': self.sum, 'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], bounds: Sequence[float] = LATENCY_BOUNDS) -> 'Histogram':
+        histogram = cls(bounds)
+        histogram.counts = list(state['counts'])
+        histogram.count = state['count']
+        histogram.sum = state['sum']
+        histogram.min = state['min']
+        histogram.max = state['max']
+        return histogram
+
+class RunMetrics:
+    """실행 1회의 단계별 지연 시간 히스토그램과 카운터 (JSON / Prometheus textfile 내보내기)"""
+
+    def __init__(self):
+        self.stages = {stage: Histogram(LATENCY_BOUNDS) for stage in STAGES}
+        self.rows_per_query = Histogram(ROW_BOUNDS)
+        self.batch_sizes = Histogram(ROW_BOUNDS)  # 배치 크기 (적응형 배치에서 조회마다 정한 값)
+        self.counters = {'records': 0, 'written_records': 0, 'db_queries': 0, 'bytes_written': 0}
+        self.started_at = time.time()
+        self.duration = 0.0
+
+    def observe(self, stage: str, seconds: float):
+        self.stages[stage].observe(seconds)
+
+    def observe_query(self, rows: int):
+        self.rows_per_query.observe(rows)
+        self.counters['db_queries'] += 1
+
+    def observe_batch_size(self, size: int):
+        self.batch_sizes.observe(size)
+
+    def merge(self, other: 'RunMetrics'):
+        """다른 실행(워커) 결과 합산"""
+        for stage, histogram in other.stages.items():
+            self.stages[stage].merge(histogram)
+        self.rows_per_query.merge(other.rows_per_query)
+        self.batch_sizes.merge(other.batch_sizes)
+        for key, value in other.counters.items():
+            self.counters[key] += value
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            'stages': {stage: histogram.state() for stage, histogram in self.stages.items()},
+            'rows_per_query': self.rows_per_query.state(),
+            'batch_sizes': self.batch_sizes.state(),
+            'counters': dict(self.counters)
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'RunMetrics':
+        metrics = cls()
+        metrics.stages = {stage: Histogram.from_state(s, LATENCY_BOUNDS) for stage, s in state['stages'].items()}
+        metrics.rows_per_query = Histogram.from_state(state['rows_per_query'], ROW_BOUNDS)
+        metrics.batch_sizes = Histogram.from_state(state['batch_sizes'], ROW_BOUNDS)
+        metrics.counters = dict(state['counters'])
+        return metrics
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'started_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started_at)),
+            'duration_seconds': self.duration,
+            'records_per_second': self.counters['records'] / self.duration if self.duration else None,
+            'counters': dict(self.counters),
+            'stages_seconds': {stage: histogram.to_dict() for stage, histogram in self.stages.items()},
+            'rows_per_query': self.rows_per_query.to_dict(),
+            'batch_sizes': self.batch_sizes.to_dict()
+        }
+
+    def write_json(self, path: str, extra: Optional[Dict[str, Any]] = None):
+        """지표 JSON 저장 (extra: 함께 기록할 실행 정보)"""
+        data = self.to_dict()
+        data.update(extra or {})
+        _write_text(path, json.dumps(data, ensure_ascii=False, indent=2))
+
+    def write_prometheus(self, path: str, prefix: str = 'data_processor'):
+        """Prometheus textfile collector 형식으로 저장 (히스토그램 버킷은 2배 간격으로 축약)"""
+        lines = [
+            f"# HELP {prefix}_stage_seconds Per-batch latency of each processing stage.",
+            f"# TYPE {prefix}_stage_seconds histogram"
+        ]
+        for stage, histogram in self.stages.items():
+            lines.extend(prometheus_histogram(f"{prefix}_stage_seconds", f'stage="{stage}"', histogram, 4))
+        lines.append(f"# HELP {prefix}_stage_seconds_quantile Estimated per-batch stage latency quantiles.")
+        lines.append(f"# TYPE {prefix}_stage_seconds_quantile gauge")
+        for stage, histogram in self.stages.items():
+            for q in (0.5, 0.95, 0.99):
+                value = histogram.quantile(q)
+                if value is not None:
+                    lines.append(f'{prefix}_stage_seconds_quantile{{stage="{stage}",quantile="{q}"}} {value:.9g}')
+        lines.append(f"# HELP {prefix}_rows_per_query Rows returned per collectxy query.")
+        lines.append(f"# TYPE {prefix}_rows_per_query histogram")
+        lines.extend(prometheus_histogram(f"{prefix}_rows_per_query", '', self.rows_per_query, 1))
+        if self.batch_sizes.count:
+            lines.append(f"# HELP {prefix}_batch_size Batch size chosen per collectxy query (adaptive batching).")
+            lines.append(f"# TYPE {prefix}_batch_size histogram")
+            lines.extend(prometheus_histogram(f"{prefix}_batch_size", '', self.batch_sizes, 1))
+        for key, value in self.counters.items():
+            lines.append(f"# TYPE {prefix}_{key}_total counter")
+            lines.append(f"{prefix}_{key}_total {value}")
+        lines.append(f"# TYPE {prefix}_run_duration_seconds gauge")
+        lines.append(f"{prefix}_run_duration_seconds {self.duration:.6f}")
+        lines.append(f"# TYPE {prefix}_run_timestamp_seconds gauge")
+        lines.append(f"{prefix}_run_timestamp_seconds {self.started_at:.0f}")
+        _write_text(path, '\n'.join(lines) + '\n')
+
+def export_metrics(metrics: RunMetrics, json_path: str = '', prometheus_path: str = '',
+                   extra: Optional[Dict[str, Any]] = None) -> List[str]:
+    """설정된 경로에 지표 저장 (빈 경로는 건너뜀) 후 저장한 경로 목록 반환"""
+    paths = []
+    if json_path:
+        metrics.write_json(json_path, extra)
+        paths.append(json_path)
+    if prometheus_path:
+        metrics.write_prometheus(prometheus_path)
+        paths.append(prometheus_path)
+    return paths
+
+def prometheus_histogram(name: str, labels: str, histogram: Histogram, step: int) -> List[str]:
+    """누적 버킷(le) + _sum/_count 줄 (step개마다 한 버킷만 출력)"""
+    separator = ',' if labels else ''
+    lines = []
+    cumulative = 0
+    for i, bound in enumerate(histogram.bounds):
+        cumulative += histogram.counts[i]
+        if i % step == 0:
+            lines.append(f'{name}_bucket{{{labels}{separator}le="{bound:.9g}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{labels}{separator}le="+Inf"}} {histogram.count}')
+    label_set = f'{{{labels}}}' if labels else ''
+    lines.append(f'{name}_sum{label_set} {histogram.sum:.9g}')
+    lines.append(f'{name}_count{label_set} {histogram.count}')
+    return lines
+
+def _write_text(path: str, text: str):
+    """임시 파일에 쓴 뒤 교체 (수집기가 쓰는 중인 파일을 읽지 않도록)"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def dump_profile(profiler: cProfile.Profile, path: str, limit: int = 30):
+    """cProfile 결과를 .prof 파일(snakeviz/pstats용)로 저장하고 누적/자체 시간 상위 함수 출력"""
+    profiler.dump_stats(path)
+    for sort_key, title in (('cumulative', '누적 시간'), ('tottime', '자체 시간')):
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).strip_dirs().sort_stats(sort_key).print_stats(limit)
+        print(f"\n프로파일 ({title} 상위 {limit}개):")
+        print(stream.getvalue().split('\n\n', 1)[-1].rstrip())
+    print(f"\n프로파일 저장: {path}")
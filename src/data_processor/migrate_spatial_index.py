@@ -0,0 +1,14 @@
+from data_processor.db_connector import DBConnector
+from data_processor.config import Config
+
+def migrate_spatial_index():
+    """building/cellidindex에 bbox geometry 컬럼과 SPATIAL INDEX 생성 (cell_index_type = spatial 사전 작업)"""
+    config = Config('config/db_config.ini')
+    db = DBConnector(config.db, spatial_index=True)
+    db.ensure_spatial_indexes()
+    print(f"\n마이그레이션 완료: {'성공' if db.has_spatial_columns() else '실패'}")
+    if config.processor.cell_index_type != 'spatial':
+        print("config/db_config.ini의 cell_index_type을 spatial로 설정하면 후보 조회에 SPATIAL INDEX를 사용합니다.")
+
+if __name__ == '__main__':
+    migrate_spatial_index()
@@ -0,0 +1,93 @@
+import os
+import shutil
+from typing import Any, Dict, List, Optional
+from .config import ProcessorConfig
+from .writer import DualJsonlWriter, ParquetTrainWriter
+from .shards import ShardedJsonlWriter, manifest_path_for, merge_manifests
+from .checkpoint import checkpoint_path_for
+from .dedup import dedup_state_path_for, dedup_journal_path_for
+from .fingerprint import FingerprintVocabulary
+
+def is_sharded(config: ProcessorConfig) -> bool:
+    """JSONL 출력을 압축/교체 샤드로 저장하는지 여부"""
+    return config.output_format == 'jsonl' and (
+        config.output_compression != 'none' or config.shard_max_records > 0 or config.shard_max_bytes > 0
+    )
+
+def output_files(output_path: str, config: ProcessorConfig) -> List[str]:
+    """출력 형식별 생성 파일 경로 (jsonl: 원본 + 학습 데이터, 샤드: 매니페스트, parquet: 학습 데이터)"""
+    base_name = os.path.splitext(output_path)[0]
+    if config.output_format == 'parquet':
+        return [f"{base_name}_traindata.parquet"]
+    if is_sharded(config):
+        return [manifest_path_for(output_path)]
+    return [output_path, f"{base_name}_traindata.jsonl"]
+
+def open_writer(output_path: str, config: ProcessorConfig, append: bool = False,
+                resume_state: Optional[Dict[str, Any]] = None,
+                vocabulary: Optional[FingerprintVocabulary] = None):
+    """설정된 출력 형식의 writer 생성
+
+    append: 기존 샤드 뒤에 추가, resume_state: 체크포인트에서 이어쓰기,
+    vocabulary: 학습 데이터를 어휘 사전 ID로 기록 (tokenized 출력)
+    """
+    paths = output_files(output_path, config)
+    if config.output_format == 'parquet':
+        if append or resume_state:
+            raise ValueError("parquet 출력은 이어쓰기/증분 처리를 지원하지 않습니다.")
+        return ParquetTrainWriter(paths[0], config.parquet_compression, config.parquet_row_group_size,
+                                  include_buildings=config.building_search, include_cells=config.cell_search,
+                                  grid_levels=config.grid_levels, vocabulary=vocabulary)
+    if config.output_format != 'jsonl':
+        raise ValueError(f"지원하지 않는 출력 형식: {config.output_format}")
+    if is_sharded(config):
+        return ShardedJsonlWriter(output_path, config.output_compression,
+                                  config.shard_max_records, config.shard_max_bytes,
+                                  append=append, resume_state=resume_state, vocabulary=vocabulary)
+    if append:
+        raise ValueError("증분 처리는 샤드 출력(output_compression 또는 shard_max_records/shard_max_bytes)이 필요합니다.")
+    return DualJsonlWriter(paths[0], paths[1], config.write_buffer_size, resume_state=resume_state,
+                           vocabulary=vocabulary)
+
+def _concat_parquet(parts: List[str], output_path: str, compression: str):
+    """Parquet 파트를 row group 단위로 복사해 병합"""
+    import pyarrow.parquet as pq
+    writer = None
+    for part in parts:
+        reader = pq.ParquetFile(part)
+        if writer is None:
+            writer = pq.ParquetWriter(output_path, reader.schema_arrow, compression=compression)
+        for i in range(reader.num_row_groups):
+            writer.write_table(reader.read_row_group(i))
+        reader.close()
+        os.remove(part)
+    if writer is not None:
+        writer.close()
+
+def _concat(parts: List[str], output_path: str):
+    """파일들을 순서대로 이어붙이고 원본 삭제"""
+    with open(output_path, 'wb') as f_out:
+        for part in parts:
+            with open(part, 'rb') as f_in:
+                shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+            os.remove(part)
+
+def merge_outputs(part_outputs: List[str], output_path: str, config: ProcessorConfig) -> List[str]:
+    """파트 출력들을 순서대로 병합하고 최종 파일 경로 반환"""
+    for part in part_outputs:
+        dedup_path = dedup_state_path_for(part)
+        for path in (checkpoint_path_for(part), dedup_path, dedup_journal_path_for(dedup_path)):
+            if os.path.exists(path):
+                os.remove(path)
+    if is_sharded(config):
+        return [merge_manifests(part_outputs, output_path, config.output_compression)]
+
+    targets = output_files(output_path, config)
+    part_files = [output_files(part, config) for part in part_outputs]
+    for i, target in enumerate(targets):
+        parts = [files[i] for files in part_files]
+        if config.output_format == 'parquet':
+            _concat_parquet(parts, target, config.parquet_compression)
+        else:
+            _concat(parts, target)
+    return targets
@@ -0,0 +1,85 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+from .config import load_config
+from .batch_processor import BatchProcessor
+from .outputs import merge_outputs
+from .metrics import RunMetrics
+
+def split_range(start_id: int, end_id: int, shards: int) -> List[Tuple[int, int]]:
+    """[start_id, end_id] 구간을 겹치지 않는 연속 샤드 구간으로 분할"""
+    shards = max(1, min(shards, end_id - start_id + 1))
+    step = (end_id - start_id + 1) / shards
+    bounds = [start_id + round(i * step) for i in range(shards)] + [end_id + 1]
+    return [(bounds[i], bounds[i + 1] - 1) for i in range(shards)]
+
+def part_path(output_path: str, index: int) -> str:
+    """샤드별 임시 출력 파일 경로"""
+    base_name, ext = os.path.splitext(output_path)
+    return f"{base_name}.part-{index:05d}{ext}"
+
+def _run_shard(args: Tuple[str, Dict[str, Any], int, int, int, str, bool]) -> Dict[str, Any]:
+    """워커 프로세스: 자체 DBConnector로 샤드 1개 처리"""
+    config_path, overrides, index, start_id, end_id, output_path, resume = args
+    processor = BatchProcessor(load_config(config_path, overrides))
+    stats = processor.process_to_file(start_id, end_id, output_path, report=False, resume=resume)
+    stats.update({'shard': index, 'start_id': start_id, 'end_id': end_id, 'pid': os.getpid()})
+    return stats
+
+def process_parallel(config_path: str, start_id: int, end_id: int, output_path: str,
+                     workers: int, overrides: Optional[Dict[str, Any]] = None,
+                     resume: bool = False) -> Dict[str, Any]:
+    """ID 구간을 샤드로 나눠 프로세스 풀에서 처리하고 ID 순서대로 병합 (resume: 샤드별 체크포인트에서 재개)"""
+    total_start = time.time()
+    processor_config = load_config(config_path, overrides).processor
+    if processor_config.output_tokenized:
+        raise ValueError("tokenized 출력은 병렬 처리를 지원하지 않습니다 (워커별 어휘 사전 ID가 달라짐).")
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    # 1. 샤드별 처리 (결과는 샤드 순서 = ID 순서로 반환)
+    shards = split_range(start_id, end_id, workers)
+    tasks = [(config_path, overrides, i, s, e, part_path(output_path, i), resume) for i, (s, e) in enumerate(shards)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        shard_stats = list(executor.map(_run_shard, tasks))
+
+    # 2. 샤드 결과를 순서대로 병합
+    targets = merge_outputs([task[5] for task in tasks], output_path, processor_config)
+
+    # 3. 통계 합산
+    total_time = time.time() - total_start
+    overall: Dict[str, Any] = {}
+    for stats in shard_stats:
+        for key, value in stats.items():
+            if key not in ('shard', 'start_id', 'end_id', 'pid') and isinstance(value, (int, float)):
+                overall[key] = overall.get(key, 0) + value
+    overall['cpu_time'] = overall.pop('total_time', 0)
+    overall['total_time'] = total_time
+    # 워커별 지표 히스토그램 합산 (버킷이 같으므로 분위수도 전체 기준)
+    metrics = RunMetrics()
+    for stats in shard_stats:
+        metrics.merge(RunMetrics.from_state(stats.pop('metrics')))
+    metrics.duration = total_time
+
+    print("\n워커별 통계:")
+    for stats in shard_stats:
+        rate = stats['total_records'] / stats['total_time'] if stats['total_time'] else 0
+        print(f"- 샤드 {stats['shard']} (ID {stats['start_id']} ~ {stats['end_id']}, pid {stats['pid']}): "
+              f"{stats['total_records']}건, {stats['total_time']:.2f}초, "
+              f"DB 읽기 {stats['db_read_time']:.2f}초, 초당 {rate:.1f}개")
+    print("\n전체 통계:")
+    print(f"워커 수: {workers}, 샤드 수: {len(shards)}")
+    print(f"총 처리 시간: {total_time:.2f}초 (워커 합계 {overall['cpu_time']:.2f}초)")
+    print(f"총 레코드 수: {overall['total_records']}")
+    print(f"DB 읽기 시간 합계: {overall['db_read_time']:.2f}초")
+    if total_time:
+        print(f"초당 처리 레코드: {overall['total_records'] / total_time:.1f}개")
+    print(f"처리 완료:")
+    for target in targets:
+        print(f"- {target}")
+
+    overall['shards'] = shard_stats
+    overall['metrics'] = metrics
+    return overall
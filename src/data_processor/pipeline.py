@@ -0,0 +1,68 @@
+import queue
+import threading
+import time
+from typing import Any, Iterable, Iterator
+
+class _Failure:
+    """생산자 스레드에서 발생한 예외 전달용"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+class Prefetcher:
+    """백그라운드 스레드가 다음 항목을 미리 읽어 두는 bounded queue 파이프라인
+
+    생산자(DB 읽기)와 소비자(매칭/저장)의 작업/대기 시간을 각각 집계한다.
+    - producer_busy: 소스에서 다음 항목을 읽는 데 걸린 시간
+    - producer_idle: 큐가 가득 차 소비자를 기다린 시간
+    - consumer_idle: 큐가 비어 생산자를 기다린 시간
+    """
+    _END = object()
+
+    def __init__(self, source: Iterable[Any], depth: int):
+        self._source = iter(source)
+        self._queue: 'queue.Queue[Any]' = queue.Queue(maxsize=max(1, depth))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._produce, name='prefetcher', daemon=True)
+        self.producer_busy = 0.0
+        self.producer_idle = 0.0
+        self.consumer_idle = 0.0
+
+    def _put(self, item: Any):
+        start = time.time()
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        self.producer_idle += time.time() - start
+
+    def _produce(self):
+        try:
+            while not self._stop.is_set():
+                start = time.time()
+                item = next(self._source, self._END)
+                self.producer_busy += time.time() - start
+                self._put(item)
+                if item is self._END:
+                    return
+        except BaseException as e:
+            self._put(_Failure(e))
+
+    def __iter__(self) -> Iterator[Any]:
+        self._thread.start()
+        try:
+            while True:
+                start = time.time()
+                item = self._queue.get()
+                self.consumer_idle += time.time() - start
+                if item is self._END:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+        finally:
+            # 소비자가 중단되면 생산자도 정리
+            self._stop.set()
+            self._thread.join()
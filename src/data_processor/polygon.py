@@ -0,0 +1,139 @@
+import re
+from typing import List, Optional, Sequence
+import numpy as np
+from .spatial_index import expand_ranges
+
+# WKT에서 가장 안쪽 괄호 = 링 1개 ("x y, x y, ...")
+_RING_PATTERN = re.compile(r'\(([^()]+)\)')
+
+def parse_wkt_rings(wkt: str) -> List[np.ndarray]:
+    """POLYGON/MULTIPOLYGON WKT를 링별 (N, 2) 좌표 배열 목록으로 변환 (x=경도, y=위도)
+
+    MySQL 8은 SRID 4326 같은 지리 좌표계 도형을 위도/경도 순서로 출력하므로,
+    SRID 0이 아닌 컬럼은 ST_AsText(col, 'axis-order=long-lat')로 조회해야 한다.
+    """
+    rings = []
+    for body in _RING_PATTERN.findall(wkt):
+        coords = np.array(body.replace(',', ' ').split(), dtype=np.float64).reshape(-1, 2)
+        if len(coords) and not np.array_equal(coords[0], coords[-1]):
+            coords = np.vstack([coords, coords[:1]])
+        if len(coords) >= 4:
+            rings.append(coords)
+    return rings
+
+def _is_rectangle(rings: List[np.ndarray]) -> bool:
+    """링 1개짜리 축 정렬 직사각형인지 (bbox 검사와 결과가 같음)"""
+    if len(rings) != 1 or len(rings[0]) != 5:
+        return False
+    xs, ys = rings[0][:4, 0], rings[0][:4, 1]
+    if len(np.unique(xs)) != 2 or len(np.unique(ys)) != 2:
+        return False
+    # 인접 꼭짓점은 x 또는 y 중 하나만 달라야 함 (대각선 변 없음)
+    dx = np.diff(rings[0][:, 0]) != 0
+    dy = np.diff(rings[0][:, 1]) != 0
+    return bool(np.all(dx != dy))
+
+class PolygonSet:
+    """건물 폴리곤 패킹 버퍼
+
+    모든 링의 변을 (x0, y0, x1, y1) 배열 하나에 이어 붙이고 폴리곤별 변 구간을
+    오프셋(CSR)으로 보관한다. 폴리곤이 없는 건물과 축 정렬 직사각형 건물은
+    bbox 검사 결과와 같으므로 레이 캐스팅을 건너뛴다.
+    """
+
+    def __init__(self, edges: np.ndarray, offsets: np.ndarray, bounds: np.ndarray, simple: np.ndarray):
+        self.edges = edges
+        self.offsets = offsets
+        self.bounds = bounds
+        self.simple = simple
+
+    @classmethod
+    def from_wkt(cls, values: Sequence[Optional[str]]) -> 'PolygonSet':
+        """WKT 목록(없으면 None)으로 생성 (인덱스는 입력 순서)"""
+        edge_parts = []
+        counts = np.zeros(len(values), dtype=np.int64)
+        bounds = np.full((len(values), 4), np.nan)
+        simple = np.ones(len(values), dtype=bool)
+        for i, wkt in enumerate(values):
+            rings = parse_wkt_rings(wkt) if wkt else []
+            if not rings:
+                continue
+            coords = np.vstack(rings)
+            bounds[i] = coords[:, 0].min(), coords[:, 0].max(), coords[:, 1].min(), coords[:, 1].max()
+            simple[i] = _is_rectangle(rings)
+            if simple[i]:
+                continue
+            for ring in rings:
+                edge_parts.append(np.hstack([ring[:-1], ring[1:]]))
+                counts[i] += len(ring) - 1
+        edges = np.vstack(edge_parts) if edge_parts else np.empty((0, 4))
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        return cls(edges, offsets, bounds, simple)
+
+    def __len__(self) -> int:
+        return len(self.simple)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.edges.nbytes + self.offsets.nbytes + self.bounds.nbytes + self.simple.nbytes)
+
+    def count_axis_swapped(self, min_x: np.ndarray, max_x: np.ndarray,
+                           min_y: np.ndarray, max_y: np.ndarray) -> int:
+        """건물 bbox와는 겹치지 않고 x/y를 바꾸면 겹치는 폴리곤 수 (위도/경도 순서 WKT 검출)"""
+        px0, px1, py0, py1 = self.bounds.T
+        overlaps = (px0 <= max_x) & (px1 >= min_x) & (py0 <= max_y) & (py1 >= min_y)
+        swapped = (py0 <= max_x) & (py1 >= min_x) & (px0 <= max_y) & (px1 >= min_y)
+        return int(np.sum(~overlaps & swapped))
+
+    def take(self, indices: np.ndarray) -> 'PolygonSet':
+        """indices 순서의 부분 집합"""
+        indices = np.asarray(indices, dtype=np.int64)
+        counts = self.offsets[indices + 1] - self.offsets[indices]
+        edge_idx = expand_ranges(self.offsets[indices], counts)
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        return PolygonSet(self.edges[edge_idx], offsets, self.bounds[indices], self.simple[indices])
+
+    def contains(self, xs: np.ndarray, ys: np.ndarray, poly_idx: np.ndarray,
+                 chunk_edges: int = 4_000_000) -> np.ndarray:
+        """(점, 폴리곤) 쌍별 포함 여부 (bbox 검사를 통과한 쌍 기준)
+
+        폴리곤이 없으면 True, 직사각형이면 폴리곤 범위 검사, 그 외에는
+        쌍 x 변 전체를 펼쳐 even-odd 레이 캐스팅으로 판정한다 (구멍/멀티폴리곤 포함).
+        """
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        poly_idx = np.asarray(poly_idx, dtype=np.int64)
+        result = np.ones(len(poly_idx), dtype=bool)
+
+        # 1. 직사각형: 폴리곤 범위 검사
+        bounds = self.bounds[poly_idx]
+        rect = self.simple[poly_idx] & ~np.isnan(bounds[:, 0])
+        if rect.any():
+            b = bounds[rect]
+            x, y = xs[rect], ys[rect]
+            result[rect] = (b[:, 0] <= x) & (x <= b[:, 1]) & (b[:, 2] <= y) & (y <= b[:, 3])
+
+        # 2. 일반 폴리곤: 변 수 기준으로 나눠 레이 캐스팅
+        pending = np.flatnonzero(~self.simple[poly_idx])
+        counts = self.offsets[poly_idx[pending] + 1] - self.offsets[poly_idx[pending]]
+        ends = np.cumsum(counts)
+        start = 0
+        while start < len(pending):
+            base = ends[start - 1] if start else 0
+            stop = max(start + 1, int(np.searchsorted(ends, base + chunk_edges, side='right')))
+            pairs = pending[start:stop]
+            result[pairs] = self._ray_cast(xs[pairs], ys[pairs], poly_idx[pairs], counts[start:stop])
+            start = stop
+        return result
+
+    def _ray_cast(self, xs: np.ndarray, ys: np.ndarray, poly_idx: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        pair = np.repeat(np.arange(len(poly_idx)), counts)
+        edges = self.edges[expand_ranges(self.offsets[poly_idx], counts)]
+        x0, y0, x1, y1 = edges[:, 0], edges[:, 1], edges[:, 2], edges[:, 3]
+        px, py = xs[pair], ys[pair]
+        straddle = (y0 > py) != (y1 > py)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cross_x = x0 + (py - y0) * (x1 - x0) / (y1 - y0)
+        crossings = np.bincount(pair, weights=straddle & (px < cross_x), minlength=len(poly_idx))
+        return crossings.astype(np.int64) % 2 == 1
+
@@ -0,0 +1,406 @@
+import argparse
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlsplit
+import numpy as np
+from .config import Config, load_config
+from .db_connector import create_connector
+from .spatial_matcher import SpatialMatcher
+from .cell_matcher import GridLabeler
+from .writer import float_repr
+from .metrics import Histogram, LATENCY_BOUNDS, ROW_BOUNDS, prometheus_histogram
+
+Point = Tuple[float, float]  # (위도, 경도)
+
+class LookupEngine:
+    """인덱스를 1회 적재해 두고 위경도 목록을 그리드 셀/건물/셀 인덱스 라벨로 일괄 변환"""
+
+    def __init__(self, config: Config, db=None):
+        self.config = config
+        self.db = db if db is not None else create_connector(config)
+        self.matcher = SpatialMatcher(self.db, config.processor)
+        self.labeler = GridLabeler(config.processor.grid_levels)
+        # 좌표 해석 방식: 오프라인 처리와 같은 그리드 셀이 되도록 원본 좌표 컬럼 타입을 시작 시 확인
+        # (스냅샷은 저장된 타입, DB는 collectxy 1건 조회)
+        self.decimal = self.db.detect_coordinate_type() == 'decimal'
+        self.load_time = 0.0
+
+        # 1. 시작 시 건물/셀 인덱스 적재 (요청마다 다시 읽지 않음)
+        load_start = time.time()
+        if config.processor.building_search and config.processor.building_match_mode == 'index':
+            self.matcher.load_building_index()
+        if config.processor.cell_search:
+            self.matcher.load_cell_index()
+        self.load_time = time.time() - load_start
+
+    def lookup(self, points: Sequence[Point]) -> List[Dict[str, Any]]:
+        """위치별 {'grid_cell', ['grid_cells'], ['buildings'], ['lcellids']} (입력 순서대로)"""
+        if not points:
+            return []
+        lats = np.fromiter((lat for lat, _ in points), dtype=np.float64, count=len(points))
+        lons = np.fromiter((lon for _, lon in points), dtype=np.float64, count=len(points))
+        locations: List[Dict[str, Any]] = [{'latitude': lat, 'longitude': lon} for lat, lon in points]
+        self.labeler.assign(locations, self.decimal, lats, lons)
+
+        results = []
+        for location in locations:
+            result = {'grid_cell': location['grid_cell']}
+            if 'grid_cells' in location:
+                result['grid_cells'] = location['grid_cells']
+            results.append(result)
+
+        # 2. 건물 매칭 (batch/index: 묶음 전체를 벡터화 검사, query: 위치별 후보 조회)
+        if self.config.processor.building_search:
+            if self.config.processor.building_match_mode in ('batch', 'index'):
+                buildings = self.matcher.find_buildings_batch(locations)
+            else:
+                buildings = [self.matcher.find_matches(location)['buildings'] for location in locations]
+            for result, matched in zip(results, buildings):
+                result['buildings'] = matched
+
+        # 3. 셀 인덱스 매칭
+        if self.config.processor.cell_search:
+            for result, cells in zip(results, self.matcher.match_cells_batch(locations)):
+                result['lcellids'] = cells
+        return results
+
+    def close(self):
+        self.db.close()
+
+class _Request:
+    """대기 중인 조회 요청 1건 (처리 스레드가 result/error를 채우고 done을 알림)"""
+    __slots__ = ('points', 'done', 'result', 'error')
+
+    def __init__(self, points: Sequence[Point]):
+        self.points = points
+        self.done = threading.Event()
+        self.result: Optional[List[Dict[str, Any]]] = None
+        self.error: Optional[BaseException] = None
+
+class MicroBatcher:
+    """동시에 들어온 요청을 짧은 창 동안 모아 조회 함수 1회 호출로 처리
+
+    - 첫 요청이 도착하면 최대 window초 동안, 위치 수가 max_batch에 이를 때까지 뒤이은 요청을 모음
+    - 조회는 처리 스레드 1개에서만 실행 (DB 연결/인덱스를 요청 스레드 간에 공유하지 않음)
+    """
+
+    def __init__(self, handler: Callable[[List[Point]], List[Dict[str, Any]]],
+                 window: float = 0.002, max_batch: int = 256):
+        if max_batch <= 0:
+            raise ValueError(f"잘못된 최대 묶음 크기: {max_batch}")
+        self.handler = handler
+        self.window = window
+        self.max_batch = max_batch
+        self.requests: 'queue.Queue[Optional[_Request]]' = queue.Queue()
+        self.batch_points = Histogram(ROW_BOUNDS)  # 조회 1회당 위치 수
+        self.batch_requests = Histogram(ROW_BOUNDS)  # 조회 1회당 요청 수
+        self.lookup_seconds = Histogram(LATENCY_BOUNDS)  # 조회 1회 처리 시간
+        self._thread = threading.Thread(target=self._run, name='lookup-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, points: Sequence[Point], timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """요청 스레드: 묶음 처리 결과를 기다려 반환 (timeout 초과 시 TimeoutError)"""
+        request = _Request(points)
+        self.requests.put(request)
+        if not request.done.wait(timeout):
+            raise TimeoutError(f"조회가 {timeout}초 안에 끝나지 않았습니다")
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _collect(self, first: _Request) -> Tuple[List[_Request], bool]:
+        """첫 요청 뒤로 창이 끝나거나 위치 수가 찰 때까지 요청을 모음 (종료 신호를 받으면 stop=True)"""
+        batch = [first]
+        size = len(first.points)
+        deadline = time.monotonic() + self.window
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                request = self.requests.get(timeout=remaining) if remaining > 0 else self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                return batch, True
+            batch.append(request)
+            size += len(request.points)
+        return batch, False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            first = self.requests.get()
+            if first is None:
+                break
+            batch, stop = self._collect(first)
+            points = [point for request in batch for point in request.points]
+            start = time.perf_counter()
+            try:
+                results = self.handler(points)
+            except Exception as e:
+                for request in batch:
+                    request.error = e
+                    request.done.set()
+                continue
+            self.lookup_seconds.observe(time.perf_counter() - start)
+            self.batch_points.observe(len(points))
+            self.batch_requests.observe(len(batch))
+
+            # 요청별로 결과를 잘라 전달
+            offset = 0
+            for request in batch:
+                request.result = results[offset:offset + len(request.points)]
+                offset += len(request.points)
+                request.done.set()
+
+    def close(self):
+        """처리 중인 묶음을 마치고 처리 스레드 종료"""
+        self.requests.put(None)
+        self._thread.join()
+
+class LookupService:
+    """LookupEngine + MicroBatcher + 요청 지연 시간 집계 (HTTP 핸들러가 공유)"""
+
+    def __init__(self, engine: LookupEngine, window: float, max_batch: int, timeout: float = 30.0):
+        self.engine = engine
+        self.batcher = MicroBatcher(engine.lookup, window, max_batch)
+        self.timeout = timeout
+        self.latency = Histogram(LATENCY_BOUNDS)  # 요청 1건 전체 지연 시간 (대기 + 조회)
+        self.counters = {'requests': 0, 'points': 0, 'errors': 0}
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+
+    def lookup(self, points: Sequence[Point]) -> List[Dict[str, Any]]:
+        start = time.perf_counter()
+        try:
+            results = self.batcher.submit(points, self.timeout)
+        except Exception:
+            with self._lock:
+                self.counters['errors'] += 1
+            raise
+        with self._lock:
+            self.latency.observe(time.perf_counter() - start)
+            self.counters['requests'] += 1
+            self.counters['points'] += len(points)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """/stats 응답 (지연 시간은 초 단위 count/sum/min/max/mean/p50/p95/p99)"""
+        with self._lock:
+            return {
+                'uptime_seconds': time.time() - self.started_at,
+                'index_load_seconds': self.engine.load_time,
+                'counters': dict(self.counters),
+                'request_seconds': self.latency.to_dict(),
+                'lookup_seconds': self.batcher.lookup_seconds.to_dict(),
+                'points_per_lookup': self.batcher.batch_points.to_dict(),
+                'requests_per_lookup': self.batcher.batch_requests.to_dict()
+            }
+
+    def prometheus(self, prefix: str = 'data_processor_service') -> str:
+        """/metrics 응답 (Prometheus 텍스트 형식)"""
+        with self._lock:
+            lines = [
+                f"# HELP {prefix}_request_seconds Lookup request latency including micro-batch wait.",
+                f"# TYPE {prefix}_request_seconds histogram"
+            ]
+            lines.extend(prometheus_histogram(f"{prefix}_request_seconds", '', self.latency, 4))
+            lines.append(f"# TYPE {prefix}_request_seconds_quantile gauge")
+            for q in (0.5, 0.95, 0.99):
+                value = self.latency.quantile(q)
+                if value is not None:
+                    lines.append(f'{prefix}_request_seconds_quantile{{quantile="{q}"}} {value:.9g}')
+            lines.append(f"# HELP {prefix}_lookup_seconds Time of one vectorized lookup over a micro-batch.")
+            lines.append(f"# TYPE {prefix}_lookup_seconds histogram")
+            lines.extend(prometheus_histogram(f"{prefix}_lookup_seconds", '', self.batcher.lookup_seconds, 4))
+            lines.append(f"# HELP {prefix}_points_per_lookup Points per micro-batch lookup.")
+            lines.append(f"# TYPE {prefix}_points_per_lookup histogram")
+            lines.extend(prometheus_histogram(f"{prefix}_points_per_lookup", '', self.batcher.batch_points, 1))
+            for key, value in self.counters.items():
+                lines.append(f"# TYPE {prefix}_{key}_total counter")
+                lines.append(f"{prefix}_{key}_total {value}")
+        return '\n'.join(lines) + '\n'
+
+    def close(self):
+        self.batcher.close()
+        self.engine.close()
+
+def parse_points(body: Any) -> Tuple[List[Point], bool]:
+    """요청 JSON -> (위치 목록, 단일 위치 여부)
+
+    {"lat": .., "lon": ..} 또는 {"points": [[lat, lon], ...] | [{"lat": .., "lon": ..}, ...]}
+    """
+    if isinstance(body, dict) and 'points' not in body:
+        return [_point(body)], True
+    items = body['points'] if isinstance(body, dict) else body
+    if not isinstance(items, list):
+        raise ValueError("points는 목록이어야 합니다")
+    return [_point(item) for item in items], False
+
+def _point(item: Any) -> Point:
+    if isinstance(item, dict):
+        lat, lon = item.get('lat', item.get('latitude')), item.get('lon', item.get('longitude'))
+    elif isinstance(item, (list, tuple)) and len(item) == 2:
+        lat, lon = item
+    else:
+        raise ValueError(f"잘못된 위치: {item!r}")
+    if lat is None or lon is None:
+        raise ValueError(f"위치에 lat/lon이 없습니다: {item!r}")
+    lat, lon = float(lat), float(lon)
+    if not (np.isfinite(lat) and np.isfinite(lon)):
+        raise ValueError(f"잘못된 좌표: {lat}, {lon}")
+    return lat, lon
+
+class LookupHandler(BaseHTTPRequestHandler):
+    """GET /lookup?lat=..&lon=.., POST /lookup (JSON), GET /stats, GET /metrics, GET /health"""
+    server_version = 'data-processor-lookup/1.0'
+    protocol_version = 'HTTP/1.1'  # keep-alive (클라이언트가 연결 재사용)
+
+    @property
+    def service(self) -> LookupService:
+        return self.server.service
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == '/lookup':
+            query = parse_qs(url.query)
+            self._lookup({'lat': query.get('lat', [None])[0], 'lon': query.get('lon', [None])[0]})
+        elif url.path == '/stats':
+            self._send_json(200, self.service.stats())
+        elif url.path == '/metrics':
+            self._send(200, self.service.prometheus().encode('utf-8'), 'text/plain; version=0.0.4')
+        elif url.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        else:
+            self._send_json(404, {'error': f"알 수 없는 경로: {url.path}"})
+
+    def do_POST(self):
+        if urlsplit(self.path).path != '/lookup':
+            self._send_json(404, {'error': f"알 수 없는 경로: {self.path}"})
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b'null')
+        except ValueError as e:
+            self._send_json(400, {'error': f"잘못된 JSON: {e}"})
+            return
+        self._lookup(body)
+
+    def _lookup(self, body: Any):
+        try:
+            points, single = parse_points(body)
+        except (ValueError, TypeError, KeyError) as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        try:
+            results = self.service.lookup(points)
+        except TimeoutError as e:
+            self._send_json(503, {'error': str(e)})
+            return
+        except Exception as e:
+            self._send_json(500, {'error': f"{type(e).__name__}: {e}"})
+            return
+        self._send_json(200, results[0] if single else {'results': results})
+
+    def _send_json(self, status: int, data: Any):
+        self._send(status, json.dumps(data, ensure_ascii=False, default=float_repr).encode('utf-8'),
+                   'application/json; charset=utf-8')
+
+    def _send(self, status: int, payload: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args):
+        # 요청별 접근 로그는 출력하지 않음 (지연 시간은 /stats, /metrics로 확인)
+        pass
+
+class LookupHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], service: LookupService):
+        super().__init__(address, LookupHandler)
+        self.service = service
+
+class UnixLookupHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, service: LookupService):
+        if os.path.exists(path):
+            os.remove(path)
+        super().__init__(path, LookupHandler)
+        self.service = service
+
+    def get_request(self):
+        # BaseHTTPRequestHandler가 client_address[0]을 읽으므로 주소를 튜플로 맞춤
+        request, _ = super().get_request()
+        return request, ('unix', 0)
+
+def create_server(service: LookupService, host: str = '', port: int = 0,
+                  unix_socket: str = '') -> socketserver.BaseServer:
+    """unix_socket이 있으면 Unix 소켓, 없으면 host:port TCP HTTP 서버 생성"""
+    if unix_socket:
+        return UnixLookupHTTPServer(unix_socket, service)
+    return LookupHTTPServer((host, port), service)
+
+def main():
+    parser = argparse.ArgumentParser(description='인덱스를 상주시킨 위경도 -> 그리드 셀/건물 조회 서비스')
+    parser.add_argument('--config', type=str, required=True, help='설정 파일 경로')
+    parser.add_argument('--host', type=str, help='수신 주소 (기본값: 설정 파일의 service_host)')
+    parser.add_argument('--port', type=int, help='수신 포트 (기본값: 설정 파일의 service_port, 0: 임의 포트)')
+    parser.add_argument('--unix-socket', type=str, help='TCP 대신 사용할 Unix 소켓 경로')
+    parser.add_argument('--batch-window-ms', type=float, help='요청을 모으는 최대 대기 시간 (ms)')
+    parser.add_argument('--max-batch', type=int, help='조회 1회당 최대 위치 수')
+    parser.add_argument('--snapshot', type=str, help='DB 대신 읽을 로컬 스냅샷 디렉토리')
+    args = parser.parse_args()
+
+    overrides = {}
+    if args.host is not None:
+        overrides['service_host'] = args.host
+    if args.port is not None:
+        overrides['service_port'] = args.port
+    if args.batch_window_ms is not None:
+        overrides['service_batch_window'] = args.batch_window_ms / 1000
+    if args.max_batch is not None:
+        overrides['service_max_batch'] = args.max_batch
+    if args.snapshot:
+        overrides['backend'] = 'snapshot'
+        overrides['snapshot_dir'] = args.snapshot
+    config = load_config(args.config, overrides)
+    processor = config.processor
+
+    # 1. 인덱스 적재 후 서버 시작
+    engine = LookupEngine(config)
+    service = LookupService(engine, processor.service_batch_window, processor.service_max_batch)
+    server = create_server(service, processor.service_host, processor.service_port, args.unix_socket or '')
+    address = args.unix_socket or 'http://%s:%d' % server.server_address[:2]
+    print(f"조회 서비스 시작: {address} (인덱스 적재 {engine.load_time:.2f}초, "
+          f"묶음 창 {processor.service_batch_window * 1000:.1f}ms, 최대 {processor.service_max_batch}개)", flush=True)
+
+    # 2. 종료 (Ctrl+C) 시 요청 지연 시간 요약 출력
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.unix_socket and os.path.exists(args.unix_socket):
+            os.remove(args.unix_socket)
+        stats = service.stats()
+        service.close()
+        latency = stats['request_seconds']
+        print(f"\n조회 서비스 종료: 요청 {stats['counters']['requests']}건, 위치 {stats['counters']['points']}개, "
+              f"오류 {stats['counters']['errors']}건")
+        if latency['count']:
+            print(f"요청 지연 p50/p95/p99: {latency['p50'] * 1000:.2f} / {latency['p95'] * 1000:.2f} / "
+                  f"{latency['p99'] * 1000:.2f}ms, 조회당 평균 위치 수 {stats['points_per_lookup']['mean']:.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,254 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, TextIO
+from .writer import RecordEncoder
+from .fingerprint import FingerprintVocabulary
+from .checkpoint import sync_file, truncate_to
+
+# 압축 방식별 파일 확장자
+COMPRESSION_EXTENSIONS = {'none': '', 'gzip': '.gz', 'zstd': '.zst'}
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd 압축에는 zstandard가 필요합니다: pip install zstandard")
+    return zstandard
+
+def manifest_path_for(output_path: str) -> str:
+    """출력 경로에 대응하는 매니페스트 경로"""
+    return f"{os.path.splitext(output_path)[0]}.manifest.json"
+
+def shard_paths(output_path: str, compression: str, index: int) -> List[str]:
+    """샤드 번호별 (원본, 학습 데이터) 파일 경로"""
+    base_name = os.path.splitext(output_path)[0]
+    ext = '.jsonl' + COMPRESSION_EXTENSIONS[compression]
+    return [f"{base_name}-{index:05d}{ext}", f"{base_name}_traindata-{index:05d}{ext}"]
+
+def open_shard(path: str) -> TextIO:
+    """샤드 파일을 텍스트 스트림으로 열기 (확장자로 gzip/zstd 판별)"""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    if path.endswith('.zst'):
+        reader = _zstd().ZstdDecompressor().stream_reader(open(path, 'rb'), read_across_frames=True, closefd=True)
+        return io.TextIOWrapper(reader, encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+class _ShardFile:
+    """샤드 파일 1개 (압축 바이트 기준 크기/체크섬 집계)"""
+
+    def __init__(self, path: str, offset: Optional[int] = None):
+        self.path = path
+        self._sha256 = hashlib.sha256()
+        self.bytes = 0
+        if offset is None:
+            self._f = open(path, 'wb')
+            return
+
+        # 이어쓰기: offset까지 자르고 남은 내용으로 체크섬 재계산
+        self._f = truncate_to(path, offset)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                self._sha256.update(chunk)
+        self.bytes = offset
+
+    def flush(self) -> int:
+        """디스크까지 기록하고 현재 크기 반환"""
+        sync_file(self._f)
+        return self.bytes
+
+    def write(self, data: bytes):
+        self._f.write(data)
+        self._sha256.update(data)
+        self.bytes += len(data)
+
+    def close(self) -> Dict[str, Any]:
+        # 닫힌 샤드는 체크포인트/매니페스트에 크기와 체크섬이 기록되므로 디스크까지 기록
+        sync_file(self._f)
+        self._f.close()
+        return {
+            'path': os.path.basename(self.path),
+            'bytes': self.bytes,
+            'sha256': self._sha256.hexdigest()
+        }
+
+class ShardedJsonlWriter:
+    """원본/학습 데이터 JSONL을 압축 샤드로 나눠 저장하고 매니페스트 기록
+
+    - 파일명: result-00000.jsonl.zst, result_traindata-00000.jsonl.zst, ...
+    - 배치마다 독립된 gzip member / zstd frame으로 압축하므로 샤드는 배치 경계에서
+      잘라도 유효한 스트림이다.
+    - 샤드 교체는 배치 경계에서 shard_max_records / shard_max_bytes 기준으로 한다.
+    - 매니페스트(result.manifest.json)에 샤드별 ID 범위, 레코드 수, 바이트 수, sha256을 기록한다.
+    - append=True이면 기존 매니페스트의 샤드 뒤에 새 샤드를 이어 붙인다 (증분 처리).
+    """
+
+    def __init__(self, output_path: str, compression: str = 'zstd', max_records: int = 0,
+                 max_bytes: int = 0, compression_level: Optional[int] = None, append: bool = False,
+                 resume_state: Optional[Dict[str, Any]] = None,
+                 vocabulary: Optional[FingerprintVocabulary] = None):
+        if compression not in COMPRESSION_EXTENSIONS:
+            raise ValueError(f"지원하지 않는 압축 방식: {compression}")
+        self.output_path = output_path
+        self.compression = compression
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.manifest_path = manifest_path_for(output_path)
+        self.encoder = RecordEncoder(vocabulary)
+        self.records = 0
+        self.encode_time = 0.0  # 인코딩 누적 시간 (초, 압축 제외)
+        self.bytes_written = 0  # 이번 실행에서 기록한 압축 바이트 수
+        self.shards: List[Dict[str, Any]] = []
+        self._current: Optional[Dict[str, Any]] = None
+
+        if compression == 'zstd':
+            self._compress = _zstd().ZstdCompressor(level=compression_level or 3).compress
+        elif compression == 'gzip':
+            level = compression_level or 6
+            self._compress = lambda data: gzip.compress(data, compresslevel=level)
+        else:
+            self._compress = lambda data: data
+
+        if resume_state:
+            self._restore(resume_state)
+        elif append and os.path.exists(self.manifest_path):
+            self.shards = read_manifest(self.manifest_path, resolve_paths=False)['shards']
+
+    def __enter__(self) -> 'ShardedJsonlWriter':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def paths(self) -> List[str]:
+        return [self.manifest_path]
+
+    def _open_shard(self, offsets: Optional[List[int]] = None):
+        index = len(self.shards)
+        result_path, train_path = shard_paths(self.output_path, self.compression, index)
+        offsets = offsets or [None, None]
+        self._current = {
+            'index': index,
+            'result': _ShardFile(result_path, offsets[0]),
+            'traindata': _ShardFile(train_path, offsets[1]),
+            'start_id': None,
+            'end_id': None,
+            'records': 0
+        }
+
+    def _restore(self, state: Dict[str, Any]):
+        """체크포인트 상태로 복원 (열려 있던 샤드는 체크포인트 크기로 잘라 이어쓰기)"""
+        self.shards = state['shards']
+        self.records = state['records']
+        current = state['current']
+        if current is not None:
+            self._open_shard(current['offsets'])
+            for key in ('start_id', 'end_id', 'records'):
+                self._current[key] = current[key]
+
+    def checkpoint(self) -> Dict[str, Any]:
+        """버퍼를 비우고 이어쓰기에 필요한 샤드 상태 반환"""
+        current = None
+        if self._current is not None:
+            shard = self._current
+            current = {
+                'start_id': shard['start_id'],
+                'end_id': shard['end_id'],
+                'records': shard['records'],
+                'offsets': [shard['result'].flush(), shard['traindata'].flush()]
+            }
+        return {'shards': self.shards, 'current': current, 'records': self.records}
+
+    def _close_shard(self):
+        shard = self._current
+        if shard is None:
+            return
+        self._current = None
+        self.shards.append({
+            'index': shard['index'],
+            'start_id': shard['start_id'],
+            'end_id': shard['end_id'],
+            'records': shard['records'],
+            'files': {
+                'result': shard['result'].close(),
+                'traindata': shard['traindata'].close()
+            }
+        })
+
+    def write_batch(self, locations: List[Dict[str, Any]], buildings: Optional[List[List[Dict]]] = None):
+        """배치 1개를 현재 샤드에 기록 (한도를 넘으면 다음 샤드로 교체)"""
+        if not locations:
+            return
+        shard = self._current
+        if shard is not None and self.max_records and shard['records'] + len(locations) > self.max_records:
+            self._close_shard()
+        if self._current is None:
+            self._open_shard()
+        shard = self._current
+
+        encode_start = time.time()
+        out_data, train_data = (text.encode('utf-8') for text in self.encoder.encode_batch(locations, buildings))
+        self.encode_time += time.time() - encode_start
+        out_data, train_data = self._compress(out_data), self._compress(train_data)
+        shard['result'].write(out_data)
+        shard['traindata'].write(train_data)
+        self.bytes_written += len(out_data) + len(train_data)
+        if shard['start_id'] is None:
+            shard['start_id'] = locations[0]['id']
+        shard['end_id'] = locations[-1]['id']
+        shard['records'] += len(locations)
+        self.records += len(locations)
+
+        if self.max_bytes and shard['result'].bytes + shard['traindata'].bytes >= self.max_bytes:
+            self._close_shard()
+
+    def close(self):
+        self._close_shard()
+        write_manifest(self.manifest_path, self.compression, self.shards)
+
+
+def write_manifest(path: str, compression: str, shards: List[Dict[str, Any]]):
+    """샤드 목록 매니페스트 저장"""
+    manifest = {
+        'format': 'jsonl',
+        'compression': compression,
+        'total_records': sum(shard['records'] for shard in shards),
+        'shards': shards
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+def read_manifest(path: str, resolve_paths: bool = True) -> Dict[str, Any]:
+    """매니페스트 로드 (샤드 파일 경로는 매니페스트 기준 절대 경로로 변환)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if not resolve_paths:
+        return manifest
+    base_dir = os.path.dirname(os.path.abspath(path))
+    for shard in manifest['shards']:
+        for info in shard['files'].values():
+            info['abspath'] = os.path.join(base_dir, info['path'])
+    return manifest
+
+def merge_manifests(part_outputs: List[str], output_path: str, compression: str) -> str:
+    """파트별 샤드를 순서대로 전체 번호로 이름을 바꾸고 매니페스트를 합침"""
+    shards = []
+    for part_output in part_outputs:
+        part_manifest = manifest_path_for(part_output)
+        for shard in read_manifest(part_manifest)['shards']:
+            index = len(shards)
+            for kind, target in zip(('result', 'traindata'), shard_paths(output_path, compression, index)):
+                info = shard['files'][kind]
+                os.replace(info.pop('abspath'), target)
+                info['path'] = os.path.basename(target)
+            shard['index'] = index
+            shards.append(shard)
+        os.remove(part_manifest)
+    manifest_path = manifest_path_for(output_path)
+    write_manifest(manifest_path, compression, shards)
+    return manifest_path
@@ -0,0 +1,217 @@
+import argparse
+import bisect
+import hashlib
+import itertools
+import json
+import math
+import os
+import random
+import shutil
+import tempfile
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+from .shards import manifest_path_for, open_shard, read_manifest
+
+# 버킷 파일 동시 오픈 수 상한 (분할별)
+MAX_BUCKETS = 256
+# 압축 샤드의 레코드당 비압축 크기를 잴 표본 레코드 수
+SAMPLE_RECORDS = 1000
+
+def parse_splits(text: str) -> Dict[str, float]:
+    """'train=0.8,val=0.1,test=0.1' 형식을 분할별 비율로 변환 (합이 1이 되도록 정규화)"""
+    splits = {}
+    for item in text.split(','):
+        name, _, ratio = item.partition('=')
+        splits[name.strip()] = float(ratio)
+    total = sum(splits.values())
+    if not splits or total <= 0 or any(ratio < 0 for ratio in splits.values()):
+        raise ValueError(f"잘못된 분할 비율: {text}")
+    return {name: ratio / total for name, ratio in splits.items()}
+
+def iter_record_pairs(output_path: str) -> Iterator[Tuple[str, str]]:
+    """생성된 데이터셋의 (원본 줄, 학습 데이터 줄) 쌍을 ID 순서로 읽기 (샤드 출력은 매니페스트 기준)"""
+    manifest_path = manifest_path_for(output_path)
+    if os.path.exists(manifest_path):
+        sources = [(shard['files']['result']['abspath'], shard['files']['traindata']['abspath'])
+                   for shard in read_manifest(manifest_path)['shards']]
+    else:
+        base_name = os.path.splitext(output_path)[0]
+        sources = [(output_path, f"{base_name}_traindata.jsonl")]
+    for result_path, train_path in sources:
+        with open_shard(result_path) as f_out, open_shard(train_path) as f_train:
+            for out_line, train_line in zip(f_out, f_train):
+                yield out_line, train_line
+
+def input_bytes(output_path: str) -> int:
+    """입력의 비압축 크기 합계 (버킷 수 추정용, 압축 샤드는 앞쪽 표본의 레코드당 크기 x 레코드 수)"""
+    manifest_path = manifest_path_for(output_path)
+    if os.path.exists(manifest_path):
+        manifest = read_manifest(manifest_path)
+        if manifest['compression'] == 'none':
+            return sum(info['bytes'] for shard in manifest['shards'] for info in shard['files'].values())
+        pairs = iter_record_pairs(output_path)
+        try:
+            sample = list(itertools.islice(pairs, SAMPLE_RECORDS))
+        finally:
+            pairs.close()
+        if not sample:
+            return 0
+        sample_bytes = sum(len(out_line.encode('utf-8')) + len(train_line.encode('utf-8')) for out_line, train_line in sample)
+        return math.ceil(sample_bytes / len(sample) * manifest['total_records'])
+    base_name = os.path.splitext(output_path)[0]
+    return sum(os.path.getsize(path) for path in (output_path, f"{base_name}_traindata.jsonl"))
+
+def grid_cell_of(train_line: str) -> Tuple[int, int]:
+    """학습 데이터 줄의 그리드 셀 (prompt/completion 형식과 tokenized 형식 모두 지원)"""
+    record = json.loads(train_line)
+    if 'completion' in record:
+        x_part, y_part = record['completion'].split(',')
+        return int(x_part.split('=')[1]), int(y_part.split('=')[1])
+    return record['x_id'], record['y_id']
+
+class GridSplitter:
+    """그리드 셀(block_size x block_size 셀 묶음) 해시로 분할을 정하는 결정적 분할기
+
+    같은 셀의 레코드는 항상 같은 분할에 들어가므로 분할 간 셀이 겹치지 않는다.
+    """
+
+    def __init__(self, splits: Dict[str, float], seed: int = 0, block_size: int = 1):
+        self.names = list(splits)
+        self.bounds = []
+        total = 0.0
+        for ratio in splits.values():
+            total += ratio
+            self.bounds.append(total)
+        self.bounds[-1] = 1.0
+        self.block_size = max(1, block_size)
+        self.key = seed.to_bytes(8, 'little', signed=True)
+
+    def split_of(self, x_id: int, y_id: int) -> str:
+        block = f"{x_id // self.block_size},{y_id // self.block_size}".encode('ascii')
+        value = int.from_bytes(hashlib.blake2b(block, digest_size=8, key=self.key).digest(), 'little') / 2 ** 64
+        return self.names[min(bisect.bisect_right(self.bounds, value), len(self.names) - 1)]
+
+def _scatter(pairs: Iterator[Tuple[str, str]], paths: List[str], rng: random.Random) -> int:
+    """레코드 쌍을 버킷 파일에 무작위로 분산 (쌍은 연속된 두 줄로 저장)"""
+    files = [open(path, 'w', encoding='utf-8', newline='', buffering=1024 * 1024) for path in paths]
+    count = 0
+    try:
+        for out_line, train_line in pairs:
+            files[rng.randrange(len(files))].write(out_line + train_line)
+            count += 1
+    finally:
+        for f in files:
+            f.close()
+    return count
+
+def _read_pairs(path: str) -> Iterator[Tuple[str, str]]:
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for out_line in f:
+            yield out_line, next(f)
+
+def _shuffle_bucket(path: str, f_out, f_train, rng: random.Random, memory_bytes: int):
+    """버킷 1개를 메모리에서 섞어 기록 (메모리 한도를 넘으면 하위 버킷으로 다시 분산)"""
+    size = os.path.getsize(path)
+    if size > memory_bytes:
+        buckets = min(MAX_BUCKETS, max(2, math.ceil(size / memory_bytes) * 2))
+        sub_paths = [f"{path}.{i}" for i in range(buckets)]
+        count = _scatter(_read_pairs(path), sub_paths, rng)
+        # 쌍이 1개이거나 분산해도 가장 큰 하위 버킷이 줄지 않으면 더 나눌 수 없으므로 한도를 넘더라도 메모리에서 섞음
+        if count > 1 and max(os.path.getsize(sub_path) for sub_path in sub_paths) < size:
+            os.remove(path)
+            for sub_path in sub_paths:
+                _shuffle_bucket(sub_path, f_out, f_train, rng, memory_bytes)
+            return
+        for sub_path in sub_paths:
+            os.remove(sub_path)
+    pairs = list(_read_pairs(path))
+    os.remove(path)
+    rng.shuffle(pairs)
+    for out_line, train_line in pairs:
+        f_out.write(out_line)
+        f_train.write(train_line)
+
+def split_output_paths(output_path: str, split: str) -> List[str]:
+    """분할별 (원본, 학습 데이터) 출력 경로"""
+    base_name = os.path.splitext(output_path)[0]
+    return [f"{base_name}_{split}.jsonl", f"{base_name}_{split}_traindata.jsonl"]
+
+def shuffle_split(input_path: str, output_path: str, splits: Dict[str, float], seed: int = 0,
+                  block_size: int = 1, memory_mb: int = 256, buckets: Optional[int] = None) -> Dict[str, Dict]:
+    """생성된 JSONL 데이터셋을 그리드 셀 기준으로 분할하고 분할별로 외부 메모리 셔플
+
+    1. 레코드를 읽으며 셀 해시로 분할을 정하고, 분할 안에서는 무작위 버킷 임시 파일에 분산
+    2. 버킷을 하나씩 메모리에서 섞어 분할 출력에 이어 씀 (버킷 크기 <= memory_mb)
+    원본/학습 데이터 줄은 쌍으로 함께 섞이므로 두 파일의 줄 순서가 계속 일치한다.
+    """
+    memory_bytes = memory_mb * 1024 * 1024
+    splitter = GridSplitter(splits, seed, block_size)
+    rng = random.Random(seed)
+    if buckets is None:
+        buckets = math.ceil(input_bytes(input_path) / memory_bytes)
+    buckets = min(MAX_BUCKETS, max(1, buckets))
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix='shuffle-', dir=output_dir or None)
+    try:
+        # 1. 분할 + 버킷 분산
+        bucket_paths = {name: [os.path.join(tmp_dir, f"{name}-{i:05d}") for i in range(buckets)]
+                        for name in splitter.names}
+        files = {name: [open(path, 'w', encoding='utf-8', newline='', buffering=1024 * 1024) for path in paths]
+                 for name, paths in bucket_paths.items()}
+        counts = {name: 0 for name in splitter.names}
+        try:
+            for out_line, train_line in iter_record_pairs(input_path):
+                name = splitter.split_of(*grid_cell_of(train_line))
+                files[name][rng.randrange(buckets)].write(out_line + train_line)
+                counts[name] += 1
+        finally:
+            for split_files in files.values():
+                for f in split_files:
+                    f.close()
+
+        # 2. 버킷별 셔플
+        result = {}
+        for name in splitter.names:
+            paths = split_output_paths(output_path, name)
+            with open(paths[0], 'w', encoding='utf-8', newline='', buffering=1024 * 1024) as f_out, \
+                    open(paths[1], 'w', encoding='utf-8', newline='', buffering=1024 * 1024) as f_train:
+                for path in bucket_paths[name]:
+                    _shuffle_bucket(path, f_out, f_train, rng, memory_bytes)
+            result[name] = {'records': counts[name], 'paths': paths}
+        return result
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='생성된 데이터셋을 그리드 셀 기준 분할 + 외부 메모리 셔플')
+    parser.add_argument('--input', type=str, required=True, help='처리 결과 출력 경로 (result.jsonl, 샤드 출력은 같은 --output 값)')
+    parser.add_argument('--output', type=str, required=True, help='분할 출력 기준 경로 (result.jsonl -> result_train.jsonl, ...)')
+    parser.add_argument('--splits', type=str, default='train=0.8,val=0.1,test=0.1', help='분할 이름=비율 목록')
+    parser.add_argument('--seed', type=int, default=0, help='분할 해시/셔플 시드')
+    parser.add_argument('--block-size', type=int, default=1, help='같은 분할로 묶을 셀 블록 크기 (셀 수, 인접 셀 누수 방지)')
+    parser.add_argument('--memory-mb', type=int, default=256, help='버킷 1개를 섞을 때 사용할 최대 메모리 (MB, 비압축 기준)')
+    parser.add_argument('--buckets', type=int, help='분할별 버킷 수 (기본값: 비압축 입력 크기 / memory-mb)')
+    args = parser.parse_args()
+
+    start = time.time()
+    splits = parse_splits(args.splits)
+    result = shuffle_split(args.input, args.output, splits, args.seed, args.block_size, args.memory_mb, args.buckets)
+
+    # 재현용 분할 정보
+    summary_path = f"{os.path.splitext(args.output)[0]}.splits.json"
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump({'input': args.input, 'seed': args.seed, 'block_size': args.block_size,
+                   'splits': splits, 'results': result}, f, ensure_ascii=False, indent=2)
+
+    total = sum(info['records'] for info in result.values())
+    print(f"\n셔플/분할 완료 ({time.time() - start:.2f}초, {total}건):")
+    for name, info in result.items():
+        ratio = info['records'] / total * 100 if total else 0
+        print(f"- {name}: {info['records']}건 ({ratio:.1f}%) -> {info['paths'][0]}, {info['paths'][1]}")
+    print(f"- 분할 정보: {summary_path}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,387 @@
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+import numpy as np
+from .cell_matcher import GridLabeler
+from .spatial_index import IntervalIndex
+
+SNAPSHOT_VERSION = 2
+META_FILE = 'meta.json'
+
+# 테이블별 저장 컬럼 (collectxy는 DBConnector 위치 딕셔너리 키, 나머지는 조회 결과 컬럼 별칭)
+COLLECTXY_KEYS = ('id', 'latitude', 'longitude', 'lcellid', 'wmac', 'wrssi', 'ipcikey')
+BUILDING_KEYS = ('uid', 'height', 'hstare', 'lstare', 'min_x', 'max_x', 'min_y', 'max_y')
+CELLINDEX_KEYS = ('lcellids', 'min_x', 'max_x', 'min_y', 'max_y')
+# 값이 없는 컬럼(빈 테이블, 전부 NULL)의 저장 형식 (나머지는 'str')
+DEFAULT_KINDS = {
+    'id': 'int64', 'latitude': 'float64', 'longitude': 'float64',
+    'min_x': 'float64', 'max_x': 'float64', 'min_y': 'float64', 'max_y': 'float64'
+}
+
+Rows = Union[slice, np.ndarray]
+
+# 저장 형식 승격 순서 (int64 -> float64 -> str)
+KIND_RANK = {'int64': 0, 'float64': 1, 'str': 2}
+
+def _column_kind(values: Sequence[Any]) -> Optional[str]:
+    """청크 값으로 저장 형식 결정 (int64, float64, str / 모두 NULL이면 None)"""
+    kinds = set()
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, (str, bytes)):
+            return 'str'
+        kinds.add('int64' if isinstance(value, int) else 'float64')
+    if not kinds:
+        return None
+    return 'float64' if 'float64' in kinds else 'int64'
+
+def _memmap(path: str, dtype: str, length: int) -> np.ndarray:
+    """읽기 전용 메모리 맵 배열 (빈 파일은 mmap할 수 없으므로 빈 배열)"""
+    if length == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=(length,))
+
+class _ColumnWriter:
+    """컬럼 1개를 청크 단위로 파일에 추가 (숫자: 고정폭 배열, 문자열: UTF-8 바이트 + 오프셋)
+
+    저장 형식은 전체 청크에 걸쳐 정한다. 앞 청크가 모두 NULL이면 값이 나올 때까지 미루고,
+    뒤 청크에 더 넓은 형식(정수 컬럼의 실수, 숫자 컬럼의 문자열)이 나오면 기록한 값을 승격해 다시 쓴다.
+    """
+
+    def __init__(self, base_path: str, default_kind: str = 'str'):
+        self.base_path = base_path
+        self.default_kind = default_kind
+        self.kind: Optional[str] = None
+        self.rows = 0
+        self._files: Dict[str, Any] = {'null': open(f"{base_path}.null", 'wb')}
+        self._end = 0
+
+    def _open(self, kind: str, placeholders: int = 0):
+        """형식별 값 파일 생성 (placeholders: 앞에 채울 NULL 자리값 행 수)"""
+        self.kind = kind
+        if kind == 'str':
+            self._files['data'] = open(f"{self.base_path}.data", 'wb')
+            self._files['offsets'] = open(f"{self.base_path}.offsets", 'wb')
+            self._files['offsets'].write(np.zeros(placeholders + 1, dtype=np.int64).tobytes())
+            self._end = 0
+        else:
+            self._files['values'] = open(f"{self.base_path}.bin", 'wb')
+            self._files['values'].write(np.zeros(placeholders, dtype=kind).tobytes())
+
+    def _promote(self, kind: str):
+        """기록한 숫자 값을 더 넓은 형식으로 다시 씀"""
+        self._files.pop('values').close()
+        bin_path = f"{self.base_path}.bin"
+        values = np.fromfile(bin_path, dtype=self.kind)
+        self._files['null'].flush()
+        nulls = np.fromfile(f"{self.base_path}.null", dtype=np.uint8).astype(bool)
+        os.remove(bin_path)
+        self._open(kind)
+        if kind == 'str':
+            self._write_values([None if null else str(value) for value, null in zip(values.tolist(), nulls)])
+        else:
+            self._files['values'].write(values.astype(kind).tobytes())
+
+    def append(self, values: Sequence[Any]):
+        kind = _column_kind(values)
+        if kind is not None:
+            if self.kind is None:
+                self._open(kind, self.rows)
+            elif KIND_RANK[kind] > KIND_RANK[self.kind]:
+                self._promote(kind)
+        nulls = np.fromiter((value is None for value in values), dtype=np.uint8, count=len(values))
+        self._files['null'].write(nulls.tobytes())
+        # 아직 형식을 모르면(앞 청크가 모두 NULL) NULL 표시만 기록
+        if self.kind is not None:
+            self._write_values(values)
+        self.rows += len(values)
+
+    def _write_values(self, values: Sequence[Any]):
+        if self.kind == 'str':
+            encoded = [b'' if value is None else str(value).encode('utf-8') for value in values]
+            ends = self._end + np.cumsum([len(b) for b in encoded], dtype=np.int64)
+            self._files['data'].write(b''.join(encoded))
+            self._files['offsets'].write(ends.tobytes())
+            if len(ends):
+                self._end = int(ends[-1])
+        else:
+            array = np.array([0 if value is None else value for value in values], dtype=np.float64
+                             if self.kind == 'float64' else np.int64)
+            self._files['values'].write(array.tobytes())
+
+    def close(self) -> Dict[str, Any]:
+        if self.kind is None:
+            self._open(self.default_kind, self.rows)
+        for f in self._files.values():
+            f.close()
+        return {'kind': self.kind}
+
+class _Column:
+    """메모리 맵 컬럼 1개 (행 번호 slice/배열로 Python 값 목록 조회)"""
+
+    def __init__(self, base_path: str, kind: str, rows: int):
+        self.kind = kind
+        self.null = _memmap(f"{base_path}.null", 'uint8', rows)
+        if kind == 'str':
+            self.offsets = _memmap(f"{base_path}.offsets", 'int64', rows + 1)
+            self.data = _memmap(f"{base_path}.data", 'uint8', int(self.offsets[-1]) if rows else 0)
+        else:
+            self.values = _memmap(f"{base_path}.bin", kind, rows)
+
+    def get(self, rows: Rows) -> List[Any]:
+        if self.kind == 'str':
+            starts = self.offsets[:-1][rows]
+            ends = self.offsets[1:][rows]
+            if isinstance(rows, slice) and len(starts):
+                # 연속 구간은 바이트를 한 번에 읽어 나눔
+                base = int(starts[0])
+                blob = self.data[base:int(ends[-1])].tobytes()
+                values = [blob[s - base:e - base].decode('utf-8')
+                          for s, e in zip(starts.tolist(), ends.tolist())]
+            else:
+                values = [self.data[s:e].tobytes().decode('utf-8')
+                          for s, e in zip(starts.tolist(), ends.tolist())]
+        else:
+            values = self.values[rows].tolist()
+        nulls = self.null[rows]
+        if nulls.any():
+            for i in np.flatnonzero(nulls).tolist():
+                values[i] = None
+        return values
+
+def _write_table(snapshot_dir: str, table: str, keys: Sequence[str], chunks: Iterator[Sequence[tuple]]) -> Dict[str, Any]:
+    """튜플 청크 스트림을 컬럼 파일로 저장하고 테이블 메타데이터 반환"""
+    writers = [_ColumnWriter(os.path.join(snapshot_dir, f"{table}.{key}"), DEFAULT_KINDS.get(key, 'str'))
+               for key in keys]
+    rows = 0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        for writer, values in zip(writers, zip(*chunk)):
+            writer.append(values)
+        rows += len(chunk)
+    return {'rows': rows, 'columns': {key: writer.close() for key, writer in zip(keys, writers)}}
+
+def export_snapshot(db, snapshot_dir: str, chunk_size: int = 50000,
+                    polygon_column: Optional[str] = None) -> Dict[str, Any]:
+    """collectxy/building/cellidindex 테이블을 로컬 컬럼 스냅샷으로 내보내기
+
+    collectxy는 ID 순서로 keyset 조회하며, 그리드 셀은 저장하지 않고 읽을 때 원본 좌표 타입
+    (coordinate_type) 기준으로 다시 계산한다.
+    polygon_column을 지정하면 건물 폴리곤 WKT를 'polygon' 컬럼으로 함께 저장한다.
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    meta_path = os.path.join(snapshot_dir, META_FILE)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    tables = {}
+
+    # 1. collectxy (위치 딕셔너리 -> 튜플)
+    start = time.time()
+    min_id, max_id = db.get_min_collectxy_id(), db.get_max_collectxy_id()
+    batches = db.iter_collectxy_batches(min_id, max_id, chunk_size) if min_id is not None else iter(())
+    tables['collectxy'] = _write_table(snapshot_dir, 'collectxy', COLLECTXY_KEYS, (
+        [(loc['id'], loc['latitude'], loc['longitude'], loc['lcellid'], loc['wmac'], loc['wrssi'],
+          loc['ipcikey']) for loc in locations]
+        for locations in batches
+    ))
+    tables['collectxy']['coordinate_type'] = getattr(db, 'coordinate_type', None) or 'decimal'
+    print(f"collectxy: {tables['collectxy']['rows']}건 ({time.time() - start:.2f}초)")
+
+    # 2. building / cellidindex (bbox 튜플 스트림)
+    building_keys = BUILDING_KEYS + ('polygon',) if polygon_column else BUILDING_KEYS
+    for table, keys, chunks in (('building', building_keys, db.iter_building_bboxes(chunk_size, polygon_column)),
+                                ('cellidindex', CELLINDEX_KEYS, db.iter_cellindex_bboxes(chunk_size))):
+        start = time.time()
+        tables[table] = _write_table(snapshot_dir, table, keys, chunks)
+        print(f"{table}: {tables[table]['rows']}건 ({time.time() - start:.2f}초)")
+
+    # 3. 메타데이터는 마지막에 기록 (중단된 스냅샷은 열리지 않음)
+    meta = {
+        'version': SNAPSHOT_VERSION,
+        'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'tables': tables
+    }
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return meta
+
+class SnapshotConnector:
+    """로컬 스냅샷을 메모리 맵으로 읽는 DBConnector 대체 구현 (MySQL 불필요)
+
+    collectxy는 ID 정렬 배열에서 이진 탐색으로, building/cellidindex는 메모리 맵 bbox
+    컬럼 위에 첫 조회 때 만든 구간 인덱스(IntervalIndex)로 조회한다. 숫자 컬럼은 int64/float64로 저장되므로 DB의 DECIMAL 값은 float로 반환된다.
+    """
+
+    def __init__(self, snapshot_dir: str, grid_levels: Sequence[int] = (GridLabeler.DEFAULT_LEVEL,)):
+        meta_path = os.path.join(snapshot_dir, META_FILE)
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"스냅샷이 없습니다: {meta_path} (python -m data_processor.snapshot 으로 생성)")
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta['version'] != SNAPSHOT_VERSION:
+            raise ValueError(f"지원하지 않는 스냅샷 버전: {self.meta['version']}")
+        self.snapshot_dir = snapshot_dir
+        self.tables = {table: self._open_table(table) for table in self.meta['tables']}
+        self._bbox_indexes: Dict[str, IntervalIndex] = {}
+        self._ids = self.tables['collectxy']['id'].values
+        self.labeler = GridLabeler(grid_levels)
+        self.coordinate_type = self.meta['tables']['collectxy']['coordinate_type']
+
+    def _open_table(self, table: str) -> Dict[str, _Column]:
+        info = self.meta['tables'][table]
+        return {
+            key: _Column(os.path.join(self.snapshot_dir, f"{table}.{key}"), column['kind'], info['rows'])
+            for key, column in info['columns'].items()
+        }
+
+    def _rows(self, table: str, keys: Sequence[str], rows: Rows) -> List[Dict[str, Any]]:
+        columns = self.tables[table]
+        return [dict(zip(keys, values)) for values in zip(*(columns[key].get(rows) for key in keys))]
+
+    # collectxy
+
+    def _locations(self, lo: int, hi: int) -> List[Dict[str, Any]]:
+        """행 번호 [lo, hi) 구간을 위치 딕셔너리 목록으로 변환"""
+        rows = slice(lo, hi)
+        columns = self.tables['collectxy']
+        values = {key: columns[key].get(rows) for key in COLLECTXY_KEYS}
+        locations = [
+            {
+                'id': id_,
+                'latitude': lat,
+                'longitude': lon,
+                'lcellid': lcellid,
+                'wmac': wmac,
+                'wrssi': wrssi,
+                'ipcikey': ipcikey
+            }
+            for id_, lat, lon, lcellid, wmac, wrssi, ipcikey
+            in zip(*(values[key] for key in COLLECTXY_KEYS))
+        ]
+        self.labeler.assign(locations, self.coordinate_type == 'decimal')
+        return locations
+
+    def get_collectxy_batch(self, start_id: int, end_id: int) -> List[Dict[str, Any]]:
+        """[start_id, end_id] 구간 조회 (DBConnector와 같이 양 끝 포함)"""
+        lo = int(np.searchsorted(self._ids, start_id, side='left'))
+        hi = int(np.searchsorted(self._ids, end_id, side='right'))
+        return self._locations(lo, hi)
+
+    def get_collectxy_after(self, last_id: int, end_id: int, limit: int) -> List[Dict[str, Any]]:
+        """Keyset 페이지 조회: last_id 다음부터 end_id까지 최대 limit건"""
+        lo = int(np.searchsorted(self._ids, last_id, side='right'))
+        hi = int(np.searchsorted(self._ids, end_id, side='right'))
+        return self._locations(lo, min(hi, lo + limit))
+
+    def iter_collectxy_batches(self, start_id: int, end_id: int, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+        """[start_id, end_id] 범위를 batch_size건씩 스트리밍"""
+        lo = int(np.searchsorted(self._ids, start_id, side='left'))
+        hi = int(np.searchsorted(self._ids, end_id, side='right'))
+        for batch_start in range(lo, hi, batch_size):
+            yield self._locations(batch_start, min(batch_start + batch_size, hi))
+
+    def get_min_collectxy_id(self) -> Optional[int]:
+        return int(self._ids[0]) if len(self._ids) else None
+
+    def detect_coordinate_type(self) -> str:
+        """좌표 컬럼 타입 (내보낼 때 저장한 원본 타입)"""
+        return self.coordinate_type
+
+    def get_max_collectxy_id(self) -> Optional[int]:
+        return int(self._ids[-1]) if len(self._ids) else None
+
+    # building / cellidindex
+
+    def _bbox_index(self, table: str) -> IntervalIndex:
+        """테이블 bbox 컬럼(메모리 맵) 위의 구간 인덱스 (첫 조회 때 1회 생성)"""
+        index = self._bbox_indexes.get(table)
+        if index is None:
+            columns = self.tables[table]
+            index = IntervalIndex(*(columns[key].values for key in IntervalIndex.BOUND_KEYS), columns={})
+            self._bbox_indexes[table] = index
+        return index
+
+    def _bbox_rows(self, table: str, min_lon: float, max_lon: float, min_lat: float, max_lat: float) -> np.ndarray:
+        """영역과 겹치는 행 번호 (테이블 순서)"""
+        return self._bbox_index(table).query_bbox(min_lon, max_lon, min_lat, max_lat)
+
+    def get_building_count(self) -> int:
+        return self.meta['tables']['building']['rows']
+
+    def _building_keys(self, polygon_column: Optional[str]) -> Sequence[str]:
+        """조회할 building 컬럼 (폴리곤은 스냅샷에 저장된 경우에만, 컬럼명과 무관하게 'polygon')"""
+        if polygon_column:
+            if 'polygon' not in self.tables['building']:
+                raise ValueError("스냅샷에 건물 폴리곤이 없습니다 (building_polygon_column 설정 후 다시 내보내기)")
+            return BUILDING_KEYS + ('polygon',)
+        return BUILDING_KEYS
+
+    def get_building_candidates(self, lat: float, lon: float, margin: float,
+                                polygon_column: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Building 후보군 조회"""
+        return self.get_building_candidates_bbox(lon - margin, lon + margin, lat - margin, lat + margin,
+                                                 polygon_column=polygon_column)
+
+    def get_building_candidates_bbox(self, min_lon: float, max_lon: float, min_lat: float, max_lat: float,
+                                     limit: Optional[int] = None,
+                                     polygon_column: Optional[str] = None) -> List[Dict[str, Any]]:
+        """영역과 겹치는 Building 후보군 조회 (limit 지정 시 최대 limit건)"""
+        rows = self._bbox_rows('building', min_lon, max_lon, min_lat, max_lat)
+        if limit is not None:
+            rows = rows[:limit]
+        return self._rows('building', self._building_keys(polygon_column), rows)
+
+    def iter_building_bboxes(self, chunk_size: int = 50000,
+                             polygon_column: Optional[str] = None) -> Iterator[List[tuple]]:
+        """Building 전체 bbox를 (uid, height, hstare, lstare, minX, maxX, minY, maxY[, polygon]) 튜플 청크로 스트리밍"""
+        columns = self.tables['building']
+        keys = self._building_keys(polygon_column)
+        for start in range(0, self.get_building_count(), chunk_size):
+            rows = slice(start, start + chunk_size)
+            yield list(zip(*(columns[key].get(rows) for key in keys)))
+
+    def get_cellindex_candidates(self, lat: float, lon: float, margin: float) -> List[Dict[str, Any]]:
+        """Cellindex 후보군 조회"""
+        return self.get_cellindex_candidates_bbox(lon - margin, lon + margin, lat - margin, lat + margin)
+
+    def get_cellindex_candidates_bbox(self, min_lon: float, max_lon: float,
+                                      min_lat: float, max_lat: float) -> List[Dict[str, Any]]:
+        """영역과 겹치는 Cellindex 후보군 조회"""
+        rows = self._bbox_rows('cellidindex', min_lon, max_lon, min_lat, max_lat)
+        return self._rows('cellidindex', CELLINDEX_KEYS, rows)
+
+    def iter_cellindex_bboxes(self, chunk_size: int = 50000) -> Iterator[List[tuple]]:
+        """Cellindex 전체를 (lcellids, minX, maxX, minY, maxY) 튜플 청크로 스트리밍"""
+        columns = self.tables['cellidindex']
+        for start in range(0, self.meta['tables']['cellidindex']['rows'], chunk_size):
+            rows = slice(start, start + chunk_size)
+            yield list(zip(*(columns[key].get(rows) for key in CELLINDEX_KEYS)))
+
+    def close(self):
+        """메모리 맵 해제"""
+        self.tables = {}
+        self._bbox_indexes = {}
+
+def main():
+    parser = argparse.ArgumentParser(description='DB 테이블을 로컬 스냅샷으로 내보내기')
+    parser.add_argument('--config', type=str, required=True, help='설정 파일 경로')
+    parser.add_argument('--output', type=str, required=True, help='스냅샷 디렉토리')
+    parser.add_argument('--chunk-size', type=int, default=50000, help='조회 청크 크기')
+    args = parser.parse_args()
+
+    from .config import Config
+    from .db_connector import DBConnector
+    config = Config(args.config)
+    db = DBConnector(config.db)
+    try:
+        export_snapshot(db, args.output, args.chunk_size, config.processor.building_polygon_column or None)
+    finally:
+        db.close()
+    print(f"스냅샷 저장 완료: {args.output}")
+
+if __name__ == '__main__':
+    main()
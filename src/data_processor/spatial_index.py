@@ -0,0 +1,332 @@
+from typing import Dict, List, Any, Iterable, Optional, Sequence, Tuple
+from decimal import Decimal
+import sys
+import numpy as np
+
+class GridIndex:
+    """균일 그리드 해시 기반 bbox 공간 인덱스 (CSR 패킹)
+
+    각 bbox를 겹치는 모든 그리드 버킷에 등록하고, 버킷 키를 정렬된 배열 +
+    오프셋(CSR) 형태로 보관한다. 버킷 수가 MAX_CELLS_PER_BOX를 넘는 대형 bbox는
+    별도 목록으로 관리해 항상 후보에 포함한다.
+
+    메모리: bbox 좌표 4개(float64) + 숫자 속성 컬럼 + 버킷 엔트리(int32) 기준으로
+    건물 1건당 최소 약 BYTES_PER_ENTRY 바이트 (100만 건 ≈ 100MB). 큰 bbox의 버킷 엔트리
+    (최대 MAX_CELLS_PER_BOX개)와 object 컬럼의 문자열은 nbytes로 적재 후 측정한다.
+    """
+    MAX_CELLS_PER_BOX = 64
+    BYTES_PER_ENTRY = 100
+    BOUND_KEYS = ('min_x', 'max_x', 'min_y', 'max_y')
+
+    def __init__(self, min_x: np.ndarray, max_x: np.ndarray, min_y: np.ndarray, max_y: np.ndarray,
+                 columns: Dict[str, np.ndarray], cell_size: float):
+        self.min_x = np.asarray(min_x, dtype=np.float64)
+        self.max_x = np.asarray(max_x, dtype=np.float64)
+        self.min_y = np.asarray(min_y, dtype=np.float64)
+        self.max_y = np.asarray(max_y, dtype=np.float64)
+        self.columns = columns
+        self.cell_size = cell_size
+        self.source_order: Optional[np.ndarray] = None  # sort_by로 정렬한 경우 bbox별 원래 입력 위치
+        self._build()
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[Sequence[tuple]], column_names: Sequence[str],
+                    cell_size: float, sort_by: Optional[str] = None) -> 'GridIndex':
+        """(속성..., minX, maxX, minY, maxY) 튜플 청크 스트림으로 인덱스 생성
+        (sort_by: 이 컬럼 순으로 bbox를 정렬해 점별 결과가 같은 순서가 되게 함)"""
+        bounds, columns = collect_chunks(chunks, column_names)
+        order = sort_columns(bounds, columns, sort_by)
+        index = cls(*bounds, columns=columns, cell_size=cell_size)
+        index.source_order = order
+        return index
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Dict[str, Any]], column_names: Sequence[str],
+                  cell_size: float) -> 'GridIndex':
+        """bbox 딕셔너리 목록(min_x/max_x/min_y/max_y 포함)으로 인덱스 생성"""
+        keys = list(column_names) + list(cls.BOUND_KEYS)
+        return cls.from_chunks([[tuple(row[k] for k in keys) for row in rows]], column_names, cell_size)
+
+    def __len__(self) -> int:
+        return len(self.min_x)
+
+    @property
+    def nbytes(self) -> int:
+        """인덱스가 점유하는 배열 메모리 (바이트)"""
+        arrays = [self.min_x, self.max_x, self.min_y, self.max_y,
+                  self._keys, self._starts, self._entries, self._large]
+        arrays.extend(self.columns.values())
+        return int(sum(array_nbytes(a) for a in arrays))
+
+    def _cells(self, values: np.ndarray) -> np.ndarray:
+        return np.floor(values / self.cell_size).astype(np.int64)
+
+    @staticmethod
+    def _cell_key(gx: np.ndarray, gy: np.ndarray) -> np.ndarray:
+        return (gx << 32) + (gy + (1 << 31))
+
+    def _build(self):
+        """bbox를 그리드 버킷에 등록하고 CSR 배열로 패킹"""
+        cx0, cx1 = self._cells(self.min_x), self._cells(self.max_x)
+        cy0, cy1 = self._cells(self.min_y), self._cells(self.max_y)
+        nx = cx1 - cx0 + 1
+        ny = cy1 - cy0 + 1
+        n_cells = nx * ny
+
+        large = n_cells > self.MAX_CELLS_PER_BOX
+        self._large = np.flatnonzero(large)
+        boxes = np.flatnonzero(~large)
+        counts = n_cells[boxes]
+
+        # bbox별 버킷 범위를 (bbox, 버킷) 엔트리로 펼침
+        box = np.repeat(boxes, counts)
+        local = np.arange(len(box)) - np.repeat(np.cumsum(counts) - counts, counts)
+        gx = cx0[box] + local // ny[box]
+        gy = cy0[box] + local % ny[box]
+        keys = self._cell_key(gx, gy)
+
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        entry_dtype = np.int32 if len(self.min_x) < 2 ** 31 else np.int64
+        self._entries = box[order].astype(entry_dtype)
+        self._keys, starts = np.unique(keys, return_index=True)
+        self._starts = np.append(starts, len(keys)).astype(np.int64)
+
+    def _lookup(self, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """버킷 키별 엔트리 시작 위치와 개수"""
+        if not len(self._keys):
+            zeros = np.zeros(len(keys), dtype=np.int64)
+            return zeros, zeros
+        pos = np.minimum(np.searchsorted(self._keys, keys), len(self._keys) - 1)
+        found = self._keys[pos] == keys
+        starts = np.where(found, self._starts[pos], 0)
+        counts = np.where(found, self._starts[pos + 1] - self._starts[pos], 0)
+        return starts, counts
+
+    def query(self, lat: float, lon: float, margin: float) -> np.ndarray:
+        """(lat, lon) ± margin 영역과 겹치는 bbox 인덱스 (DB 후보 조회와 동일 조건)"""
+        return self.query_bbox(lon - margin, lon + margin, lat - margin, lat + margin)
+
+    def query_bbox(self, min_x: float, max_x: float, min_y: float, max_y: float) -> np.ndarray:
+        """영역과 겹치는 bbox 인덱스 (인덱스 순서)"""
+        x0, x1 = self._cells(np.array([min_x, max_x]))
+        y0, y1 = self._cells(np.array([min_y, max_y]))
+        gx = np.arange(x0, x1 + 1)
+        gy = np.arange(y0, y1 + 1)
+        keys = self._cell_key(np.repeat(gx, len(gy)), np.tile(gy, len(gx)))
+        starts, counts = self._lookup(keys)
+        candidates = np.unique(np.concatenate([self._entries[expand_ranges(starts, counts)], self._large]))
+
+        hit = ((self.min_x[candidates] <= max_x) & (self.max_x[candidates] >= min_x) &
+               (self.min_y[candidates] <= max_y) & (self.max_y[candidates] >= min_y))
+        return candidates[hit]
+
+    def contains_points(self, lats: np.ndarray, lons: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """각 점을 포함하는 bbox 쌍 (점 인덱스, bbox 인덱스)을 점 순서로 반환"""
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+
+        # 1. 점이 속한 버킷의 엔트리와 쌍 생성
+        starts, counts = self._lookup(self._cell_key(self._cells(lons), self._cells(lats)))
+        point_idx = np.repeat(np.arange(len(lats)), counts)
+        box_idx = self._entries[expand_ranges(starts, counts)].astype(np.int64)
+
+        # 2. 대형 bbox는 모든 점과 쌍 생성
+        if len(self._large):
+            point_idx = np.concatenate([point_idx, np.repeat(np.arange(len(lats)), len(self._large))])
+            box_idx = np.concatenate([box_idx, np.tile(self._large, len(lats))])
+
+        # 3. 정확한 포함 검사
+        px, py = lons[point_idx], lats[point_idx]
+        hit = ((self.min_x[box_idx] <= px) & (px <= self.max_x[box_idx]) &
+               (self.min_y[box_idx] <= py) & (py <= self.max_y[box_idx]))
+        point_idx, box_idx = point_idx[hit], box_idx[hit]
+        order = np.lexsort((box_idx, point_idx))
+        return point_idx[order], box_idx[order]
+
+    def rows(self, indices: np.ndarray) -> List[Dict[str, Any]]:
+        """bbox 인덱스를 DB 조회 결과와 같은 딕셔너리 목록으로 변환"""
+        return bbox_rows(self, indices)
+
+
+class IntervalIndex:
+    """min_x 정렬 기반 bbox 구간 인덱스 (sorted-interval)
+
+    bbox를 min_x 순으로 정렬해 두고, 점 x에 대해 min_x가 [x - 최대 폭, x]인 구간을
+    이진 탐색으로 찾은 뒤 나머지 변을 벡터 비교한다. 폭이 고른 bbox(셀 인덱스)에 맞으며,
+    폭이 중앙값의 WIDE_FACTOR배를 넘는 bbox는 별도 목록으로 항상 후보에 포함한다.
+    """
+    WIDE_FACTOR = 8
+    BOUND_KEYS = GridIndex.BOUND_KEYS
+
+    def __init__(self, min_x: np.ndarray, max_x: np.ndarray, min_y: np.ndarray, max_y: np.ndarray,
+                 columns: Dict[str, np.ndarray]):
+        self.min_x = np.asarray(min_x, dtype=np.float64)
+        self.max_x = np.asarray(max_x, dtype=np.float64)
+        self.min_y = np.asarray(min_y, dtype=np.float64)
+        self.max_y = np.asarray(max_y, dtype=np.float64)
+        self.columns = columns
+        self.source_order: Optional[np.ndarray] = None  # sort_by로 정렬한 경우 bbox별 원래 입력 위치
+
+        widths = self.max_x - self.min_x
+        limit = np.median(widths) * self.WIDE_FACTOR if len(widths) else 0.0
+        wide = widths > limit
+        self._wide = np.flatnonzero(wide)
+        narrow = np.flatnonzero(~wide)
+        self._order = narrow[np.argsort(self.min_x[narrow], kind='stable')]
+        self._sorted_min_x = self.min_x[self._order]
+        self._max_width = float(widths[narrow].max()) if len(narrow) else 0.0
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[Sequence[tuple]], column_names: Sequence[str],
+                    sort_by: Optional[str] = None) -> 'IntervalIndex':
+        """(속성..., minX, maxX, minY, maxY) 튜플 청크 스트림으로 인덱스 생성 (sort_by: 정렬 컬럼)"""
+        bounds, columns = collect_chunks(chunks, column_names)
+        order = sort_columns(bounds, columns, sort_by)
+        index = cls(*bounds, columns=columns)
+        index.source_order = order
+        return index
+
+    def __len__(self) -> int:
+        return len(self.min_x)
+
+    @property
+    def nbytes(self) -> int:
+        """인덱스가 점유하는 배열 메모리 (바이트)"""
+        arrays = [self.min_x, self.max_x, self.min_y, self.max_y, self._wide, self._order, self._sorted_min_x]
+        arrays.extend(self.columns.values())
+        return int(sum(array_nbytes(a) for a in arrays))
+
+    def _candidates(self, x0: np.ndarray, x1: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """x 범위 [x0, x1]별 후보 (범위 인덱스, bbox 인덱스)"""
+        lo = np.searchsorted(self._sorted_min_x, x0 - self._max_width, side='left')
+        hi = np.searchsorted(self._sorted_min_x, x1, side='right')
+        counts = hi - lo
+        range_idx = np.repeat(np.arange(len(x0)), counts)
+        box_idx = self._order[expand_ranges(lo, counts)]
+        if len(self._wide):
+            range_idx = np.concatenate([range_idx, np.repeat(np.arange(len(x0)), len(self._wide))])
+            box_idx = np.concatenate([box_idx, np.tile(self._wide, len(x0))])
+        return range_idx, box_idx
+
+    def query(self, lat: float, lon: float, margin: float) -> np.ndarray:
+        """(lat, lon) ± margin 영역과 겹치는 bbox 인덱스 (DB 후보 조회와 동일 조건)"""
+        return self.query_bbox(lon - margin, lon + margin, lat - margin, lat + margin)
+
+    def query_bbox(self, min_x: float, max_x: float, min_y: float, max_y: float) -> np.ndarray:
+        """영역과 겹치는 bbox 인덱스 (인덱스 순서)"""
+        _, candidates = self._candidates(np.array([min_x]), np.array([max_x]))
+        candidates = np.unique(candidates)
+        hit = ((self.min_x[candidates] <= max_x) & (self.max_x[candidates] >= min_x) &
+               (self.min_y[candidates] <= max_y) & (self.max_y[candidates] >= min_y))
+        return candidates[hit]
+
+    def contains_points(self, lats: np.ndarray, lons: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """각 점을 포함하는 bbox 쌍 (점 인덱스, bbox 인덱스)을 점 순서로 반환"""
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        point_idx, box_idx = self._candidates(lons, lons)
+        px, py = lons[point_idx], lats[point_idx]
+        hit = ((self.min_x[box_idx] <= px) & (px <= self.max_x[box_idx]) &
+               (self.min_y[box_idx] <= py) & (py <= self.max_y[box_idx]))
+        point_idx, box_idx = point_idx[hit], box_idx[hit]
+        order = np.lexsort((box_idx, point_idx))
+        return point_idx[order], box_idx[order]
+
+    def rows(self, indices: np.ndarray) -> List[Dict[str, Any]]:
+        """bbox 인덱스를 DB 조회 결과와 같은 딕셔너리 목록으로 변환"""
+        return bbox_rows(self, indices)
+
+
+def collect_chunks(chunks: Iterable[Sequence[tuple]],
+                   column_names: Sequence[str]) -> Tuple[List[np.ndarray], Dict[str, np.ndarray]]:
+    """(속성..., minX, maxX, minY, maxY) 튜플 청크를 (bbox 배열 4개, 속성 컬럼) 으로 모음"""
+    n_cols = len(column_names)
+    parts: List[List[np.ndarray]] = [[] for _ in range(n_cols + 4)]
+    for chunk in chunks:
+        if not chunk:
+            continue
+        for i, values in enumerate(zip(*chunk)):
+            parts[i].append(_to_array(values, numeric=i >= n_cols))
+
+    def concat(arrays, numeric):
+        if not arrays:
+            return np.empty(0, dtype=np.float64 if numeric else object)
+        return np.concatenate(arrays)
+
+    columns = {name: concat(parts[i], False) for i, name in enumerate(column_names)}
+    bounds = [concat(parts[n_cols + i], True) for i in range(4)]
+    return bounds, columns
+
+
+def sort_columns(bounds: List[np.ndarray], columns: Dict[str, np.ndarray],
+                 sort_by: Optional[str]) -> Optional[np.ndarray]:
+    """bbox 배열과 속성 컬럼을 sort_by 컬럼 순으로 제자리 정렬하고 원래 위치 배열 반환 (None이면 그대로)
+
+    bbox 인덱스 순서가 곧 점별 결과 순서이므로, DB 조회의 ORDER BY와 같은 순서를 얻는다.
+    """
+    if sort_by is None:
+        return None
+    order = np.argsort(columns[sort_by], kind='stable')
+    bounds[:] = [values[order] for values in bounds]
+    for name in columns:
+        columns[name] = columns[name][order]
+    return order
+
+
+def bbox_rows(index, indices: np.ndarray) -> List[Dict[str, Any]]:
+    """인덱스의 bbox를 (속성..., min_x, max_x, min_y, max_y) 딕셔너리 목록으로 변환"""
+    names = list(index.columns) + list(index.BOUND_KEYS)
+    arrays = list(index.columns.values()) + [index.min_x, index.max_x, index.min_y, index.max_y]
+    values = [a[indices].tolist() for a in arrays]
+    return [dict(zip(names, row)) for row in zip(*values)]
+
+
+def array_nbytes(values: np.ndarray) -> int:
+    """배열 메모리 (object 배열은 포인터에 더해 참조하는 객체 크기를 객체별 1회 합산)"""
+    if values.dtype != object:
+        return int(values.nbytes)
+    objects = {id(v): v for v in values.tolist()}
+    return int(values.nbytes + sum(sys.getsizeof(v) for v in objects.values()))
+
+
+def expand_ranges(starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """(시작, 개수) 구간들을 연속 인덱스 배열로 펼침"""
+    total = int(counts.sum())
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + offsets
+
+
+def bbox_contains(lats: np.ndarray, lons: np.ndarray, min_x: np.ndarray, max_x: np.ndarray,
+                  min_y: np.ndarray, max_y: np.ndarray, chunk_pairs: int = 4_000_000) -> Tuple[np.ndarray, np.ndarray]:
+    """점 x bbox 전체 쌍에 대한 벡터화 포함 검사 (점 인덱스, bbox 인덱스)
+
+    점을 chunk_pairs / bbox 수 단위로 나눠 브로드캐스트하므로 메모리가 제한된다.
+    """
+    n_boxes = len(min_x)
+    if not len(lats) or not n_boxes:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    step = max(1, chunk_pairs // n_boxes)
+    point_parts, box_parts = [], []
+    for start in range(0, len(lats), step):
+        px = lons[start:start + step, None]
+        py = lats[start:start + step, None]
+        hit = (min_x <= px) & (px <= max_x) & (min_y <= py) & (py <= max_y)
+        p, b = np.nonzero(hit)
+        point_parts.append(p + start)
+        box_parts.append(b)
+    return np.concatenate(point_parts), np.concatenate(box_parts)
+
+
+def _to_array(values: Sequence[Any], numeric: bool) -> np.ndarray:
+    """DB 컬럼 값을 NumPy 배열로 변환 (Decimal은 float로, NULL이 있는 컬럼은 None 유지)"""
+    if numeric:
+        return np.asarray(values, dtype=np.float64)
+    arr = np.asarray(values)
+    if arr.dtype == object and any(isinstance(v, Decimal) for v in values):
+        if any(v is None for v in values):
+            # float 배열로 바꾸면 NULL이 NaN이 되어 JSON 출력이 깨지므로 object 배열로 보관
+            return np.array([float(v) if isinstance(v, Decimal) else v for v in values], dtype=object)
+        return arr.astype(np.float64)
+    return arr
@@ -1,7 +1,12 @@
-from typing import Dict, List, Any
+import math
+from typing import Dict, List, Any, Optional, Tuple
+import numpy as np
+from .cache import LRUCache
 from .db_connector import DBConnector
 from .config import ProcessorConfig
 from .cell_matcher import GridCellMatcher
+from .spatial_index import GridIndex, IntervalIndex, bbox_contains
+from .polygon import PolygonSet
 
 class SpatialMatcher:
     # 그리드 셀 상수
@@ -13,10 +18,144 @@ class SpatialMatcher:
     OFFSET_5M_Y = 0.0000460
     DEFAULT_LEVEL = 5  # 25m 그리드 셀
 
+    BUILDING_COLUMNS = ('uid', 'height', 'hstare', 'lstare')
+    CELL_COLUMNS = ('lcellids',)
+
     def __init__(self, db_connector: DBConnector, config: ProcessorConfig):
         self.db = db_connector
         self.config = config
         self.cell_matcher = GridCellMatcher()
+        self.building_index: Optional[GridIndex] = None
+        self.building_polygons: Optional[PolygonSet] = None
+        self.cell_index = None
+        self.cell_labels: List[List[str]] = []
+        # 정밀 검사: 폴리곤 컬럼이 설정된 경우에만 조회 결과에 'polygon' WKT 포함
+        self.polygon_column = config.building_polygon_column if config.building_precise_check else ''
+        self.stats = {
+            'building_queries': 0,
+            'building_batch_splits': 0
+        }
+        
+        # 후보 조회 캐시: spatial_margin 크기 타일 단위로 (타일 + 마진) 영역 후보를 보관
+        cache_size = config.cache_size if config.cache_enabled else 0
+        self.building_cache = LRUCache(cache_size)
+        self.cellindex_cache = LRUCache(cache_size)
+    
+    def load_building_index(self) -> Optional[GridIndex]:
+        """Building 테이블 bbox를 메모리 인덱스로 1회 적재 (메모리 상한 초과 시 None, 배치별 DB 조회로 진행)"""
+        # 1. 건수 기준 최소 크기가 이미 상한을 넘으면 적재하지 않음
+        count = self.db.get_building_count()
+        estimated_mb = count * GridIndex.BYTES_PER_ENTRY / (1024 * 1024)
+        if estimated_mb > self.config.building_index_max_mb:
+            print(f"건물 인덱스 예상 크기 {estimated_mb:.0f}MB가 상한 "
+                  f"{self.config.building_index_max_mb}MB를 초과하여 배치별 DB 조회 방식으로 진행합니다.")
+            return None
+        
+        polygons: List[Optional[str]] = []
+        
+        def chunks():
+            for chunk in self.db.iter_building_bboxes(polygon_column=self.polygon_column or None):
+                if self.polygon_column:
+                    polygons.extend(row[-1] for row in chunk)
+                    chunk = [row[:-1] for row in chunk]
+                yield chunk
+        
+        # DB 후보 조회(ORDER BY uid)와 같은 결과 순서가 되도록 uid 순으로 정렬
+        self.building_index = GridIndex.from_chunks(
+            chunks(),
+            self.BUILDING_COLUMNS,
+            self.config.building_index_cell_size,
+            sort_by='uid'
+        )
+        if self.polygon_column:
+            self.building_polygons = PolygonSet.from_wkt([polygons[i] for i in self.building_index.source_order.tolist()])
+            index = self.building_index
+            swapped = self.building_polygons.count_axis_swapped(index.min_x, index.max_x, index.min_y, index.max_y)
+            if swapped:
+                raise ValueError(f"건물 폴리곤 {swapped}건의 좌표가 위도/경도 순서입니다 (SRID 0이 아니면 "
+                                 f"building_polygon_column을 ST_AsText(col, 'axis-order=long-lat')로 설정)")
+        
+        # 2. 버킷 엔트리/문자열/폴리곤 변을 포함한 실제 크기가 상한을 넘으면 버림
+        measured = self.building_index.nbytes + (self.building_polygons.nbytes if self.building_polygons is not None else 0)
+        measured_mb = measured / (1024 * 1024)
+        if measured_mb > self.config.building_index_max_mb:
+            print(f"건물 인덱스 크기 {measured_mb:.1f}MB가 상한 "
+                  f"{self.config.building_index_max_mb}MB를 초과하여 배치별 DB 조회 방식으로 진행합니다.")
+            self.building_index = self.building_polygons = None
+        return self.building_index
+    
+    def load_cell_index(self):
+        """Cellindex 테이블 bbox를 메모리 인덱스로 1회 적재 (cell_index_type=btree: 정렬 구간, 그 외: 그리드)"""
+        chunks = self.db.iter_cellindex_bboxes()
+        if self.config.cell_index_type == 'btree':
+            self.cell_index = IntervalIndex.from_chunks(chunks, self.CELL_COLUMNS)
+        else:
+            self.cell_index = GridIndex.from_chunks(chunks, self.CELL_COLUMNS, self.config.cell_index_cell_size)
+        # 셀 인덱스 행별 lcellids (쉼표 구분) 미리 분리
+        self.cell_labels = [labels.split(',') if labels else [] for labels in self.cell_index.columns['lcellids'].tolist()]
+        return self.cell_index
+    
+    def match_cells_batch(self, locations: List[Dict[str, Any]]) -> List[List[str]]:
+        """위치별로 포함하는 셀 인덱스 bbox들의 lcellids (중복 제거, 테이블 순서)"""
+        lats = np.fromiter((loc['latitude'] for loc in locations), dtype=np.float64, count=len(locations))
+        lons = np.fromiter((loc['longitude'] for loc in locations), dtype=np.float64, count=len(locations))
+        results: List[List[str]] = [[] for _ in locations]
+        point_idx, box_idx = self.cell_index.contains_points(lats, lons)
+        for p, b in zip(point_idx.tolist(), box_idx.tolist()):
+            results[p].extend(self.cell_labels[b])
+        return [list(dict.fromkeys(cells)) if len(cells) > 1 else cells for cells in results]
+    
+    def _tile(self, lat: float, lon: float) -> Tuple[int, int]:
+        """캐시 키로 쓰는 spatial_margin 크기 타일 좌표"""
+        size = self.config.spatial_margin
+        return math.floor(lon / size), math.floor(lat / size)
+    
+    def _tile_region(self, tile: Tuple[int, int]) -> Tuple[float, float, float, float]:
+        """타일 내 모든 점의 ± margin 검색 영역을 덮는 (min_lon, max_lon, min_lat, max_lat)"""
+        size = margin = self.config.spatial_margin
+        tx, ty = tile
+        return tx * size - margin, (tx + 1) * size + margin, ty * size - margin, (ty + 1) * size + margin
+    
+    def _split_polygons(self, candidates: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Optional[PolygonSet]]:
+        """조회 결과에서 'polygon' WKT를 떼어 후보 순서대로 패킹 (출력에는 폴리곤 미포함)"""
+        if not self.polygon_column:
+            return candidates, None
+        return candidates, PolygonSet.from_wkt([building.pop('polygon') for building in candidates])
+    
+    def _building_candidates(self, lat: float, lon: float) -> Tuple[List[Dict[str, Any]], Optional[PolygonSet]]:
+        """Building 후보군과 후보별 폴리곤 (인덱스가 있으면 메모리에서, 없으면 타일 캐시 또는 DB에서)"""
+        margin = self.config.spatial_margin
+        if self.building_index is not None:
+            indices = self.building_index.query(lat, lon, margin)
+            polygons = self.building_polygons.take(indices) if self.building_polygons is not None else None
+            return self.building_index.rows(indices), polygons
+        
+        polygon_column = self.polygon_column or None
+        def load(tile=None):
+            self.stats['building_queries'] += 1
+            if tile is None:
+                return self._split_polygons(self.db.get_building_candidates(lat, lon, margin, polygon_column))
+            return self._split_polygons(
+                self.db.get_building_candidates_bbox(*self._tile_region(tile), polygon_column=polygon_column)
+            )
+        
+        if not self.config.cache_enabled:
+            return load()
+        tile = self._tile(lat, lon)
+        return self.building_cache.get_or_load(tile, lambda: load(tile))
+    
+    def get_building_candidates(self, lat: float, lon: float) -> List[Dict[str, Any]]:
+        """Building 후보군 조회"""
+        return self._building_candidates(lat, lon)[0]
+    
+    def get_cellindex_candidates(self, lat: float, lon: float) -> List[Dict[str, Any]]:
+        """Cellindex 후보군 조회 (타일 캐시 사용)"""
+        if not self.config.cache_enabled:
+            return self.db.get_cellindex_candidates(lat, lon, self.config.spatial_margin)
+        tile = self._tile(lat, lon)
+        return self.cellindex_cache.get_or_load(
+            tile, lambda: self.db.get_cellindex_candidates_bbox(*self._tile_region(tile))
+        )
     
     def is_point_in_bbox(self, lat: float, lon: float, bbox: Dict[str, float]) -> bool:
         """점이 bbox 안에 있는지 확인"""
@@ -24,28 +163,24 @@ class SpatialMatcher:
                 bbox['min_y'] <= lat <= bbox['max_y'])
     
     def is_point_in_polygon(self, lat: float, lon: float, building: Dict[str, Any]) -> bool:
-        """점이 건물 폴리곤 내부에 있는지 확인"""
-        if 'polygon' in building:
-            # TODO: 폴리곤 포함 여부 검사 로직 구현
-            # 현재는 BBox로 대체
+        """점이 건물 폴리곤(WKT) 내부에 있는지 확인 (폴리곤이 없으면 True)"""
+        if not building.get('polygon'):
             return True
-        return True
+        polygons = PolygonSet.from_wkt([building['polygon']])
+        return bool(polygons.contains(np.array([lon]), np.array([lat]), np.zeros(1, dtype=np.int64))[0])
     
-    def match_buildings(self, lat: float, lon: float, candidates: List[Dict]) -> List[Dict]:
+    def match_buildings(self, lat: float, lon: float, candidates: List[Dict],
+                        polygons: Optional[PolygonSet] = None) -> List[Dict]:
         """Building 매칭 - 2단계 처리"""
-        matched = []
-        for building in candidates:
-            # 1단계: 빠른 BBox 검사
-            if not self.is_point_in_bbox(lat, lon, building):
-                continue
-                
-            # 2단계: 건물 특성에 따른 추가 검사
-            if building.get('needs_precise_check', False):
-                if not self.is_point_in_polygon(lat, lon, building):
-                    continue
-            
-            matched.append(building)
-        return matched
+        # 1단계: 빠른 BBox 검사
+        matched = [i for i, building in enumerate(candidates) if self.is_point_in_bbox(lat, lon, building)]
+        
+        # 2단계: 폴리곤이 있으면 bbox 통과 후보 전체를 한 번에 정밀 검사
+        if polygons is not None and matched:
+            n = len(matched)
+            inside = polygons.contains(np.full(n, lon), np.full(n, lat), np.array(matched))
+            matched = [i for i, keep in zip(matched, inside.tolist()) if keep]
+        return [candidates[i] for i in matched]
 
     def find_matches(self, location: Dict[str, Any]) -> Dict[str, Any]:
         """위치에 대한 building과 cell 매칭"""
@@ -55,15 +190,77 @@ class SpatialMatcher:
         grid_cell = self.cell_matcher.match(lat, lon)
         
         # 2. Building 매칭 (2단계 처리)
-        building_candidates = self.db.get_building_candidates(
-            lat, lon, self.config.spatial_margin
-        )
-        matched_buildings = self.match_buildings(lat, lon, building_candidates)
+        building_candidates, polygons = self._building_candidates(lat, lon)
+        matched_buildings = self.match_buildings(lat, lon, building_candidates, polygons)
         
-        return {
+        result = {
             'buildings': matched_buildings,
             'grid_cell': grid_cell
         }
+        
+        # 3. 셀 인덱스 매칭 (메모리 인덱스가 적재된 경우)
+        if self.cell_index is not None:
+            result['lcellids'] = self.match_cells_batch([location])[0]
+        return result
+    
+    def find_buildings_batch(self, locations: List[Dict[str, Any]]) -> List[List[Dict]]:
+        """배치 전체 위치에 대한 Building 매칭 (위치 순서대로 매칭 목록 반환)"""
+        lats = np.fromiter((loc['latitude'] for loc in locations), dtype=np.float64, count=len(locations))
+        lons = np.fromiter((loc['longitude'] for loc in locations), dtype=np.float64, count=len(locations))
+        results: List[List[Dict]] = [[] for _ in locations]
+        
+        # 1. 메모리 인덱스가 있으면 인덱스에서 일괄 포함 검사
+        if self.building_index is not None:
+            point_idx, box_idx = self.building_index.contains_points(lats, lons)
+            if self.building_polygons is not None:
+                inside = self.building_polygons.contains(lons[point_idx], lats[point_idx], box_idx)
+                point_idx, box_idx = point_idx[inside], box_idx[inside]
+            for p, building in zip(point_idx.tolist(), self.building_index.rows(box_idx)):
+                results[p].append(building)
+            return results
+        
+        # 2. 없으면 배치 영역 단위로 DB 후보 조회
+        self._match_region(lats, lons, np.arange(len(locations)), results)
+        return results
+    
+    def _match_region(self, lats: np.ndarray, lons: np.ndarray, idx: np.ndarray, results: List[List[Dict]]):
+        """idx 위치들의 합집합 bbox로 후보를 1회 조회하고 벡터화 포함 검사로 할당"""
+        margin = self.config.spatial_margin
+        max_candidates = self.config.building_batch_max_candidates
+        region_lats, region_lons = lats[idx], lons[idx]
+        lon_span = region_lons.max() - region_lons.min()
+        lat_span = region_lats.max() - region_lats.min()
+        
+        # 긴 축 범위가 2*margin 이하면(같은 좌표 포함) 나눠도 조회 bbox가 거의 줄지 않으므로 제한 없이 조회
+        limit = max_candidates + 1 if len(idx) > 1 and max(lon_span, lat_span) > 2 * margin else None
+        self.stats['building_queries'] += 1
+        candidates = self.db.get_building_candidates_bbox(
+            region_lons.min() - margin, region_lons.max() + margin,
+            region_lats.min() - margin, region_lats.max() + margin,
+            limit=limit, polygon_column=self.polygon_column or None
+        )
+        
+        # 후보가 너무 많으면 긴 축 기준으로 배치를 반으로 나눠 재조회
+        if limit is not None and len(candidates) > max_candidates:
+            self.stats['building_batch_splits'] += 1
+            order = np.argsort(region_lons if lon_span >= lat_span else region_lats, kind='stable')
+            half = len(idx) // 2
+            self._match_region(lats, lons, idx[order[:half]], results)
+            self._match_region(lats, lons, idx[order[half:]], results)
+            return
+        
+        if not candidates:
+            return
+        candidates, polygons = self._split_polygons(candidates)
+        bounds = [np.array([c[k] for c in candidates], dtype=np.float64) for k in GridIndex.BOUND_KEYS]
+        point_idx, box_idx = bbox_contains(region_lats, region_lons, *bounds)
+        
+        # bbox를 통과한 (위치, 건물) 쌍 전체를 한 번에 폴리곤 검사
+        if polygons is not None:
+            inside = polygons.contains(region_lons[point_idx], region_lats[point_idx], box_idx)
+            point_idx, box_idx = point_idx[inside], box_idx[inside]
+        for p, b in zip(point_idx.tolist(), box_idx.tolist()):
+            results[idx[p]].append(candidates[b])
     
     def create_training_record(self, location: Dict[str, Any], matches: Dict[str, List]) -> Dict[str, Any]:
         """학습 데이터 레코드 생성"""
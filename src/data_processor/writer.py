@@ -0,0 +1,248 @@
+import json
+import os
+import time
+from json.encoder import encode_basestring
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from .checkpoint import sync_file, truncate_to
+from .fingerprint import FingerprintVocabulary, VOCABULARY_FIELDS, parse_batch, split_rows
+
+def float_repr(o):
+    """부동소수점 숫자를 문자열로 변환 (지수 표기법 방지)"""
+    if isinstance(o, float):
+        return format(o, 'f').rstrip('0').rstrip('.')
+    return repr(o)
+
+# json 모듈의 비유한 실수 표기
+_JSON_FLOAT_SPECIAL = {'nan': 'NaN', 'inf': 'Infinity', '-inf': '-Infinity'}
+
+def _str_list(raw: Optional[str]) -> str:
+    """쉼표 구분 DB 컬럼을 JSON 문자열 배열로 변환 (json.dumps(raw.split(','))와 동일)"""
+    if not raw:
+        return '[]'
+    # JSON 이스케이프는 쉼표를 만들거나 바꾸지 않으므로 한 번에 인코딩 후 구분자만 치환
+    return '[' + encode_basestring(raw).replace(',', '", "') + ']'
+
+def _json_rows(values: List[str], offsets) -> List[str]:
+    """평탄 값 문자열 목록을 행별 JSON 배열 문자열로 변환"""
+    return ['[' + ', '.join(row) + ']' for row in split_rows(values, offsets)]
+
+class RecordEncoder:
+    """위치 레코드를 원본/학습 데이터 JSONL 줄로 인코딩
+
+    두 줄 모두 DB 원본 컬럼 문자열에서 직접 만들며, 출력은 기존
+    json.dump(..., ensure_ascii=False) 결과와 바이트 단위로 같다.
+    vocabulary를 주면 학습 데이터 줄은 어휘 사전 정수 ID로 기록한다 (tokenized 출력).
+    """
+
+    def __init__(self, vocabulary: Optional[FingerprintVocabulary] = None):
+        self._buildings_encoder = json.JSONEncoder(ensure_ascii=False, default=float_repr)
+        self.vocabulary = vocabulary
+
+    def encode_record(self, location: Dict[str, Any], buildings: Optional[List[Dict]] = None,
+                      train: bool = True) -> Tuple[str, Optional[str]]:
+        """위치 1건을 (원본 줄, 학습 데이터 줄)로 인코딩 (줄바꿈 제외, train=False면 학습 데이터 줄은 None)"""
+        wmac = location['wmac'] or ''
+        lcellid = location['lcellid'] or ''
+        ipcikey = location['ipcikey'] or ''
+        wrssi = [repr(float(x)) for x in location['wrssi'].split(',')] if location['wrssi'] else []
+        x_id = location['grid_cell']['x_id']
+        y_id = location['grid_cell']['y_id']
+
+        wrssi_json = '[' + ', '.join([_JSON_FLOAT_SPECIAL.get(x, x) for x in wrssi]) + ']'
+        answer = f'"grid_cell": {{"x_id": {x_id}, "y_id": {y_id}}}'
+        if 'grid_cells' in location:
+            answer += ', "grid_cells": ' + self._buildings_encoder.encode(location['grid_cells'])
+        if buildings is not None:
+            answer += ', "buildings": ' + self._buildings_encoder.encode(buildings)
+        if 'lcellids' in location:
+            answer += ', "lcellids": ' + self._buildings_encoder.encode(location['lcellids'])
+        out_line = (f'{{"input": {{"lcellid": {_str_list(lcellid)}, "wmac": {_str_list(wmac)}, '
+                    f'"wrssi": {wrssi_json}, "ipcikey": {_str_list(ipcikey)}}}, "answer": {{{answer}}}}}')
+        if not train:
+            return out_line, None
+
+        prompt = f"wmac={wmac} wrssi={','.join(wrssi)} lcellid={lcellid} ipcikey={ipcikey}"
+        train_line = f'{{"prompt": {encode_basestring(prompt)}, "completion": "x_id={x_id},y_id={y_id}"}}'
+        return out_line, train_line
+
+    def encode_batch(self, locations: List[Dict[str, Any]],
+                     buildings: Optional[List[List[Dict]]] = None) -> Tuple[str, str]:
+        """배치 전체를 (원본 텍스트, 학습 데이터 텍스트)로 인코딩"""
+        if not locations:
+            return '', ''
+        # tokenized 출력은 학습 데이터 줄을 문자열로 만들지 않고 정수 ID 줄로 한 번만 인코딩
+        train = self.vocabulary is None
+        if buildings is None:
+            buildings = [None] * len(locations)
+        lines = [self.encode_record(location, matched, train) for location, matched in zip(locations, buildings)]
+        out_lines, train_lines = zip(*lines)
+        if not train:
+            train_lines = self.encode_tokenized(locations)
+        return '\n'.join(out_lines) + '\n', '\n'.join(train_lines) + '\n'
+
+    def encode_tokenized(self, locations: List[Dict[str, Any]]) -> List[str]:
+        """학습 데이터 줄을 정수 ID로 인코딩
+        {"wmac": [ID...], "wrssi": [...], "lcellid": [ID...], "ipcikey": [ID...], "x_id": .., "y_id": ..}
+        """
+        batch = parse_batch(locations, self.vocabulary)
+        columns = {field: _json_rows(list(map(str, batch.ids[field].tolist())), batch.offsets[field])
+                   for field in VOCABULARY_FIELDS}
+        wrssi = [repr(x) for x in batch.wrssi.tolist()]
+        columns['wrssi'] = _json_rows([_JSON_FLOAT_SPECIAL.get(x, x) for x in wrssi], batch.wrssi_offsets)
+        return [
+            f'{{"wmac": {wmac}, "wrssi": {wrssi}, "lcellid": {lcellid}, "ipcikey": {ipcikey}, '
+            f'"x_id": {location["grid_cell"]["x_id"]}, "y_id": {location["grid_cell"]["y_id"]}}}'
+            for location, wmac, wrssi, lcellid, ipcikey
+            in zip(locations, columns['wmac'], columns['wrssi'], columns['lcellid'], columns['ipcikey'])
+        ]
+
+class DualJsonlWriter:
+    """원본(result.jsonl)/학습(result_traindata.jsonl) JSONL 동시 저장 (배치 단위 인코딩, 큰 버퍼 기록)"""
+
+    def __init__(self, output_path: str, train_path: str, buffer_size: int = 1024 * 1024,
+                 resume_state: Optional[Dict[str, Any]] = None,
+                 vocabulary: Optional[FingerprintVocabulary] = None):
+        self.output_path = output_path
+        self.train_path = train_path
+        self.paths = [output_path, train_path]
+        self.encoder = RecordEncoder(vocabulary)
+        self.records = 0
+        self.encode_time = 0.0  # 인코딩 누적 시간 (초)
+        self.bytes_written = 0  # 이번 실행에서 기록한 바이트 수
+        if resume_state:
+            # 체크포인트 시점 크기로 잘라내고 이어쓰기
+            out_offset, train_offset = resume_state['offsets']
+            self._f_out = truncate_to(output_path, out_offset, buffer_size)
+            self._f_train = truncate_to(train_path, train_offset, buffer_size)
+            self.records = resume_state['records']
+        else:
+            self._f_out = open(output_path, 'wb', buffering=buffer_size)
+            self._f_train = open(train_path, 'wb', buffering=buffer_size)
+
+    def __enter__(self) -> 'DualJsonlWriter':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write_batch(self, locations: List[Dict[str, Any]], buildings: Optional[List[List[Dict]]] = None):
+        """배치 1개를 두 파일에 기록"""
+        encode_start = time.time()
+        out_data, train_data = (text.encode('utf-8') for text in self.encoder.encode_batch(locations, buildings))
+        self.encode_time += time.time() - encode_start
+        self._f_out.write(out_data)
+        self._f_train.write(train_data)
+        self.records += len(locations)
+        self.bytes_written += len(out_data) + len(train_data)
+
+    def checkpoint(self) -> Dict[str, Any]:
+        """두 파일을 디스크까지 기록하고 이어쓰기에 필요한 파일 오프셋 반환"""
+        sync_file(self._f_out)
+        sync_file(self._f_train)
+        return {'offsets': [self._f_out.tell(), self._f_train.tell()], 'records': self.records}
+
+    def close(self):
+        # 완료 체크포인트가 가리키는 내용이 디스크에 남도록 닫기 전에 기록
+        sync_file(self._f_out)
+        sync_file(self._f_train)
+        self._f_out.close()
+        self._f_train.close()
+
+class ParquetTrainWriter:
+    """학습 데이터 컬럼형 Parquet 저장 (parquet_row_group_size 행 단위 row group 스트리밍)
+
+    컬럼: id, x_id, y_id, wmac/lcellid/ipcikey(list<string>), wrssi(list<float32>),
+    buildings(list<string>, 빌딩 탐색 시 건물 uid), lcellids(list<string>, 셀 인덱스 매칭 시),
+    x_id_{레벨}/y_id_{레벨}(int32, 그리드 레벨이 여러 개일 때 레벨별)
+    vocabulary를 주면 wmac/lcellid/ipcikey는 어휘 사전 ID(list<int32>)로 저장한다.
+    """
+
+    def __init__(self, path: str, compression: str = 'zstd', row_group_size: int = 65536,
+                 include_buildings: bool = False, include_cells: bool = False,
+                 grid_levels: Sequence[int] = (), vocabulary: Optional[FingerprintVocabulary] = None):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("parquet 출력에는 pyarrow가 필요합니다: pip install pyarrow")
+        self._pa = pa
+        self.paths = [path]
+        self.row_group_size = row_group_size
+        self.vocabulary = vocabulary
+        token_type = pa.list_(pa.int32()) if vocabulary is not None else pa.list_(pa.string())
+        fields = [
+            ('id', pa.int64()),
+            ('x_id', pa.int32()),
+            ('y_id', pa.int32()),
+            ('wmac', token_type),
+            ('wrssi', pa.list_(pa.float32())),
+            ('lcellid', token_type),
+            ('ipcikey', token_type)
+        ]
+        self.grid_levels = tuple(grid_levels) if len(grid_levels) > 1 else ()
+        for level in self.grid_levels:
+            fields.extend([(f'x_id_{level}', pa.int32()), (f'y_id_{level}', pa.int32())])
+        if include_buildings:
+            fields.append(('buildings', pa.list_(pa.string())))
+        if include_cells:
+            fields.append(('lcellids', pa.list_(pa.string())))
+        self.schema = pa.schema(fields)
+        self._writer = pq.ParquetWriter(path, self.schema, compression=compression)
+        self._pending: Dict[str, list] = {name: [] for name in self.schema.names}
+        self._pending_rows = 0
+        self.records = 0
+        self.encode_time = 0.0  # 컬럼 버퍼 구성 누적 시간 (초, row group 기록 제외)
+        self.bytes_written = 0  # 기록한 파일 크기 (close 후 확정)
+
+    def __enter__(self) -> 'ParquetTrainWriter':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write_batch(self, locations: List[Dict[str, Any]], buildings: Optional[List[List[Dict]]] = None):
+        """배치 1개를 컬럼 버퍼에 추가하고 row group 크기가 차면 기록"""
+        encode_start = time.time()
+        pending = self._pending
+        for location in locations:
+            pending['id'].append(location['id'])
+            pending['x_id'].append(location['grid_cell']['x_id'])
+            pending['y_id'].append(location['grid_cell']['y_id'])
+        if self.vocabulary is not None:
+            batch = parse_batch(locations, self.vocabulary)
+            for field in VOCABULARY_FIELDS:
+                pending[field].extend(batch.id_rows(field))
+            pending['wrssi'].extend(batch.wrssi_rows())
+        else:
+            for location in locations:
+                pending['wmac'].append(location['wmac'].split(',') if location['wmac'] else [])
+                pending['wrssi'].append([float(x) for x in location['wrssi'].split(',')] if location['wrssi'] else [])
+                pending['lcellid'].append(location['lcellid'].split(',') if location['lcellid'] else [])
+                pending['ipcikey'].append(location['ipcikey'].split(',') if location['ipcikey'] else [])
+        for i, level in enumerate(self.grid_levels):
+            pending[f'x_id_{level}'].extend(location['grid_cells'][i]['x_id'] for location in locations)
+            pending[f'y_id_{level}'].extend(location['grid_cells'][i]['y_id'] for location in locations)
+        if 'buildings' in pending:
+            matched = buildings if buildings is not None else [[] for _ in locations]
+            pending['buildings'].extend([str(b['uid']) for b in bs] for bs in matched)
+        if 'lcellids' in pending:
+            pending['lcellids'].extend(location.get('lcellids', []) for location in locations)
+        self._pending_rows += len(locations)
+        self.records += len(locations)
+        self.encode_time += time.time() - encode_start
+        if self._pending_rows >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending_rows:
+            return
+        table = self._pa.Table.from_pydict(self._pending, schema=self.schema)
+        self._writer.write_table(table, row_group_size=max(self._pending_rows, 1))
+        self._pending = {name: [] for name in self.schema.names}
+        self._pending_rows = 0
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+        self.bytes_written = os.path.getsize(self.paths[0])
+